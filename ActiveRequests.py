@@ -0,0 +1,31 @@
+import contextlib
+import threading
+
+class ActiveRequests:
+    """
+    Scheduling requests of the web server that are in progress, by client, goal and model. When a
+    client sends a new request for the same goal and model (e.g., the user clicks "Optimise" again),
+    its request in progress is superseded and can be cancelled.
+    """
+
+    def __init__(self, supersede=True):
+        self.supersede = supersede
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    # Registers a request within the context, and supersedes the request in progress with the same key.
+    # Yields an event that is set when the request is superseded in turn.
+    @contextlib.contextmanager
+    def track(self, key):
+        superseded = threading.Event()
+        with self.lock:
+            previous = self.requests.get(key)
+            if previous is not None and self.supersede:
+                previous.set()
+            self.requests[key] = superseded
+        try:
+            yield superseded
+        finally:
+            with self.lock:
+                if self.requests.get(key) is superseded:
+                    del self.requests[key]
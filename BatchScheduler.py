@@ -0,0 +1,142 @@
+import glob
+import json
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import pulp as pl
+
+from SchedulerLog import SchedulerLog
+from SolverPool import SolveCancelledError
+
+class BatchScheduler:
+    """
+    Schedules many LetSynchronise systems (e.g., the model variants of a design-space exploration)
+    for one goal. Up to a number of systems are scheduled concurrently (in the solver processes of
+    the schedule function), and the result of each system is yielded as soon as it has finished.
+
+    The systems are read from JSON files, directories of JSON files, glob patterns, and JSON lines
+    files (one system per line), or from the JSON array or JSON lines body of a request.
+    """
+
+    def __init__(self, scheduleFunction, concurrency=2):
+        self.scheduleFunction = scheduleFunction
+        self.concurrency = max(concurrency, 1)
+
+    # Name and system (or the error of reading it) of each system of the inputs
+    @staticmethod
+    def readSystems(inputs):
+        files = []
+        for batchInput in inputs:
+            if os.path.isdir(batchInput):
+                files += sorted(glob.glob(os.path.join(batchInput, "*.json")) + glob.glob(os.path.join(batchInput, "*.jsonl")))
+            elif glob.has_magic(batchInput):
+                files += sorted(glob.glob(batchInput))
+            else:
+                files.append(batchInput)
+
+        names = set()
+        for file in files:
+            stem = os.path.splitext(os.path.basename(file))[0]
+            try:
+                with open(file) as systemFile:
+                    text = systemFile.read()
+                systems = BatchScheduler.parseSystems(text, stem) if file.endswith(".jsonl") else [(stem, json.loads(text))]
+            except (OSError, ValueError) as error:
+                systems = [(stem, error)]
+
+            for name, system in systems:
+                yield BatchScheduler.uniqueName(name, names), system
+
+    # Name and system of each line of JSON lines, or of each element of a JSON array
+    @staticmethod
+    def parseSystems(text, prefix="system"):
+        if text.lstrip().startswith("["):
+            systems = json.loads(text)
+            if not isinstance(systems, list):
+                raise ValueError("The batch is not a list of systems")
+            return [(f"{prefix}-{index}", system) for index, system in enumerate(systems)]
+
+        systems = []
+        for index, line in enumerate(text.splitlines()):
+            if line.strip() == "":
+                continue
+            try:
+                systems.append((f"{prefix}-{index}", json.loads(line)))
+            except ValueError as error:
+                systems.append((f"{prefix}-{index}", error))
+        return systems
+
+    # The output files of systems are named after them, so names are made unique with a suffix
+    @staticmethod
+    def uniqueName(name, names):
+        uniqueName = name
+        suffix = 1
+        while uniqueName in names:
+            suffix += 1
+            uniqueName = f"{name}-{suffix}"
+        names.add(uniqueName)
+        return uniqueName
+
+    # Schedules the systems for the goal of a request path, and yields the result (a summary record
+    # and the schedule) of each system as soon as it has finished. The optional cancelled callback
+    # returns the reason to cancel the remaining systems.
+    def run(self, systems, path, cancelled=None):
+        batchId = SchedulerLog.currentRequestId() or uuid.uuid4().hex[:12]
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            running = set()
+            for index, (name, system) in enumerate(systems):
+                # Systems are only read as they are scheduled
+                while len(running) >= self.concurrency:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                running.add(executor.submit(self.schedule, f"{batchId}-{index}", index, name, system, path, cancelled))
+
+            while len(running) > 0:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def schedule(self, requestId, index, name, system, path, cancelled):
+        record = {"index": index, "name": name, "status": None, "objectiveValue": None, "elapsedTime": 0, "error": None}
+        schedule = None
+        startTime = time.time()
+        with SchedulerLog.request(requestId):
+            try:
+                if isinstance(system, Exception):
+                    raise system
+                if not isinstance(system, dict):
+                    raise ValueError("The system is not a JSON object")
+                reason = cancelled() if cancelled is not None else None
+                if reason is not None:
+                    raise SolveCancelledError(reason)
+
+                status, schedule = self.scheduleFunction(system, path, None, cancelled)
+                record["status"] = pl.LpSolution.get(status, "Error")
+                solverResult = (schedule or {}).get("SolverResult") or {}
+                record["objectiveValue"] = solverResult.get("objectiveValue")
+                if (schedule or {}).get("Unschedulable") is not None:
+                    record["error"] = schedule["Unschedulable"]
+            except SolveCancelledError as error:
+                record["status"] = "Cancelled"
+                record["error"] = str(error)
+            except Exception as error:
+                record["status"] = "Error"
+                record["error"] = f"{type(error).__name__}: {error}"
+        record["elapsedTime"] = time.time() - startTime
+        return record, schedule
+
+    # Number of systems of each status, and the wall time of the batch
+    @staticmethod
+    def summary(records, wallTime):
+        statuses = {}
+        for record in records:
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+        return {
+            "systems": len(records),
+            "statuses": statuses,
+            "wallTime": wallTime,
+            "elapsedTime": sum(record["elapsedTime"] for record in records),
+            "results": sorted(records, key=lambda record: record["index"]),
+        }
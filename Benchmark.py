@@ -0,0 +1,259 @@
+"""
+Benchmark of the LET-LP-Scheduler on synthetic LetSynchronise system models.
+
+Generates system models with a controllable number of tasks, period set (harmonic or co-prime),
+utilisation, number of cores and devices, network delays and dependency density. Each model is
+scheduled for each goal in a separate process, and the build time, solve time, peak memory (of the
+scheduler and of its largest solver process) and model size are appended as JSON lines to a results file.
+
+Example:
+  python3 Benchmark.py --solver PULP_CBC_CMD --tasks 4 8 16 --periods harmonic coprime --output benchmark.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import time
+
+try:
+    import resource
+except ImportError:
+    # Peak memory is not measured on platforms without the resource module (Windows)
+    resource = None
+
+import pulp as pl
+
+# Period sets in ns
+PERIOD_SETS = {
+    "harmonic": [1000000, 2000000, 4000000, 8000000],
+    "coprime": [2000000, 3000000, 5000000, 7000000],
+}
+
+# Time quantities are multiples of this granularity (ns), as in LetSynchronise models
+TIME_GRANULARITY = 100000
+
+
+class SystemGenerator:
+    """
+    Generates random LetSynchronise system models. The task utilisations are drawn with UUniFast,
+    so that their sum is the requested utilisation of all cores, and the task dependencies form a
+    directed acyclic graph in which each (earlier, later) pair of tasks is connected with the
+    requested density.
+    """
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+
+    def generate(self, tasks=8, periods="harmonic", utilisation=0.5, cores=2, devices=1, networkDelay=1000000, dependencyDensity=0.2):
+        deviceStore = [self.createDevice(index) for index in range(devices)]
+        coreStore = [
+            {"name": f"c{index + 1}", "speedup": 1, "device": deviceStore[index % devices]["name"]}
+            for index in range(cores)
+        ]
+        networkDelayStore = [
+            self.createNetworkDelay(source["name"], dest["name"], networkDelay)
+            for source in deviceStore for dest in deviceStore if source != dest
+        ]
+
+        utilisations = self.uunifast(tasks, utilisation * cores)
+        entityStore = [
+            self.createTask(f"task_{index}", self.random.choice(PERIOD_SETS[periods]), taskUtilisation, coreStore)
+            for index, taskUtilisation in enumerate(utilisations)
+        ]
+
+        dependencyStore = []
+        for source, dest in itertools.combinations(entityStore, 2):
+            if self.random.random() < dependencyDensity:
+                dependencyStore.append(self.createDependency(source["name"], dest["name"]))
+        # Every system has an input and an output, like the LetSynchronise examples
+        dependencyStore.append(self.createDependency("__system", entityStore[0]["name"], "SystemInput"))
+        dependencyStore.append(self.createDependency(entityStore[-1]["name"], "__system", "SystemOutput"))
+
+        return {
+            "DeviceStore": deviceStore,
+            "CoreStore": coreStore,
+            "MemoryStore": [],
+            "NetworkDelayStore": networkDelayStore,
+            "SystemInputStore": [{"name": "SystemInput"}],
+            "SystemOutputStore": [{"name": "SystemOutput"}],
+            "EntityStore": entityStore,
+            "DependencyStore": dependencyStore,
+            "EventChainStore": [],
+            "ConstraintStore": [],
+            "PluginParameters": {"Makespan": 1},
+        }
+
+    # UUniFast: n task utilisations that sum to the total utilisation, each at most 1
+    def uunifast(self, n, totalUtilisation):
+        if totalUtilisation > n:
+            raise ValueError(f"{n} tasks cannot have a total utilisation of {totalUtilisation}")
+
+        while True:
+            utilisations = []
+            remaining = totalUtilisation
+            for index in range(1, n):
+                nextRemaining = remaining * self.random.random() ** (1.0 / (n - index))
+                utilisations.append(remaining - nextRemaining)
+                remaining = nextRemaining
+            utilisations.append(remaining)
+            if all(utilisation <= 1 for utilisation in utilisations):
+                return utilisations
+
+    def createTask(self, name, period, utilisation, coreStore):
+        wcet = self.roundTime(utilisation * period, period)
+        # The LET interval is at least as long as the execution time and fits in the period
+        duration = self.roundTime(self.random.uniform(wcet, period), period)
+        activationOffset = self.roundTime(self.random.uniform(0, period - duration), period - duration, 0)
+        return {
+            "name": name,
+            "type": "task",
+            "priority": 1,
+            "initialOffset": 0,
+            "activationOffset": activationOffset,
+            "duration": duration,
+            "period": period,
+            "inputs": ["in"],
+            "outputs": ["out"],
+            "wcet": wcet,
+            "acet": wcet,
+            "bcet": wcet,
+            "distribution": "Uniform",
+            "core": self.random.choice(coreStore)["name"],
+        }
+
+    def createDevice(self, index):
+        wcdt = self.random.randint(1, 5) * TIME_GRANULARITY
+        return {
+            "name": f"d{index + 1}",
+            "speedup": 1,
+            "delays": {"tcp": {"bcdt": wcdt, "acdt": wcdt, "wcdt": wcdt, "distribution": "Normal"}},
+        }
+
+    def createNetworkDelay(self, source, dest, wcdt):
+        return {"name": f"{source}-to-{dest}", "source": source, "dest": dest, "bcdt": wcdt, "acdt": wcdt, "wcdt": wcdt, "distribution": "Normal"}
+
+    def createDependency(self, source, dest, port=None):
+        return {
+            "name": f"{source}_{dest}",
+            "source": {"entity": source, "port": port if source == "__system" else "out"},
+            "destination": {"entity": dest, "port": port if dest == "__system" else "in"},
+        }
+
+    @staticmethod
+    def roundTime(time, maximum, minimum=TIME_GRANULARITY):
+        return max(minimum, min(maximum, round(time / TIME_GRANULARITY) * TIME_GRANULARITY))
+
+
+# Seconds that a case is given to stop after SIGTERM, before it is killed
+STOP_GRACE_TIME = 5
+
+
+# Schedules a system in a child process and sends its measurements to the parent process.
+# The process and its solver processes form a process group, which is stopped when the case times out.
+def runCase(system, goal, configValues, connection):
+    if hasattr(os, "setsid"):
+        os.setsid()
+    import main
+
+    for flag, value in configValues.items():
+        setattr(main.Config, flag, value)
+
+    startTime = time.time()
+    try:
+        status, schedule = main.scheduleSystem(system, f"/{goal}")
+        result = {
+            "status": pl.LpSolution.get(status, str(status)),
+            "objectiveValue": schedule["SolverResult"]["objectiveValue"] if schedule is not None else None,
+            "metrics": schedule["Metrics"] if schedule is not None else None,
+        }
+    except Exception as error:
+        result = {"status": "Error", "error": repr(error)}
+
+    result["wallTime"] = time.time() - startTime
+    # ru_maxrss is in KiB on Linux. The solver processes (e.g., CBC) are children of the process, of which the
+    # largest is reported. A child also counts the memory of the process when it was started, so its peak memory
+    # only differs when the solver needs more memory than the scheduler.
+    result["peakMemory"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource is not None else None
+    result["peakSolverMemory"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024 if resource is not None else None
+    connection.send(result)
+    connection.close()
+
+
+def runBenchmark(system, goal, configValues, timeout):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=runCase, args=(system, goal, configValues, sender))
+    process.start()
+    sender.close()
+
+    if receiver.poll(timeout):
+        result = receiver.recv()
+    else:
+        result = {"status": "Timeout", "wallTime": timeout}
+        stopCase(process)
+    process.join()
+    return result
+
+
+# Stops a case and its solver processes, which would otherwise keep running and slow down the next cases.
+# The process group is also killed when the case has stopped, because a solver can outlive it.
+def stopCase(process):
+    for signalNumber, stop in [(signal.SIGTERM, process.terminate), (getattr(signal, "SIGKILL", None), process.kill)]:
+        try:
+            os.killpg(process.pid, signalNumber)
+        except (AttributeError, OSError):
+            stop()
+        process.join(STOP_GRACE_TIME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the LET-LP-Scheduler on synthetic LetSynchronise system models")
+    parser.add_argument("--solver", type=str, default="PULP_CBC_CMD")
+    parser.add_argument("--goals", nargs="+", choices=["ilp", "min-core-usage", "min-e2e-mc", "heuristic"], default=["ilp", "min-core-usage", "min-e2e-mc"])
+    parser.add_argument("--tasks", nargs="+", type=int, default=[4, 8])
+    parser.add_argument("--periods", nargs="+", choices=list(PERIOD_SETS), default=["harmonic"])
+    parser.add_argument("--utilisation", nargs="+", type=float, default=[0.5])
+    parser.add_argument("--cores", nargs="+", type=int, default=[2])
+    parser.add_argument("--devices", nargs="+", type=int, default=[1])
+    parser.add_argument("--network-delay", nargs="+", type=int, default=[1000000])
+    parser.add_argument("--dependency-density", nargs="+", type=float, default=[0.2])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0])
+    parser.add_argument("--time-limit", type=float, default=None, help="Time limit (s) of each solve")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds after which a case is stopped")
+    parser.add_argument("--backend", choices=["pulp", "sparse"], type=str, default="pulp", help="Builder of the multicore LP models")
+    parser.add_argument("--output", type=str, default="benchmark.jsonl")
+    args = parser.parse_args()
+
+    configValues = {"solverProg": args.solver, "timeLimit": args.time_limit, "modelBackend": args.backend}
+
+    cases = itertools.product(
+        args.tasks, args.periods, args.utilisation, args.cores, args.devices, args.network_delay, args.dependency_density, args.seeds
+    )
+    with open(args.output, "a") as output:
+        for tasks, periods, utilisation, cores, devices, networkDelay, dependencyDensity, seed in cases:
+            parameters = {
+                "tasks": tasks,
+                "periods": periods,
+                "utilisation": utilisation,
+                "cores": cores,
+                "devices": devices,
+                "networkDelay": networkDelay,
+                "dependencyDensity": dependencyDensity,
+                "seed": seed,
+            }
+            system = SystemGenerator(seed).generate(tasks, periods, utilisation, cores, devices, networkDelay, dependencyDensity)
+
+            for goal in args.goals:
+                result = runBenchmark(system, goal, configValues, args.timeout)
+                record = {"time": time.time(), "solver": args.solver, "backend": args.backend, "goal": goal, "parameters": parameters, **result}
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+                model = (result.get("metrics") or {}).get("model", {})
+                print(
+                    f"{goal:15} {json.dumps(parameters)}: {result['status']} in {result['wallTime']:.3f} s, "
+                    f"{model.get('variables', '-')} variables, {model.get('constraints', '-')} constraints"
+                )
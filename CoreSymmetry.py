@@ -0,0 +1,47 @@
+class CoreSymmetry:
+    """
+    Identical cores (same speedup and device) are interchangeable: swapping the tasks of two
+    identical cores gives another schedule with the same objective value, so the solver would
+    otherwise explore every permutation of them.
+
+    The symmetry is broken by only keeping the schedule in which the identical cores of each
+    class are used in the order of the first task (in a fixed task order) allocated to them:
+    a task can only be allocated to a core of a class if an earlier task is allocated to the
+    previous core of the class. It follows that the used cores of a class come first.
+    """
+
+    @staticmethod
+    def coreKey(core):
+        return (core.get("speedup", 1), core.get("device"))
+
+    # Classes of identical cores (indices in the CoreStore), with at least two cores each
+    @staticmethod
+    def coreClasses(cores):
+        classes = {}
+        for index, core in enumerate(cores):
+            classes.setdefault(CoreSymmetry.coreKey(core), []).append(index)
+        return [coreClass for coreClass in classes.values() if len(coreClass) > 1]
+
+    # Pairs (previous core, core) of consecutive identical cores
+    @staticmethod
+    def orderedCorePairs(cores):
+        return [
+            (coreClass[index - 1], coreClass[index])
+            for coreClass in CoreSymmetry.coreClasses(cores)
+            for index in range(1, len(coreClass))
+        ]
+
+    # Relabels the identical cores of an allocation (item -> core index), so that it satisfies the
+    # symmetry-breaking constraints for the given order of items. The schedule is otherwise unchanged.
+    @staticmethod
+    def canonicalAllocation(items, allocation, cores):
+        relabel = {}
+        for coreClass in CoreSymmetry.coreClasses(cores):
+            usedCores = []
+            for item in items:
+                core = allocation[item]
+                if core in coreClass and core not in usedCores:
+                    usedCores.append(core)
+            usedCores += [core for core in coreClass if core not in usedCores]
+            relabel.update(zip(usedCores, coreClass))
+        return {item: relabel.get(core, core) for item, core in allocation.items()}
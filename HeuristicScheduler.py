@@ -0,0 +1,196 @@
+import bisect
+import heapq
+import math
+
+class HeuristicScheduler:
+    """
+    Greedy LET-aware list schedulers that find a feasible schedule in milliseconds. Their
+    schedules are used as MIP starts for the LP models, or directly as an instant answer.
+
+    * allocateCores: First-fit decreasing allocation of tasks to cores, where the task instances
+      on a core have fixed LET windows and are scheduled non-preemptively in EDF order.
+      (Formulation of the MultiCoreScheduler.)
+    * scheduleLetTasks: List scheduling of the LET intervals of tasks in topological order of
+      their dependencies, where every task instance executes in its LET interval on the core
+      that gives it the earliest start time. (Formulation of the PuLPWriter.)
+
+    Both return None when no feasible schedule is found, which does not mean that the system
+    is unschedulable.
+    """
+
+    # Allocates each task to a core and schedules its instances within their LET windows.
+    # tasks: list of {"name", "period", "wcet", "instances": [{"instance", "letStartTime", "letEndTime"}]}
+    # fixedCores: optional {task name: core name} of tasks that keep their core (e.g., the unchanged tasks of a what-if request)
+    # Returns {"cores": {task name: core name}, "startTimes": {(task name, instance): start time}}
+    def allocateCores(self, tasks, cores, fixedCores=None):
+        fixedCores = fixedCores or {}
+        coreJobs = {core["name"]: [] for core in cores}
+        allocation = {"cores": {}, "startTimes": {}}
+
+        # Tasks with a fixed core are allocated first, and tasks with the highest utilisation are the hardest to fit
+        for task in sorted(tasks, key=lambda task: (task["name"] not in fixedCores, -task["wcet"] / task["period"])):
+            jobs = [
+                (instance["letStartTime"], instance["letEndTime"], task["wcet"], (task["name"], instance["instance"]))
+                for instance in task["instances"]
+            ]
+            candidateCores = [core for core in cores if core["name"] == fixedCores[task["name"]]] if task["name"] in fixedCores else cores
+            for core in candidateCores:
+                startTimes = self.scheduleEdf(coreJobs[core["name"]] + jobs)
+                if startTimes is not None:
+                    coreJobs[core["name"]].extend(jobs)
+                    allocation["cores"][task["name"]] = core["name"]
+                    allocation["startTimes"].update(startTimes)
+                    break
+            else:
+                return None
+
+        return allocation
+
+    # Non-preemptive earliest deadline first schedule of jobs (release, deadline, execution time, key).
+    # Returns the start time of each job, or None when a job misses its deadline.
+    @staticmethod
+    def scheduleEdf(jobs):
+        jobs = sorted(jobs, key=lambda job: job[0])
+        startTimes = {}
+        readyJobs = []
+        time = 0
+        nextJob = 0
+        while nextJob < len(jobs) or readyJobs:
+            if not readyJobs:
+                time = max(time, jobs[nextJob][0])
+            while nextJob < len(jobs) and jobs[nextJob][0] <= time:
+                release, deadline, executionTime, key = jobs[nextJob]
+                heapq.heappush(readyJobs, (deadline, release, nextJob, executionTime, key))
+                nextJob += 1
+
+            deadline, _, _, executionTime, key = heapq.heappop(readyJobs)
+            if time + executionTime > deadline:
+                return None
+            startTimes[key] = time
+            time += executionTime
+
+        return startTimes
+
+    # Schedules the LET interval of each task, relative to the start of its periods. With offsets, the
+    # periods of a task can be offset by up to one period less one, which delays all of its instances.
+    # tasks: list of {"name", "period", "wcet"}, dependencies: list of (source task name, destination task name)
+    # fixedSchedule: optional schedule of tasks that keep their LET intervals (e.g., the unchanged tasks of a what-if request)
+    # Returns {task name: {"core": core name, "offset": offset, "letStartTime": relative start, "executionTime": execution time}}
+    def scheduleLetTasks(self, tasks, cores, dependencies, schedulingWindow, useHeterogeneousCores=True, useOffSet=False, fixedSchedule=None):
+        order = self.topologicalOrder(tasks, dependencies)
+        if order is None:
+            return None
+
+        sources = {task["name"]: [] for task in tasks}
+        for source, destination in dependencies:
+            sources[destination].append(source)
+
+        # Busy intervals of each core over the scheduling window
+        busyStarts = {core["name"]: [] for core in cores}
+        busyEnds = {core["name"]: [] for core in cores}
+        schedule = {}
+
+        # Tasks with a fixed schedule occupy their cores before the other tasks are scheduled
+        for task in tasks:
+            if task["name"] in (fixedSchedule or {}):
+                schedule[task["name"]] = fixedSchedule[task["name"]]
+                self.occupy(task, schedule[task["name"]], schedulingWindow, busyStarts, busyEnds)
+
+        for task in order:
+            if task["name"] in schedule:
+                continue
+
+            # The first instance of each source task must complete before the first instance
+            # of the destination task starts, so that every destination instance has a source
+            earliestStart = max([self.firstEndTime(schedule[source]) for source in sources[task["name"]]], default=0)
+
+            best = None
+            for core in cores:
+                executionTime = task["wcet"]
+                if useHeterogeneousCores:
+                    executionTime = math.ceil(task["wcet"] / float(core["speedup"]))
+                # Latest start time of the first instance, relative to time 0
+                latestStart = task["period"] - executionTime
+                if useOffSet:
+                    latestStart += task["period"] - 1
+                startTime = self.earliestStart(task["period"], executionTime, earliestStart, latestStart, schedulingWindow, busyStarts[core["name"]], busyEnds[core["name"]])
+                if startTime is not None and (best is None or startTime < self.firstStartTime(best)):
+                    # The offset only covers what the LET start time cannot
+                    offset = max(0, startTime - (task["period"] - executionTime))
+                    best = {"core": core["name"], "offset": offset, "letStartTime": startTime - offset, "executionTime": executionTime}
+
+            if best is None:
+                return None
+
+            schedule[task["name"]] = best
+            self.occupy(task, best, schedulingWindow, busyStarts, busyEnds)
+
+        return schedule
+
+    # Adds the instances of a scheduled task to the busy intervals of its core
+    @staticmethod
+    def occupy(task, taskSchedule, schedulingWindow, busyStarts, busyEnds):
+        for periodStartTime in range(0, schedulingWindow, task["period"]):
+            start = periodStartTime + HeuristicScheduler.firstStartTime(taskSchedule)
+            index = bisect.bisect_left(busyStarts[taskSchedule["core"]], start)
+            busyStarts[taskSchedule["core"]].insert(index, start)
+            busyEnds[taskSchedule["core"]].insert(index, start + taskSchedule["executionTime"])
+
+    @staticmethod
+    def firstStartTime(taskSchedule):
+        return taskSchedule["offset"] + taskSchedule["letStartTime"]
+
+    @staticmethod
+    def firstEndTime(taskSchedule):
+        return taskSchedule["offset"] + taskSchedule["letStartTime"] + taskSchedule["executionTime"]
+
+    # Earliest start time of the first instance of a task at which all of its instances fit between the busy
+    # intervals of a core. A task can only start at the earliest start time or when a busy interval ends
+    # (modulo its period, in its first or second period).
+    @staticmethod
+    def earliestStart(period, executionTime, earliestStart, latestStart, schedulingWindow, busyStarts, busyEnds):
+        candidates = sorted({earliestStart} | {end % period for end in busyEnds} | {end % period + period for end in busyEnds})
+        for candidate in candidates:
+            if candidate < earliestStart or candidate > latestStart:
+                continue
+
+            fits = True
+            for periodStartTime in range(0, schedulingWindow, period):
+                start = periodStartTime + candidate
+                end = start + executionTime
+                # The busy intervals do not overlap, so only the interval that starts
+                # just before the end of the instance can overlap with it
+                index = bisect.bisect_left(busyStarts, end) - 1
+                if index >= 0 and busyEnds[index] > start:
+                    fits = False
+                    break
+            if fits:
+                return candidate
+
+        return None
+
+    # Orders the tasks so that every task comes after its source tasks (ties are broken by period).
+    # Returns None when the dependencies are cyclic.
+    @staticmethod
+    def topologicalOrder(tasks, dependencies):
+        incoming = {task["name"]: 0 for task in tasks}
+        outgoing = {task["name"]: [] for task in tasks}
+        for source, destination in set(dependencies):
+            incoming[destination] += 1
+            outgoing[source].append(destination)
+
+        tasksByName = {task["name"]: task for task in tasks}
+        readyTasks = [(task["period"], task["name"]) for task in tasks if incoming[task["name"]] == 0]
+        heapq.heapify(readyTasks)
+        order = []
+        while readyTasks:
+            _, name = heapq.heappop(readyTasks)
+            order.append(tasksByName[name])
+            for destination in outgoing[name]:
+                incoming[destination] -= 1
+                if incoming[destination] == 0:
+                    heapq.heappush(readyTasks, (tasksByName[destination]["period"], destination))
+
+        if len(order) != len(tasks):
+            return None
+        return order
@@ -0,0 +1,70 @@
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+class IncumbentWatcher:
+    """
+    Reports the objective values of the incumbents (feasible solutions that are better than all the
+    solutions before) of a running solve, which are read from the solver log while the solver writes it.
+    The log is read by a thread, every interval seconds, from where the previous read stopped. Only the
+    log lines of CBC are recognised, so other solvers report no incumbents while they run.
+
+    The models are minimised, so an incumbent is reported when its objective value is smaller than the
+    objective values reported before.
+    """
+
+    # Log lines of CBC with the objective value of a new incumbent (or the MIP start)
+    PATTERN = re.compile(r"(?:Integer solution of|MIPStart provided solution with cost) (-?[0-9.]+(?:[eE][-+]?[0-9]+)?)")
+
+    def __init__(self, logPath, callback, interval=0.5):
+        self.logPath = logPath
+        self.callback = callback
+        self.interval = interval
+        self.position = 0
+        self.partialLine = ""
+        self.objectiveValue = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        if self.callback is not None:
+            self.thread = threading.Thread(target=self.run, name="IncumbentWatcher", daemon=True)
+            self.thread.start()
+        return self
+
+    # The log is read once more after the solve, so that the incumbents of a short solve are also reported
+    def __exit__(self, *exception):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.read()
+        return False
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.read()
+
+    def read(self):
+        try:
+            with open(self.logPath, errors="replace") as logFile:
+                logFile.seek(self.position)
+                text = logFile.read()
+                self.position = logFile.tell()
+        except OSError:
+            return
+
+        lines = (self.partialLine + text).split("\n")
+        self.partialLine = lines.pop()
+        for line in lines:
+            match = self.PATTERN.search(line)
+            if match is None:
+                continue
+            objectiveValue = float(match.group(1))
+            if self.objectiveValue is None or objectiveValue < self.objectiveValue:
+                self.objectiveValue = objectiveValue
+                try:
+                    self.callback(objectiveValue)
+                except Exception:
+                    logger.exception("Reporting an incumbent failed")
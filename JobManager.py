@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from SolverOptions import SolverOptions
+from SolverPool import SolveCancelledError
+from ScheduleWriter import ScheduleWriter
+from SchedulabilityCheck import SchedulabilityCheck
+from SchedulerLog import SchedulerLog
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    # The time limit stopped the solve before it found a feasible schedule
+    TIMED_OUT = "timedOut"
+
+    def __init__(self, path, compact=False):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        # The schedule of the job is returned in the compact format (see ScheduleWriter)
+        self.compact = compact
+        self.state = Job.QUEUED
+        self.submitTime = time.time()
+        self.startTime = None
+        self.finishTime = None
+        self.iterations = 0
+        self.objectiveValue = None
+        self.status = None
+        self.schedule = None
+        self.solverResult = None
+        self.error = None
+        self.version = 0
+        self.updated = threading.Condition()
+        self.cancelRequested = threading.Event()
+
+    def isFinished(self):
+        return self.state in [Job.DONE, Job.FAILED, Job.CANCELLED, Job.TIMED_OUT]
+
+    def elapsedTime(self):
+        if self.startTime is None:
+            return 0
+        return (self.finishTime or time.time()) - self.startTime
+
+    def update(self, **changes):
+        with self.updated:
+            for attribute, value in changes.items():
+                setattr(self, attribute, value)
+            self.version += 1
+            self.updated.notify_all()
+
+    # Progress callback of the schedulers: called with the objective value of each incumbent and feasible solution
+    def progress(self, objectiveValue):
+        self.update(iterations=self.iterations + 1, objectiveValue=objectiveValue)
+
+    # Cancellation callback of the schedulers: returns the reason to cancel the job, or None
+    def cancellationReason(self):
+        return "the job was cancelled" if self.cancelRequested.is_set() else None
+
+    # Blocks until the job has changed since the given version, or the timeout expires
+    def waitForUpdate(self, version, timeout):
+        with self.updated:
+            self.updated.wait_for(lambda: self.version != version or self.isFinished(), timeout)
+            return self.version
+
+    def toJson(self, includeSchedule=True):
+        job = {
+            "id": self.id,
+            "path": self.path,
+            "state": self.state,
+            "elapsedTime": self.elapsedTime(),
+            "iterations": self.iterations,
+            "objectiveValue": self.objectiveValue,
+            "status": self.status,
+            "solverResult": self.solverResult,
+            "error": self.error,
+        }
+        if includeSchedule and self.state == Job.DONE:
+            job["schedule"] = self.schedule
+        return job
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobManager:
+    """
+    Runs scheduling requests as jobs on a bounded pool of worker threads, so that the
+    HTTP connection of a request does not have to be held open for the whole solve.
+    The state, progress and result of a job can be polled with its job id.
+    """
+
+    def __init__(self, scheduleFunction, workers=2, maxJobs=16, retention=3600):
+        self.scheduleFunction = scheduleFunction
+        self.maxJobs = maxJobs
+        self.retention = retention
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def submit(self, system, path):
+        with self.lock:
+            self.removeExpiredJobs()
+            if self.pendingJobs() >= self.maxJobs:
+                raise JobQueueFullError(f"Too many scheduling jobs ({self.maxJobs}) are pending")
+
+            job = Job(path, ScheduleWriter.isCompactRequested(system))
+            self.jobs[job.id] = job
+
+        self.executor.submit(self.run, job, system)
+        return job
+
+    def get(self, jobId):
+        with self.lock:
+            return self.jobs.get(jobId)
+
+    # Cancels a queued or running job. Its solver process is stopped when it is running.
+    def cancel(self, jobId):
+        job = self.get(jobId)
+        if job is not None and not job.isFinished():
+            logger.info(f"Cancelling job {jobId}")
+            job.cancelRequested.set()
+        return job
+
+    def pendingJobs(self):
+        return len([job for job in self.jobs.values() if not job.isFinished()])
+
+    # Number of jobs in each state
+    def queueDepth(self):
+        with self.lock:
+            depth = {state: 0 for state in [Job.QUEUED, Job.RUNNING, Job.DONE, Job.FAILED, Job.CANCELLED, Job.TIMED_OUT]}
+            for job in self.jobs.values():
+                depth[job.state] += 1
+            return depth
+
+    def removeExpiredJobs(self):
+        now = time.time()
+        for jobId, job in list(self.jobs.items()):
+            if job.isFinished() and now - job.finishTime > self.retention:
+                del self.jobs[jobId]
+
+    # The job id is the correlation id of the log messages of the job
+    def run(self, job, system):
+        with SchedulerLog.request(job.id):
+            self.runJob(job, system)
+
+    def runJob(self, job, system):
+        if job.cancelRequested.is_set():
+            job.update(state=Job.CANCELLED, error="Scheduling job cancelled: the job was cancelled", finishTime=time.time())
+            logger.info(f"Job {job.path} cancelled before it started")
+            return
+
+        job.update(state=Job.RUNNING, startTime=time.time())
+        logger.info(f"Job {job.path} started")
+        try:
+            status, schedule = self.scheduleFunction(system, job.path, job.progress, job.cancellationReason)
+            solverResult = (schedule or {}).get("SolverResult")
+            if SolverOptions.isTimedOut(status):
+                job.update(state=Job.TIMED_OUT, status=status, solverResult=solverResult, error=SolverOptions.timedOutMessage(schedule), finishTime=time.time())
+            elif not SolverOptions.isSchedulable(status):
+                job.update(state=Job.FAILED, status=status, solverResult=solverResult, error=SchedulabilityCheck.unschedulableMessage(schedule), finishTime=time.time())
+            else:
+                job.update(state=Job.DONE, status=status, schedule=schedule, solverResult=solverResult, finishTime=time.time())
+        except SolveCancelledError as error:
+            job.update(state=Job.CANCELLED, error=f"Scheduling job cancelled: {error}", finishTime=time.time())
+        except Exception as error:
+            logger.exception("LetSynchronise system model could not be scheduled")
+            job.update(state=Job.FAILED, error=f"LetSynchronise system model could not be scheduled: {error}", finishTime=time.time())
+        logger.info(f"Job {job.path} {job.state} after {job.elapsedTime():.3f} s")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,34 @@
+import math
+from array import array
+
+class LpResults:
+    """
+    Solution of a PuLPWriter model, read once from the solver values into arrays that are indexed
+    like the id arrays of the PuLPWriter: the LET and period times and the allocated core of each
+    task instance (instance id), the offset of each task (task id), and the delays of the
+    dependency instances of each task dependency.
+
+    The values of all variables are kept in a compact array of floats (NaN when the solver did not
+    return a value), which is used as the starting point of the next solve.
+    """
+
+    def __init__(self, lp):
+        self.values = array("d", (math.nan if variable.varValue is None else variable.varValue for variable in lp.vars.variables))
+        values = self.values
+
+        self.objective = values[lp.objectiveVariable]
+        self.offsets = [None if variable is None else values[variable] for variable in lp.offsetVars]
+        self.periodStartTimes = [values[variable] for variable in lp.periodStartVars]
+        self.periodEndTimes = [values[variable] for variable in lp.periodEndVars]
+        self.startTimes = [values[variable] for variable in lp.startVars]
+        self.endTimes = [values[variable] for variable in lp.endVars]
+        # Index of the core that each task instance is allocated to, or None
+        self.cores = [
+            next((core for core, variable in enumerate(coreVariables) if values[variable] == 1), None)
+            for coreVariables in lp.coreVars
+        ]
+        # Delays of the dependency instances of each task dependency, in the order of lp.dependencyInstanceDelayVariables
+        self.delays = {
+            dependency: [values[variable] for variable in delayVariables]
+            for dependency, delayVariables in lp.dependencyInstanceDelayVariables.items()
+        }
@@ -0,0 +1,50 @@
+import math
+import pulp as pl
+
+class LpVariableRegistry:
+    """
+    Variables of an LP model, identified by integer ids (their position in the registry).
+
+    The variables are created with compact names (v0, v1, ...) and the key of each variable
+    (its kind and the integer ids of its tasks, task instances and cores) is kept instead of a
+    descriptive name. Descriptive names are only generated (by the naming function of the model)
+    when the model is exported or its variables are dumped for debugging.
+    """
+
+    def __init__(self, namer):
+        self.namer = namer
+        self.variables = []
+        self.keys = []
+        self.named = False
+
+    def __len__(self):
+        return len(self.variables)
+
+    def __getitem__(self, variableId):
+        return self.variables[variableId]
+
+    def add(self, key, lowBound=None, upBound=None, cat=pl.LpInteger):
+        variableId = len(self.variables)
+        self.variables.append(pl.LpVariable(f"v{variableId}", lowBound, upBound, cat))
+        self.keys.append(key)
+        return variableId
+
+    def addInt(self, *key):
+        return self.add(key)
+
+    def addBool(self, *key):
+        return self.add(key, 0, 1, pl.LpBinary)
+
+    # Use the values of a solution (indexed by variable id, None or NaN when unknown) as the starting point of the next solve
+    def setInitialValues(self, values):
+        for variable, value in zip(self.variables, values):
+            if value is not None and not math.isnan(value):
+                variable.setInitialValue(round(value), check=False)
+
+    # Gives every variable its descriptive name
+    def nameVariables(self):
+        if self.named:
+            return
+        for variable, key in zip(self.variables, self.keys):
+            variable.name = self.namer(key)
+        self.named = True
@@ -0,0 +1,116 @@
+import bisect
+import contextlib
+import threading
+import time
+
+class RequestMetrics:
+    """
+    Instrumentation of a single scheduling request: the wall time of each phase (e.g., building
+    the LP model, solving it, and extracting the schedule) and the size of the solved models.
+    Phases that are repeated (e.g., in the tightening iterations) are summed. A request that is
+    answered from the result cache has no phases.
+    """
+
+    def __init__(self, startTime=None, cached=False):
+        self.startTime = time.time() if startTime is None else startTime
+        self.cached = cached
+        self.phases = {}
+        self.phaseStartTimes = {}
+        self.model = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.startPhase(name)
+        try:
+            yield
+        finally:
+            self.endPhase(name)
+
+    # For phases that span a long block of code
+    def startPhase(self, name):
+        self.phaseStartTimes[name] = time.time()
+
+    def endPhase(self, name):
+        self.phases[name] = self.phases.get(name, 0) + time.time() - self.phaseStartTimes.pop(name)
+
+    # Number of variables, binary variables, constraints and non-zero coefficients of the largest model of the request
+    def recordModel(self, prob, instances):
+        variables = prob.variables()
+        model = {
+            "variables": len(variables),
+            "binaries": len([v for v in variables if v.isBinary()]),
+            "constraints": prob.numConstraints(),
+            "nonZeros": sum(len(constraint) for constraint in prob.constraints.values()),
+            "instances": instances,
+        }
+        self.recordSize(model)
+
+    # Size of a model that was not built with PuLP (e.g., a SparseModel)
+    def recordSize(self, model):
+        if model["variables"] >= self.model.get("variables", 0):
+            self.model = model
+
+    def toJson(self):
+        return {
+            "totalTime": time.time() - self.startTime,
+            "phases": self.phases,
+            "model": self.model,
+            "cached": self.cached,
+        }
+
+
+class ServerMetrics:
+    """
+    Aggregate metrics of the web server: a latency histogram of each request path, the number of
+    scheduling results of each solution status, and the depth of the scheduling job and solver process queues.
+    Requests that are answered from the result cache are only counted as cache hits, so that the histograms
+    and statuses are those of the solves.
+    """
+
+    # Upper bounds (s) of the latency histogram buckets
+    LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800]
+
+    def __init__(self):
+        self.startTime = time.time()
+        self.latencies = {}
+        self.statuses = {}
+        self.cacheHits = 0
+        self.lock = threading.Lock()
+
+    def observe(self, path, latency, status, cached=False):
+        with self.lock:
+            if cached:
+                self.cacheHits += 1
+                return
+            histogram = self.latencies.setdefault(path, {"count": 0, "sum": 0, "buckets": [0] * (len(self.LATENCY_BUCKETS) + 1)})
+            histogram["count"] += 1
+            histogram["sum"] += latency
+            histogram["buckets"][bisect.bisect_left(self.LATENCY_BUCKETS, latency)] += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def toJson(self, jobManager=None, solverPool=None):
+        with self.lock:
+            latencies = {
+                path: {
+                    "count": histogram["count"],
+                    "sum": histogram["sum"],
+                    # Cumulative counts of the requests that took at most "le" seconds
+                    "buckets": [
+                        {"le": bound, "count": sum(histogram["buckets"][:index + 1])}
+                        for index, bound in enumerate(self.LATENCY_BUCKETS + ["+Inf"])
+                    ],
+                }
+                for path, histogram in self.latencies.items()
+            }
+            metrics = {
+                "uptime": time.time() - self.startTime,
+                "latency": latencies,
+                "statuses": dict(self.statuses),
+                "cacheHits": self.cacheHits,
+            }
+
+        if jobManager is not None:
+            metrics["jobs"] = jobManager.queueDepth()
+        if solverPool is not None:
+            metrics["solverPool"] = solverPool.toJson()
+        return metrics
@@ -1,16 +1,35 @@
 from pulp import LpVariable, lpSum
 
+from CoreSymmetry import CoreSymmetry
+
 class MinCoreUsage():
-    def min_core_usage(self, assigned, cores, tasks_instances, prob):
+    def __init__(self):
+        self.used = None
+
+    def min_core_usage(self, assigned, cores, tasks_instances, prob, symmetry_breaking=False, min_cores=0):
         # used_core
         # Variable for whether a core is being used.
-        used = LpVariable.dicts("used", ((core['name']) for core in cores), lowBound=0, upBound=1, cat='Binary')
+        self.used = used = LpVariable.dicts("used", ((core['name']) for core in cores), lowBound=0, upBound=1, cat='Binary')
                    
         # 6a. If a task instance uses a core, the core is marked used.
         for core in cores:
             for task in tasks_instances:
                 prob += used[(core['name'])] >= assigned[f"{task['name']},{core['name']}"]
 
+        # Identical cores are used in order (see CoreSymmetry).
+        if symmetry_breaking:
+            for previous_core, core in CoreSymmetry.orderedCorePairs(cores):
+                prob += used[cores[core]['name']] <= used[cores[previous_core]['name']]
+
         # 7. Minimise the sum of the used cores.
         objective = lpSum(used[(core['name'])] for core in cores)
-        prob += objective, "Minimise Core Usage" 
+
+        # Lower bound of the number of used cores (see SchedulabilityCheck).
+        if min_cores > 0:
+            prob += objective >= min_cores
+        prob += objective, "Minimise Core Usage"
+
+    # A core is used when the heuristic allocates a task to it
+    def set_initial_values(self, allocation, mcs):
+        for core_name, var in self.used.items():
+            var.setInitialValue(int(core_name in allocation["cores"].values()))
@@ -4,32 +4,34 @@ class MinE2E:
     def __init__(self):
         self.network_delays = None
         self.devices = None
+        self.dependencies = None
+        self.instances = None
+        self.lambda_vars = None
+        self.bool_dep_vars = None
+        self.delay_vars = None
+        self.lambdas = None
 
-    def min_e2e(self, N, system, prob, psi_task_core_vars, mcs):
-        self.devices = {device["name"]: delay["wcdt"] for device in system["DeviceStore"] for _, delay in device["delays"].items()}
-        self.network_delays = {networkDelay["name"]: networkDelay["wcdt"] for networkDelay in system["NetworkDelayStore"]}
+    def min_e2e(self, N, system, prob, psi_task_core_vars, mcs, Config):
+        self.load_dependencies(N, system, mcs)
+        dependency_instances = list(self.get_dependency_instances())
 
         # # # # # # # # # # # # #
         # Variables
 
         # lambda_(task_x, task_y)
         # Variable for just the protocol + network component of the communication delay from task x to task y.
-        lambda_vars = LpVariable.dicts(
+        self.lambda_vars = lambda_vars = LpVariable.dicts(
             "lambda",
-            [f"{task1['name']},{task2['name']}" for task1 in mcs.tasks_instances for task2 in mcs.tasks_instances if task1 != task2],
+            [f"{task1},{task2}" for task1, task2 in self.dependencies],
             lowBound=0,
             cat="Integer",
         )
 
         # bool_dep_(task_x, instance_i, task_y, instance_j)
         # Variable for whether there is a communication dependency from task x, instance i to task y, instance j.
-        bool_dep_vars = LpVariable.dicts(
+        self.bool_dep_vars = bool_dep_vars = LpVariable.dicts(
             "bool_dep",
-            [
-                f"{task1['name']},{value1['instance']},{task2['name']},{value2['instance']}"
-                for task1 in mcs.tasks_instances for task2 in mcs.tasks_instances if task1 != task2
-                for value1 in task1["value"] for value2 in task2["value"]
-            ],
+            dependency_instances,
             lowBound=0,
             upBound=1,
             cat="Binary",
@@ -37,13 +39,9 @@ class MinE2E:
 
         # delay_(task_x, instance_i, task_y, instance_j)
         # Variable for the entire communication delay (including waiting for the data to be consumed) from task x, instance i to task y, instance j.
-        delay_vars = LpVariable.dicts(
+        self.delay_vars = delay_vars = LpVariable.dicts(
             "delay",
-            [
-                f"{task1['name']},{value1['instance']},{task2['name']},{value2['instance']}"
-                for task1 in mcs.tasks_instances for task2 in mcs.tasks_instances if task1 != task2
-                for value1 in task1["value"] for value2 in task2["value"]
-            ],
+            dependency_instances,
             lowBound=0,
             cat="Integer",
         )
@@ -52,49 +50,105 @@ class MinE2E:
         # Constraints
         
         # 8b. Aggregate the protocol + network component of the communication delays.
-        for task1 in mcs.formatted_tasks:
-            for task2 in mcs.formatted_tasks:
-                if task1["name"] != task2["name"]:
-                    task_pair = f"{task1['name']},{task2['name']}"
-                    prob += lambda_vars[task_pair] == lpSum(
-                        psi_task_core_vars[mcs.get_psi_task_core_key(task1['name'], core1['name'], task2['name'], core2['name'])] * self.get_delay(core1, core2, N)
-                        for core1 in mcs.cores for core2 in mcs.cores
-                    )
+        max_lambdas = {task_pair: max(delays.values()) for task_pair, delays in self.lambdas.items()}
+        for task1, task2 in self.dependencies:
+            task_pair = f"{task1},{task2}"
+            delays = self.lambdas[task_pair]
+            prob += lambda_vars[task_pair] == lpSum(
+                psi_task_core_vars[mcs.get_psi_task_core_key(task1, core1['name'], task2, core2['name'])] * delays[(core1['name'], core2['name'])]
+                for core1 in mcs.cores for core2 in mcs.cores
+            )
 
         # 8e. The source's end time must allow for the protocol + network component of the communication delay to be handled.
         # 8f. The destination's communication dependency can only be satisfied by one source.
-        for task2 in mcs.formatted_tasks:
-            for depends_on in task2["dependsOn"]:
-                for instance2 in filter(lambda x: x["instance"] != -1, self.get_instances(task2["name"], mcs)):
-                    for instance1 in self.get_instances(depends_on, mcs):
-                        dep_pair = f"{depends_on},{task2['name']}"
-                        dep_instances_pair = f"{depends_on},{instance1['instance']},{task2['name']},{instance2['instance']}"
-                        prob += instance1["letEndTime"] + lambda_vars[dep_pair] - instance2["letStartTime"] <= N - N * bool_dep_vars[dep_instances_pair]
-
-                    prob += (
-                        lpSum(
-                            bool_dep_vars[f"{depends_on},{instance1['instance']},{task2['name']},{instance2['instance']}"]
-                            for instance1 in self.get_instances(depends_on, mcs)
-                        ) == 1
-                    )
+        for depends_on, task2 in self.dependencies:
+            for instance2 in filter(lambda x: x["instance"] != -1, self.get_instances(task2)):
+                for instance1 in self.get_instances(depends_on):
+                    dep_pair = f"{depends_on},{task2}"
+                    dep_instances_pair = f"{depends_on},{instance1['instance']},{task2},{instance2['instance']}"
+                    N_8e = self.get_big_n(instance1["letEndTime"] + max_lambdas[dep_pair] - instance2["letStartTime"], N, Config)
+                    prob += instance1["letEndTime"] + lambda_vars[dep_pair] - instance2["letStartTime"] <= N_8e - N_8e * bool_dep_vars[dep_instances_pair]
+
+                prob += (
+                    lpSum(
+                        bool_dep_vars[f"{depends_on},{instance1['instance']},{task2},{instance2['instance']}"]
+                        for instance1 in self.get_instances(depends_on)
+                    ) == 1
+                )
+
         # 9a, 9b. Calculate the exact communication delay of the selected communication dependency.
-        for task1 in mcs.tasks_instances:
-            for task2 in mcs.tasks_instances:
-                if task1["name"] != task2["name"]:
-                    for instance1 in task1["value"]:
-                        for instance2 in filter(lambda x: x["instance"] != -1, task2["value"]):
-                            dep_instances_pair = f"{task1['name']},{instance1['instance']},{task2['name']},{instance2['instance']}"
-                            prob += (delay_vars[dep_instances_pair] >= instance2["letStartTime"] - instance1["letEndTime"] - N + N * bool_dep_vars[dep_instances_pair])
-                            prob += (delay_vars[dep_instances_pair] <= instance2["letStartTime"] - instance1["letEndTime"] + N - N * bool_dep_vars[dep_instances_pair])
+        for depends_on, task2 in self.dependencies:
+            for instance1 in self.get_instances(depends_on):
+                for instance2 in filter(lambda x: x["instance"] != -1, self.get_instances(task2)):
+                    dep_instances_pair = f"{depends_on},{instance1['instance']},{task2},{instance2['instance']}"
+                    # The LET times are constants, so the smallest big N follows directly from the delay.
+                    dep_delay = instance2["letStartTime"] - instance1["letEndTime"]
+                    N_9a = self.get_big_n(dep_delay, N, Config)
+                    N_9b = self.get_big_n(-dep_delay, N, Config)
+                    prob += (delay_vars[dep_instances_pair] >= dep_delay - N_9a + N_9a * bool_dep_vars[dep_instances_pair])
+                    prob += (delay_vars[dep_instances_pair] <= dep_delay + N_9b - N_9b * bool_dep_vars[dep_instances_pair])
 
         # 10. Minimise the response times.
-        objective = lpSum(
-            delay_vars[f"{task1['name']},{value1['instance']},{task2['name']},{value2['instance']}"]
-            for task1 in mcs.tasks_instances for task2 in mcs.tasks_instances if task1 != task2
-            for value1 in task1["value"] for value2 in task2["value"]
-        )
+        objective = lpSum(delay_vars[dep_instances_pair] for dep_instances_pair in dependency_instances)
         prob += objective, "Minimise End-to-End Response Time"
 
+    # Device and network delays, task dependencies, and the protocol + network component of the communication
+    # delay of each dependency (for each core pair). Shared with the SparseMultiCoreBuilder.
+    def load_dependencies(self, N, system, mcs):
+        self.devices = {device["name"]: delay["wcdt"] for device in system["DeviceStore"] for _, delay in device["delays"].items()}
+        self.network_delays = {networkDelay["name"]: networkDelay["wcdt"] for networkDelay in system["NetworkDelayStore"]}
+
+        # The variables and constraints are only created for the task dependencies,
+        # so that the model scales with the number of dependencies instead of tasks².
+        self.dependencies = self.get_dependencies(mcs)
+        self.instances = {task["name"]: task["value"] for task in mcs.tasks_instances}
+        self.lambdas = {
+            f"{task1},{task2}": {(core1['name'], core2['name']): self.get_delay(core1, core2, N) for core1 in mcs.cores for core2 in mcs.cores}
+            for task1, task2 in self.dependencies
+        }
+
+    # Sets the communication delays of the heuristic core allocation as the initial values of the variables.
+    # Each destination instance reads from the latest source instance whose data has arrived before it starts.
+    def set_initial_values(self, allocation, mcs):
+        cores = allocation["cores"]
+        for depends_on, task2 in self.dependencies:
+            dep_pair = f"{depends_on},{task2}"
+            lambda_value = self.lambdas[dep_pair][(cores[depends_on], cores[task2])]
+            self.lambda_vars[dep_pair].setInitialValue(lambda_value)
+
+            for instance2 in filter(lambda x: x["instance"] != -1, self.get_instances(task2)):
+                sources = [instance1 for instance1 in self.get_instances(depends_on) if instance1["letEndTime"] + lambda_value <= instance2["letStartTime"]]
+                if len(sources) == 0:
+                    continue
+                source = max(sources, key=lambda instance1: instance1["letEndTime"])
+                for instance1 in self.get_instances(depends_on):
+                    dep_instances_pair = f"{depends_on},{instance1['instance']},{task2},{instance2['instance']}"
+                    is_selected = instance1 is source
+                    self.bool_dep_vars[dep_instances_pair].setInitialValue(int(is_selected))
+                    self.delay_vars[dep_instances_pair].setInitialValue(instance2["letStartTime"] - instance1["letEndTime"] if is_selected else 0)
+
+    # Big N of a disjunction whose left-hand side is at most max_value.
+    @staticmethod
+    def get_big_n(max_value, N, Config):
+        if not Config.tightBigM:
+            return N
+        return max(0, max_value)
+
+    # Adjacency index of the task dependencies (source, destination), without duplicates.
+    def get_dependencies(self, mcs):
+        dependencies = {}
+        for task in mcs.formatted_tasks:
+            for depends_on in task["dependsOn"]:
+                dependencies[(depends_on, task["name"])] = None
+        return list(dependencies)
+
+    # Pairs of source and destination task instances of all task dependencies.
+    def get_dependency_instances(self):
+        for task1, task2 in self.dependencies:
+            for instance1 in self.get_instances(task1):
+                for instance2 in filter(lambda x: x["instance"] != -1, self.get_instances(task2)):
+                    yield f"{task1},{instance1['instance']},{task2},{instance2['instance']}"
+
     # Equation 8a. Calculate the protocol + network component of a communication delay.
     def get_delay(self, source, dest, N):
         if source["device"] == dest["device"]:
@@ -107,10 +161,8 @@ class MinE2E:
 
         return N
 
-    def get_instances(self, name, mcs):
-        for task in mcs.tasks_instances:
-            if task["name"] == name:
-                return task["value"]
+    def get_instances(self, name):
+        return self.instances[name]
 
     def get_device_delay(self, name):
         for device in self.devices:
@@ -1,8 +1,21 @@
+import copy
+import logging
 import math
-from pulp import LpProblem, LpMinimize, LpVariable, lpSum, getSolver
+import pulp as pl
+from pulp import LpProblem, LpMinimize, LpVariable, lpSum
 
 from MinCoreUsage import MinCoreUsage
 from MinE2E import MinE2E
+from TimeScale import TimeScale
+from SolverOptions import SolverOptions
+from HeuristicScheduler import HeuristicScheduler
+from CoreSymmetry import CoreSymmetry
+from SchedulabilityCheck import SchedulabilityCheck
+from Metrics import RequestMetrics
+from SparseModel import SparseModel
+from SparseMultiCoreBuilder import SparseMultiCoreBuilder
+
+logger = logging.getLogger(__name__)
 
 class MultiCoreScheduler:
 
@@ -13,21 +26,34 @@ class MultiCoreScheduler:
         self.assigned_vars = None
         self.exec_start_vars = None
         self.exec_end_vars = None
+        self.min_cores = 0
+        self.what_if = None
+
+    def multicore_core_scheduler(self, system, path, Config, progress=None):
+        # Time of each phase and size of the LP model
+        metrics = RequestMetrics()
+
+        # Time limit, MIP gap and threads of the solve
+        solver_options = SolverOptions.fromRequest(system, Config)
+
+        # Normalise the time quantities of the system to keep the big N small
+        with metrics.phase("scale"):
+            timeScale = TimeScale.fromSystem(system, Config)
+            system = timeScale.scaleSystem(system)
+        logger.info(f"Time unit: {timeScale.factor} ns")
 
-    def multicore_core_scheduler(self, system, path, Config):
-        prob = LpProblem(f"Multicore_Core_Scheduling{path}", LpMinimize)
         taskPeriods = [task["period"] for task in system["EntityStore"]]
         taskOffsets = [task["initialOffset"] for task in system["EntityStore"]]
         wcdts = [next(iter(device["delays"].values()))["wcdt"] for device in system["DeviceStore"]]
         networkDelays = [delay["wcdt"] for delay in system["NetworkDelayStore"]]
         tasks = [task for task in system["EntityStore"]]
         self.cores = [core for core in system["CoreStore"]]
-        print(wcdts)
+        logger.debug(f"Device delays: {wcdts}")
 
         hyperPeriod = math.lcm(*taskPeriods)
         hyperoffset = max(taskOffsets)
-        hyperDelay = 2 * max(wcdts) + max(networkDelays)    # Over-approximation
-        print(f"Hyper-period: {hyperPeriod}")
+        hyperDelay = 2 * max(wcdts, default=0) + max(networkDelays, default=0)    # Over-approximation
+        logger.info(f"Hyper-period: {timeScale.unscaleTime(hyperPeriod)} ns")
 
         # The task schedule is analysed over a scheduling window (makespan) such that 
         # all dependencies are satisfied at least once
@@ -35,19 +61,64 @@ class MultiCoreScheduler:
         schedulingWindow = (2 + math.ceil(hyperDelay / hyperPeriod)) * hyperPeriod + hyperoffset
         schedulingWindow = max(schedulingWindow, makespan)
         N = 2 * schedulingWindow
-        print(f"Scheduling window: {schedulingWindow} ns")
-        print(f"Big N: {N}")
-
-        print("Formatted tasks")
-        self.formatted_tasks = self.format_tasks(tasks, system.get("DependencyStore", None))
-        for task in self.formatted_tasks:
-            print(task)
-        
-        self.tasks_instances = self.create_task_instances(schedulingWindow, tasks, N)
-        print("task instances")
-        for instances in self.tasks_instances:
-            for instance in instances["value"]:
-                print(instance)
+        logger.info(f"Scheduling window: {timeScale.unscaleTime(schedulingWindow)} ns")
+        logger.debug(f"Big N: {N}")
+
+        with metrics.phase("instances"):
+            self.formatted_tasks = self.format_tasks(tasks, system.get("DependencyStore", None))
+            self.tasks_instances = self.create_task_instances(schedulingWindow, tasks, N)
+        if logger.isEnabledFor(logging.DEBUG):
+            for task in self.formatted_tasks:
+                logger.debug(f"Formatted task: {task}")
+            for instances in self.tasks_instances:
+                for instance in instances["value"]:
+                    logger.debug(f"Task instance of {instances['name']}: {instance}")
+
+        # Reject systems that fail a fast analytical schedulability test, without building the LP model.
+        # The test also bounds the number of cores that are needed.
+        if Config.schedulabilityCheck:
+            with metrics.phase("check"):
+                check = SchedulabilityCheck.fromTaskInstances(self.tasks_instances, tasks, system, timeScale, path)
+                check.check(hyperPeriod, max(taskPeriods))
+            if not check.schedulable:
+                logger.info(f"LetSynchronise system is unschedulable: {check.reason}")
+                return pl.LpSolutionInfeasible, check.toSchedule(solver_options, metrics)
+            self.min_cores = check.minCores
+            logger.info(f"Lower bound of the number of cores: {self.min_cores}")
+
+        # A what-if request starts from the previous schedule of its session
+        # (The core search relabels the cores of the allocation, so it does not fix any tasks)
+        allocation = None
+        self.what_if = system.get("WhatIf")
+        if self.what_if is not None and (path == "/heuristic" or Config.modelBackend != "sparse"):
+            with metrics.phase("whatIf"):
+                allocation, kept = self.what_if_allocation(timeScale)
+                if allocation is not None and path != "/heuristic" and not (path == "/min-core-usage" and Config.minCoreUsageStrategy == "search"):
+                    self.what_if.fixedTasks = self.what_if.localTasks(kept, allocation["cores"], self.get_dependencies())
+            self.what_if.warmStart = allocation is not None
+            logger.info(f"What-if allocation: {len(kept)} of {len(tasks)} tasks keep their schedule, {len(self.what_if.fixedTasks)} are fixed")
+
+        # Greedy core allocation, used as the MIP start of the solve or directly as the heuristic schedule
+        # (The sparse model backend solves without a MIP start)
+        if allocation is None and (path == "/heuristic" or (Config.heuristicWarmStart and Config.modelBackend != "sparse")):
+            with metrics.phase("heuristic"):
+                allocation = HeuristicScheduler().allocateCores(self.get_heuristic_tasks(), self.cores)
+            logger.info(f"Heuristic core allocation: {None if allocation is None else allocation['cores']}")
+
+        if path == "/heuristic":
+            return self.heuristic_schedule(allocation, timeScale, metrics)
+
+        if path == "/min-core-usage" and Config.minCoreUsageStrategy == "search":
+            return self.core_count_search(system, path, N, Config, solver_options, allocation, timeScale, metrics, progress)
+
+        if Config.modelBackend == "sparse":
+            return self.sparse_schedule(system, path, N, Config, solver_options, timeScale, metrics, progress)
+        return self.pulp_schedule(system, path, N, Config, solver_options, allocation, timeScale, metrics, progress)
+
+    # Builds and solves the LP model with PuLP, starting from the heuristic core allocation (when given)
+    def pulp_schedule(self, system, path, N, Config, solver_options, allocation, timeScale, metrics, progress):
+        prob = LpProblem(f"Multicore_Core_Scheduling{path}", LpMinimize)
+        metrics.startPhase("build")
 
         # # # # # # # # # # # # #
         # Variables
@@ -84,7 +155,7 @@ class MultiCoreScheduler:
         # Variable for whether two tasks are allocated to different cores.
         psi_tasks_vars = LpVariable.dicts(
             "psi_tasks",
-            [MultiCoreScheduler.get_psi_tasks_key(task1['name'], task2['name']) for task1 in tasks for task2 in tasks if task1 != task2],
+            [MultiCoreScheduler.get_psi_tasks_key(task1['name'], task2['name']) for task1 in self.tasks_instances for task2 in self.tasks_instances if task1 != task2],
             lowBound=0,
             upBound=1,
             cat="Binary",
@@ -182,28 +253,212 @@ class MultiCoreScheduler:
                             instances_pair = f"{task_x},{task_y}"
                             task_pair = MultiCoreScheduler.get_psi_tasks_key(task1['name'], task2['name'])
 
-                            prob += self.exec_end_vars[task_x] - self.exec_start_vars[task_y] <= N * bool_task_vars[instances_pair] + N * psi_tasks_vars[task_pair]
-                            prob += self.exec_end_vars[task_y] - self.exec_start_vars[task_x] <= N - N * bool_task_vars[instances_pair] + N * psi_tasks_vars[task_pair]
+                            # The smallest big N of each disjunction follows from the LET windows of the two instances.
+                            N_xy = self.get_big_n(instance1, instance2, N, Config)
+                            N_yx = self.get_big_n(instance2, instance1, N, Config)
+                            prob += self.exec_end_vars[task_x] - self.exec_start_vars[task_y] <= N_xy * bool_task_vars[instances_pair] + N_xy * psi_tasks_vars[task_pair]
+                            prob += self.exec_end_vars[task_y] - self.exec_start_vars[task_x] <= N_yx - N_yx * bool_task_vars[instances_pair] + N_yx * psi_tasks_vars[task_pair]
+
+        # Identical cores are used in the order of the first task allocated to them (see CoreSymmetry).
+        symmetry_breaking = self.is_symmetry_breaking(Config)
+        if symmetry_breaking:
+            for previous_core, core in CoreSymmetry.orderedCorePairs(self.cores):
+                for index, task in enumerate(self.tasks_instances):
+                    prob += self.assigned_vars[f"{task['name']},{self.cores[core]['name']}"] <= lpSum(
+                        self.assigned_vars[f"{earlier_task['name']},{self.cores[previous_core]['name']}"] for earlier_task in self.tasks_instances[:index]
+                    )
 
         if path == "/min-core-usage":
             objective = MinCoreUsage()
-            objective.min_core_usage(self.assigned_vars, self.cores, self.tasks_instances, prob)
+            objective.min_core_usage(self.assigned_vars, self.cores, self.tasks_instances, prob, symmetry_breaking, self.min_cores)
         elif path == "/min-e2e-mc":
             objective = MinE2E()
-            objective.min_e2e(N, system, prob, psi_task_core_vars, self)
-
-        prob.writeLP(Config.lpFile)
-        prob.solve(getSolver(Config.solverProg))
-
-        self.update_schedule()
-        schedule = {"EntityInstancesStore": self.tasks_instances}
+            objective.min_e2e(N, system, prob, psi_task_core_vars, self, Config)
+
+        metrics.recordModel(prob, self.count_instances())
+        metrics.endPhase("build")
+
+        # Start the solve from the heuristic schedule
+        warm_start = allocation is not None
+        if warm_start:
+            with metrics.phase("warmStart"):
+                if symmetry_breaking:
+                    allocation = self.canonical_allocation(allocation)
+                self.set_initial_values(allocation, psi_tasks_vars, psi_task_core_vars, bool_task_vars)
+                objective.set_initial_values(allocation, self)
+                if self.what_if is not None:
+                    self.fix_tasks(allocation)
+
+        solver_result = solver_options.solve(prob, Config.solverProg, warm_start, metrics=metrics, incumbent=self.incumbent_progress(path, timeScale, progress))
+
+        if Config.modelBackend == "cross-check":
+            self.cross_check(prob, solver_result, system, path, N, Config, solver_options)
+
+        return self.solved_schedule(
+            prob.sol_status,
+            solver_result,
+            MultiCoreScheduler.get_values(self.assigned_vars),
+            MultiCoreScheduler.get_values(self.exec_start_vars),
+            MultiCoreScheduler.get_values(self.exec_end_vars),
+            path,
+            timeScale,
+            metrics,
+            progress,
+        )
 
-        for v in prob.variables():
-            print(f"{v.name} = {v.varValue}")
+    # Searches for the smallest number of cores with a feasible schedule, instead of solving one model
+    # with a used flag per core. The MinCoreUsage model of the first k cores is solved for k = the lower
+    # bound of the SchedulabilityCheck, k + 1, ..., until it is feasible. Its lower bound is k when the
+    # models with fewer cores are infeasible, so the solve of k cores stops at its first feasible solution.
+    # The cores only differ in their devices, which do not matter for the core usage.
+    def core_count_search(self, system, path, N, Config, solver_options, allocation, timeScale, metrics, progress):
+        cores = self.cores
+        tasks_instances = self.tasks_instances
+        min_cores = max(self.min_cores, 1)
+        for core_count in range(min_cores, len(cores) + 1):
+            logger.info(f"Core count search: {core_count} of {len(cores)} cores")
+            # The schedule of a solve is written into the task instances
+            self.tasks_instances = copy.deepcopy(tasks_instances)
+            self.cores = cores[:core_count]
+            self.min_cores = min_cores
+            core_allocation = self.compact_allocation(allocation)
+            if Config.modelBackend == "sparse":
+                status, schedule = self.sparse_schedule(system, path, N, Config, solver_options, timeScale, metrics, progress)
+            else:
+                status, schedule = self.pulp_schedule(system, path, N, Config, solver_options, core_allocation, timeScale, metrics, progress)
+
+            if SolverOptions.isSchedulable(status) or solver_options.isExpired():
+                break
+            # Only an infeasible model proves that more cores are needed
+            if status == pl.LpSolutionInfeasible:
+                min_cores = core_count + 1
+        return status, schedule
+
+    # The heuristic core allocation, moved to the first of the current cores (in the order that they
+    # are first used), or None when it uses more cores
+    def compact_allocation(self, allocation):
+        if allocation is None:
+            return None
+        used_cores = list(dict.fromkeys(allocation["cores"][task["name"]] for task in self.tasks_instances))
+        if len(used_cores) > len(self.cores):
+            return None
+        relabel = {core: self.cores[index]["name"] for index, core in enumerate(used_cores)}
+        return {**allocation, "cores": {task: relabel[core] for task, core in allocation["cores"].items()}}
+
+    # Core allocation of a what-if request, and the names of the tasks that keep their previous schedule.
+    # The unchanged tasks keep their cores in the previous schedule of the session, and the other tasks are
+    # allocated by the heuristic. The task instances on cores without other tasks also keep their start times.
+    def what_if_allocation(self, timeScale):
+        previous_tasks = self.what_if.previousTasks(timeScale)
+        core_names = [core["name"] for core in self.cores]
+        heuristic_tasks = self.get_heuristic_tasks()
+        previous_start_times = {}
+        kept_cores = {}
+        for task in heuristic_tasks:
+            previous_instances = previous_tasks.get(task["name"], {}).get("instances", {})
+            # The task instances have the same LET windows when the task has not changed
+            if len(task["instances"]) == 0 or not all(instance["instance"] in previous_instances for instance in task["instances"]):
+                continue
+            core = previous_instances[task["instances"][0]["instance"]]["core"]
+            if core in core_names:
+                kept_cores[task["name"]] = core
+                previous_start_times.update({(task["name"], instance["instance"]): previous_instances[instance["instance"]]["startTime"] for instance in task["instances"]})
+
+        allocation = HeuristicScheduler().allocateCores(heuristic_tasks, self.cores, kept_cores)
+        if allocation is None:
+            return None, []
+
+        kept = []
+        for core in core_names:
+            core_tasks = [task for task in heuristic_tasks if allocation["cores"][task["name"]] == core]
+            if all(task["name"] in kept_cores for task in core_tasks):
+                kept += [task["name"] for task in core_tasks]
+                allocation["startTimes"].update({(task["name"], instance["instance"]): previous_start_times[(task["name"], instance["instance"])] for task in core_tasks for instance in task["instances"]})
+        return allocation, kept
+
+    # Fixes the cores and execution times of the fixed tasks of a what-if request to the MIP start
+    def fix_tasks(self, allocation):
+        for task in self.tasks_instances:
+            if task["name"] not in self.what_if.fixedTasks:
+                continue
+            for core in self.cores:
+                var = self.assigned_vars[f"{task['name']},{core['name']}"]
+                var.lowBound = var.upBound = int(allocation["cores"][task["name"]] == core["name"])
+            for instance in filter(lambda x: x["instance"] != -1, task["value"]):
+                instance_name = f"{task['name']},{instance['instance']}"
+                start_time = allocation["startTimes"][(task["name"], instance["instance"])]
+                self.exec_start_vars[instance_name].lowBound = self.exec_start_vars[instance_name].upBound = start_time
+                self.exec_end_vars[instance_name].lowBound = self.exec_end_vars[instance_name].upBound = start_time + self.get_wcet(task["name"])
+
+    # (Source task, destination task) of each task dependency
+    def get_dependencies(self):
+        return [(source, task["name"]) for task in self.formatted_tasks for source in task["dependsOn"]]
+
+    # Builds and solves the LP model as a SparseModel, without PuLP expressions
+    def sparse_schedule(self, system, path, N, Config, solver_options, timeScale, metrics, progress):
+        with metrics.phase("build"):
+            builder = SparseMultiCoreBuilder(self, Config)
+            model = builder.build(path, N, system)
+        metrics.recordSize(model.size(self.count_instances()))
+
+        solver_result = model.solve(solver_options, metrics)
+        return self.solved_schedule(
+            model.sol_status,
+            solver_result,
+            builder.values("assigned"),
+            builder.values("start"),
+            builder.values("end"),
+            path,
+            timeScale,
+            metrics,
+            progress,
+        )
 
-        print(prob.sol_status)
+    # Reports the incumbents of a running solve with the progress callback (only the end-to-end response times are time quantities)
+    def incumbent_progress(self, path, timeScale, progress):
+        if progress is None or path != "/min-e2e-mc":
+            return progress
+        return lambda objective_value: progress(timeScale.unscaleTime(objective_value))
+
+    # Schedule of a solve, from the values of the core assignment and execution time variables
+    def solved_schedule(self, status, solver_result, assigned, exec_start, exec_end, path, timeScale, metrics, progress):
+        # Only the end-to-end response times are time quantities
+        if path == "/min-e2e-mc":
+            timeScale.unscaleSolverResult(solver_result)
+
+        if progress is not None and SolverOptions.isSchedulable(status):
+            progress(solver_result["objectiveValue"])
+
+        with metrics.phase("extract"):
+            self.update_schedule(assigned, exec_start, exec_end)
+            schedule = timeScale.unscaleSchedule({"EntityInstancesStore": self.tasks_instances})
+        schedule["SolverResult"] = solver_result
+        schedule["Metrics"] = metrics.toJson()
+        if self.what_if is not None:
+            schedule["WhatIf"] = self.what_if.toJson()
+
+        logger.info(f"Solution status: {pl.LpSolution[status]}")
+
+        return status, schedule
+
+    # Builds the same LP model with the SparseMultiCoreBuilder, and logs the differences between the
+    # two formulations and their objective values. The PuLP solution remains the result of the request.
+    def cross_check(self, prob, solver_result, system, path, N, Config, solver_options):
+        model = SparseMultiCoreBuilder(self, Config).build(path, N, system)
+        differences = model.compare(SparseModel.fromPuLP(prob))
+        for difference in differences:
+            logger.warning(f"Cross-check: {difference}")
+
+        sparse_result = model.solve(solver_options, RequestMetrics())
+        if sparse_result["optimal"] and solver_result["optimal"] and abs(sparse_result["objectiveValue"] - solver_result["objectiveValue"]) > 1e-6:
+            differences.append("The optimal objective values differ")
+            logger.warning(f"Cross-check: optimal objective values {solver_result['objectiveValue']} (PuLP) and {sparse_result['objectiveValue']} (sparse)")
+        logger.info(f"Cross-check: {len(differences)} differences between the PuLP and sparse models")
+        return differences
 
-        return prob.sol_status, schedule
+    @staticmethod
+    def get_values(variables):
+        return {key: var.varValue for key, var in variables.items()}
 
     # For breaking symmetry because the task ordering does not matter.
     @staticmethod
@@ -217,6 +472,14 @@ class MultiCoreScheduler:
         if task1Name < task2Name: return f"{task1Name},{core1Name},{task2Name},{core2Name}"
         else: return f"{task2Name},{core2Name},{task1Name},{core1Name}"
 
+    # Big N of a disjunction whose left-hand side is the end time of instance1 minus the start
+    # time of instance2. Both are bounded by the LET windows of the instances.
+    @staticmethod
+    def get_big_n(instance1, instance2, N, Config):
+        if not Config.tightBigM:
+            return N
+        return max(0, instance1["letEndTime"] - instance2["letStartTime"])
+
     def format_tasks(self, tasks, dependencies):
         formatted_tasks = []
 
@@ -239,25 +502,108 @@ class MultiCoreScheduler:
 
         return formatted_tasks
 
-    def update_schedule(self):
+    def update_schedule(self, assigned, exec_start, exec_end):
         for task in self.tasks_instances:
             task["value"] = [instance for instance in task["value"] if instance["instance"] != -1]
             for instance in task["value"]:
                 for core in self.cores:
-                    if self.assigned_vars[f"{task['name']},{core['name']}"].varValue == 1:
-                        start_time = self.exec_start_vars[f"{task['name']},{instance['instance']}"].varValue
-                        end_time = self.exec_end_vars[f"{task['name']},{instance['instance']}"].varValue
-
-                        execution_time = [
-                            {
-                                "core": core["name"],
-                                "endTime": end_time,
-                                "startTime": start_time,
-                            }
-                        ]
-                        instance["executionTime"] = self.get_wcet(task["name"])
-                        instance["currentCore"] = core
-                        instance["executionIntervals"] = execution_time
+                    if assigned[f"{task['name']},{core['name']}"] == 1:
+                        start_time = exec_start[f"{task['name']},{instance['instance']}"]
+                        end_time = exec_end[f"{task['name']},{instance['instance']}"]
+                        self.set_execution(task, instance, core, start_time, end_time)
+
+    def set_execution(self, task, instance, core, start_time, end_time):
+        execution_time = [
+            {
+                "core": core["name"],
+                "endTime": end_time,
+                "startTime": start_time,
+            }
+        ]
+        instance["executionTime"] = self.get_wcet(task["name"])
+        instance["currentCore"] = core
+        instance["executionIntervals"] = execution_time
+
+    # Task instances (without the negative instance) for the HeuristicScheduler
+    def get_heuristic_tasks(self):
+        return [
+            {
+                "name": task["name"],
+                "period": self.get_period(task["name"]),
+                "wcet": self.get_wcet(task["name"]),
+                "instances": [instance for instance in task["value"] if instance["instance"] != -1],
+            }
+            for task in self.tasks_instances
+        ]
+
+    # Schedule of the /heuristic goal, which is returned without solving the LP model
+    def heuristic_schedule(self, allocation, timeScale, metrics):
+        status = pl.LpSolutionNoSolutionFound
+        with metrics.phase("extract"):
+            if allocation is not None:
+                status = pl.LpSolutionIntegerFeasible
+                for task in self.tasks_instances:
+                    task["value"] = [instance for instance in task["value"] if instance["instance"] != -1]
+                    core = next(core for core in self.cores if core["name"] == allocation["cores"][task["name"]])
+                    for instance in task["value"]:
+                        start_time = allocation["startTimes"][(task["name"], instance["instance"])]
+                        self.set_execution(task, instance, core, start_time, start_time + self.get_wcet(task["name"]))
+
+            schedule = timeScale.unscaleSchedule({"EntityInstancesStore": self.tasks_instances})
+        schedule["Metrics"] = metrics.toJson()
+        if self.what_if is not None:
+            schedule["WhatIf"] = self.what_if.toJson()
+        schedule["SolverResult"] = {
+            "status": pl.LpSolution[status],
+            "optimal": False,
+            "objectiveValue": None,
+            "bound": None,
+            "gap": None,
+            "timeLimit": None,
+            "timeLimitReached": False,
+            "mipGap": None,
+        }
+        return status, schedule
+
+    # The symmetry breaking would move the fixed tasks of a what-if request to other identical cores
+    def is_symmetry_breaking(self, Config):
+        return Config.symmetryBreaking and (self.what_if is None or len(self.what_if.fixedTasks) == 0)
+
+    # Relabels the identical cores of a heuristic core allocation to satisfy the symmetry-breaking constraints
+    def canonical_allocation(self, allocation):
+        core_indices = {core["name"]: index for index, core in enumerate(self.cores)}
+        task_names = [task["name"] for task in self.tasks_instances]
+        cores = CoreSymmetry.canonicalAllocation(task_names, {task: core_indices[core] for task, core in allocation["cores"].items()}, self.cores)
+        return {**allocation, "cores": {task: self.cores[core]["name"] for task, core in cores.items()}}
+
+    # Sets the heuristic core allocation and execution times as the initial values of the variables
+    def set_initial_values(self, allocation, psi_tasks_vars, psi_task_core_vars, bool_task_vars):
+        cores = allocation["cores"]
+        start_times = allocation["startTimes"]
+        for task in self.tasks_instances:
+            for core in self.cores:
+                self.assigned_vars[f"{task['name']},{core['name']}"].setInitialValue(int(cores[task["name"]] == core["name"]))
+            for instance in filter(lambda x: x["instance"] != -1, task["value"]):
+                instance_name = f"{task['name']},{instance['instance']}"
+                start_time = start_times[(task["name"], instance["instance"])]
+                self.exec_start_vars[instance_name].setInitialValue(start_time)
+                self.exec_end_vars[instance_name].setInitialValue(start_time + self.get_wcet(task["name"]))
+
+        for key, var in psi_task_core_vars.items():
+            task1, core1, task2, core2 = key.split(",")
+            var.setInitialValue(int(cores[task1] == core1 and cores[task2] == core2))
+        for key, var in psi_tasks_vars.items():
+            task1, task2 = key.split(",")
+            var.setInitialValue(int(cores[task1] != cores[task2]))
+
+        # Task x executes after task y (bool_task = 1) when x does not end before y starts on the same core
+        for key, var in bool_task_vars.items():
+            task1, instance1, task2, instance2 = key.split(",")
+            if cores[task1] != cores[task2] or instance1 == "-1" or instance2 == "-1":
+                var.setInitialValue(0)
+            else:
+                end_time = start_times[(task1, int(instance1))] + self.get_wcet(task1)
+                var.setInitialValue(int(end_time > start_times[(task2, int(instance2))]))
 
     def create_task_instances(self, makespan, tasks, N):
         task_instances = []
@@ -305,6 +651,13 @@ class MultiCoreScheduler:
             "executionTime": task["wcet"],
         }
 
+    # Number of task instances in the scheduling window (without the negative instances)
+    def count_instances(self):
+        return sum(len([instance for instance in task["value"] if instance["instance"] != -1]) for task in self.tasks_instances)
+
+    def get_period(self, task_name):
+        return next((task for task in self.formatted_tasks if task["name"] == task_name))["period"]
+
     def get_wcet(self, task_name):
         return next((task for task in self.formatted_tasks if task["name"] == task_name))["wcet"]
 
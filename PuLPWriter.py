@@ -1,5 +1,11 @@
 import pulp as pl
 import math
+import bisect
+
+from SolverOptions import SolverOptions
+from LpVariableRegistry import LpVariableRegistry
+from LpResults import LpResults
+from CoreSymmetry import CoreSymmetry
 
 class PuLPWriter:
     equations = [{}]
@@ -11,33 +17,69 @@ class PuLPWriter:
         print("Avaliable Solver on System:" + solver_list)
         print("Supported Solvers: "+pl.listSolvers())
 
-    def __init__(self, filename, objectiveVariable, lpLargeConstant, objectiveType=OVERALL_END_TO_END):
+    def __init__(self, objectiveVariable, lpLargeConstant, objectiveType=OVERALL_END_TO_END, tightBigM=True):
         self.prob = pl.LpProblem("Multicore_Core_Scheduling/ilp", pl.LpMinimize)
-        self.filename = filename
-        self.objectiveVariable = pl.LpVariable(objectiveVariable, None, None, pl.LpInteger)
         self.lpLargeConstant = lpLargeConstant
+        self.tightBigM = tightBigM
         self.objectiveType = objectiveType
+        self.objectiveVariableName = objectiveVariable
         self.dependencyInstanceDelayVariables = {}
         self.allTaskInstances = {}
-        
-        # All variables
-        self.vars = {}
+        self.boundedDelayVariables = []
+        self.overlapPairs = []
+        self.dependencyInstances = {}
+        self.solverResult = None
+
+        # All variables, identified by integer ids. The arrays below hold the variable ids of the
+        # tasks (task id), task instances (instance id), cores (index in the CoreStore) and
+        # overlapping task instance pairs (index in overlapPairs).
+        self.vars = LpVariableRegistry(self.variableName)
+        self.objectiveVariable = self.vars.addInt("objective")
+
+        # Tasks
+        self.taskNames = []
+        self.taskPeriods = []
+        self.offsetVars = []
+        self.taskStartVars = []
+        self.taskEndVars = []
+        self.taskCoreVars = []
+
+        # Task instances
+        self.instanceTasks = []
+        self.instanceNumbers = []
+        self.instanceWindows = []
+        self.periodStartVars = []
+        self.periodEndVars = []
+        self.startVars = []
+        self.endVars = []
+        self.coreVars = []
+
+        # Overlapping task instance pairs
+        self.pairVars = []
+        self.controlVars = []
+
+        # Dependency instances (source instance id, destination instance id)
+        self.depVars = {}
+        self.delayVars = {}
+
+        self.coreNames = []
+        self.coreSymmetry = False
 
 
     def writeComment(self, string):
         None
 
     def writeObjective(self):
-        self.prob += self.objectiveVariable, "Minimise End-to-End Response Time" #Expressions are objectives
+        self.prob += self.vars[self.objectiveVariable], "Minimise End-to-End Response Time" #Expressions are objectives
 
     def writeObjectiveEquation(self):
         #dependencyInstanceDelays = ' - '.join([x for v in self.dependencyInstanceDelayVariables.values() for x in v])
         #self.write(f"{self.objectiveVariable} - {dependencyInstanceDelays} = 0;\n", "Objective equation")
         #print([self.getIntVar(x) for v in self.dependencyInstanceDelayVariables.values() for x in v])
         if (self.objectiveType == self.OVERALL_END_TO_END):
-            self.prob += self.objectiveVariable == pl.lpSum([self.getIntVar(x) for v in self.dependencyInstanceDelayVariables.values() for x in v])
+            self.prob += self.vars[self.objectiveVariable] == pl.lpSum([self.vars[x] for v in self.dependencyInstanceDelayVariables.values() for x in v])
         elif (self.objectiveType == self.MIN_SUM_END_TIME):
-            self.prob += self.objectiveVariable == pl.lpSum([self.getIntVar(self.taskInstPeriodEndTime(x)) for v in self.allTaskInstances.values() for x in v])
+            self.prob += self.vars[self.objectiveVariable] == pl.lpSum([self.vars[self.periodEndVars[x]] for v in self.allTaskInstances.values() for x in v])
    
     def taskOffset(self, taskInstance):
         return f"{taskInstance}_offset"
@@ -68,28 +110,75 @@ class PuLPWriter:
     
     def instVarName(self, taskName, insName): 
         return f"{taskName}_{insName}"
+
+    # Name of a task instance id
+    def instanceName(self, instance):
+        return self.instVarName(self.taskNames[self.instanceTasks[instance]], self.instanceNumbers[instance])
+
+    # Descriptive name of a variable (see LpVariableRegistry), from its kind and integer ids
+    def variableName(self, key):
+        kind = key[0]
+        if kind == "objective":
+            return self.objectiveVariableName
+        elif kind == "offset":
+            return self.taskOffset(self.taskNames[key[1]])
+        elif kind == "taskStart":
+            return self.taskInstStartTime(self.taskNames[key[1]])
+        elif kind == "taskEnd":
+            return self.taskInstEndTime(self.taskNames[key[1]])
+        elif kind == "taskCore":
+            return self.taskInstCoreAllocation(self.taskNames[key[1]], self.coreNames[key[2]])
+        elif kind == "periodStart":
+            return self.taskInstPeriodStartTime(self.instanceName(key[1]))
+        elif kind == "periodEnd":
+            return self.taskInstPeriodEndTime(self.instanceName(key[1]))
+        elif kind == "start":
+            return self.taskInstStartTime(self.instanceName(key[1]))
+        elif kind == "end":
+            return self.taskInstEndTime(self.instanceName(key[1]))
+        elif kind == "core":
+            return self.taskInstCoreAllocation(self.instanceName(key[1]), self.coreNames[key[2]])
+        elif kind == "pair":
+            currentTaskInst, otherTaskInst = self.overlapPairs[key[1]]
+            return self.taskInstCorePairsAllocation(self.instanceName(currentTaskInst), self.coreNames[key[2]], self.instanceName(otherTaskInst), self.coreNames[key[3]])
+        elif kind == "control":
+            currentTaskInst, otherTaskInst = self.overlapPairs[key[1]]
+            return self.taskInstExecutionControl(self.instanceName(currentTaskInst), self.instanceName(otherTaskInst))
+        elif kind == "dep":
+            return self.depInst(self.instanceName(key[1]), self.instanceName(key[2]))
+        elif kind == "delay":
+            return self.taskInstDelay(self.instanceName(key[1]), self.instanceName(key[2]))
+        raise ValueError(f"Unknown variable kind {kind}")
     
-    def getIntVar(self, name):
-        if (name in self.vars) == False:
-            lpVar = pl.LpVariable(name, None, None, cat=pl.LpInteger)
-            self.vars[name] = lpVar
-        return self.vars[name]
-    
-    def getBoolVar(self, name):
-        if (name in self.vars) == False:
-            lpVar = pl.LpVariable(name, lowBound=0, upBound=1, cat=pl.LpBinary)
-            self.vars[name] = lpVar
-        return self.vars[name]
-    
+    # Big-M of a logical disjunction whose left-hand side is at most maxValue.
+    # The smallest valid value gives the tightest LP relaxation. Otherwise, the
+    # large constant is used.
+    def bigM(self, maxValue):
+        if not self.tightBigM:
+            return self.lpLargeConstant
+        return max(0, maxValue)
+
+    # Largest possible difference between the end time of one task instance and the start time of
+    # another task instance, given the execution windows of both task instances.
+    def maxEndToStart(self, endTaskInst, startTaskInst):
+        return self.instanceWindows[endTaskInst][1] - self.instanceWindows[startTaskInst][0]
+
     # Equation 2
     # Create constraints to compute task instance start and end times for each task instance (i) within the scheduling window
     def createTaskInstancesAsConstraints(self, system, schedulingWindow, cores, Config):
-        allTaskInstances = {}
+        self.coreNames = [core["name"] for core in cores]
         for task in system['EntityStore']:
             # Get task parameters
             taskName = task['name']
             taskWcet = task['wcet']
             taskPeriod = task['period']
+            taskId = len(self.taskNames)
+            self.taskNames.append(taskName)
+            self.taskPeriods.append(taskPeriod)
+            self.offsetVars.append(self.vars.addInt("offset", taskId) if Config.useOffSet else None)
+            self.taskStartVars.append(None if Config.individualLetInstanceParams else self.vars.addInt("taskStart", taskId))
+            self.taskEndVars.append(None if Config.individualLetInstanceParams else self.vars.addInt("taskEnd", taskId))
+            self.taskCoreVars.append([self.vars.addBool("taskCore", taskId, core) for core in range(len(cores))] if Config.restrictTaskInstancesToSameCore else None)
             
             self.writeComment(f"Task instance properties of {taskName}")
             
@@ -98,31 +187,43 @@ class PuLPWriter:
 
             # instancePeriodStartTime is 𝑖 × 𝑡.𝑝
             for instancePeriodStartTime in range(0, schedulingWindow, taskPeriod):
-                # Task instance name includes an instance number
-                instanceName = self.instVarName(taskName, len(instances))
-                instances.append(instanceName)
+                # Task instances are identified by their instance id, and named by their task and instance number
+                instance = len(self.instanceTasks)
+                self.instanceTasks.append(taskId)
+                self.instanceNumbers.append(len(instances))
+                instances.append(instance)
+
+                self.periodStartVars.append(self.vars.addInt("periodStart", instance))
+                self.periodEndVars.append(self.vars.addInt("periodEnd", instance))
+                self.startVars.append(self.vars.addInt("start", instance))
+                self.endVars.append(self.vars.addInt("end", instance))
+                self.coreVars.append([self.vars.addBool("core", instance, core) for core in range(len(cores))])
 
-                instancePeriodStartTimeVar = self.getIntVar(self.taskInstPeriodStartTime(instanceName))
+                instancePeriodStartTimeVar = self.vars[self.periodStartVars[instance]]
 
                 # introduce solution space where t.o is equal to or larger than 0
                 if Config.useOffSet:
-                    taskOffsetVar = self.getIntVar(self.taskOffset(taskName))
+                    taskOffsetVar = self.vars[self.offsetVars[taskId]]
                     self.prob += instancePeriodStartTimeVar == instancePeriodStartTime + taskOffsetVar
                     self.prob += taskOffsetVar >= 0  # tasks offset must be positive
                     self.prob += taskOffsetVar <= taskPeriod - 1 # tasks can be offset atmost 1 less than period
                 else:
                     self.prob += instancePeriodStartTimeVar == instancePeriodStartTime
 
+                # The task instance can only execute between the earliest start and latest end of its period
+                latestOffset = taskPeriod - 1 if Config.useOffSet else 0
+                self.instanceWindows.append((instancePeriodStartTime, instancePeriodStartTime + latestOffset + taskPeriod))
+
                 # Compute task instance end time
-                instancePeriodEndTimeVar = self.getIntVar(self.taskInstPeriodEndTime(instanceName))
+                instancePeriodEndTimeVar = self.vars[self.periodEndVars[instance]]
                 self.prob += instancePeriodEndTimeVar == instancePeriodStartTimeVar + taskPeriod
      
                 # Encode the execution bounds of the task instance in LP constraints
                 # ------------------------------------------------------------------
                 
                 # Add to list of unknown integer variables with the instance start and end times
-                taskInstStartTimeVar = self.getIntVar(self.taskInstStartTime(instanceName))
-                taskInstEndTimeVar = self.getIntVar(self.taskInstEndTime(instanceName))
+                taskInstStartTimeVar = self.vars[self.startVars[instance]]
+                taskInstEndTimeVar = self.vars[self.endVars[instance]]
 
                 # Equation 2a: 𝑡^𝑖.𝑠 = 𝑡.𝑜 + 𝑖 × 𝑡.𝑝 + 𝑡.𝑎
                 # 𝑡^𝑖.𝑠, t.o, and t.a are unknowns 
@@ -137,11 +238,10 @@ class PuLPWriter:
                 #Task execution time has to be greater than or equal to wcet
                 if (Config.useHeterogeneousCores):
                     currentTaskAllocations = {}
-                    for core in cores:
-                        currentTaskCoreAllocationVariable = self.getBoolVar(self.taskInstCoreAllocation(instanceName, core["name"]))
-                        currentTaskAllocations[currentTaskCoreAllocationVariable] = math.ceil(taskWcet / float(core["speedup"]))
+                    for core, currentTaskCoreAllocationVariable in enumerate(self.coreVars[instance]):
+                        currentTaskAllocations[self.vars[currentTaskCoreAllocationVariable]] = math.ceil(taskWcet / float(cores[core]["speedup"]))
 
-                    self.prob += taskInstEndTimeVar - taskInstStartTimeVar >= pl.lpSum([alloc * currentTaskAllocations[alloc] for alloc in currentTaskAllocations.keys()]), "WCET_"+instanceName
+                    self.prob += taskInstEndTimeVar - taskInstStartTimeVar >= pl.lpSum([alloc * currentTaskAllocations[alloc] for alloc in currentTaskAllocations.keys()])
                 else:
                     # Equation 2b: 𝑡𝑖.𝑒 = 𝑡𝑖.𝑠 + 𝑡.𝛿
                     # rearrenage 𝑡.𝛿 = 𝑡𝑖.𝑒 - 𝑡𝑖.𝑠
@@ -155,8 +255,8 @@ class PuLPWriter:
                 if not Config.individualLetInstanceParams:
                     # Make sure all LET instances start and end at the same time
                     # Add / Set Task start times
-                    taskStartTimeVar = self.getIntVar(self.taskInstStartTime(taskName))
-                    taskEndTimeVar = self.getIntVar(self.taskInstEndTime(taskName))
+                    taskStartTimeVar = self.vars[self.taskStartVars[taskId]]
+                    taskEndTimeVar = self.vars[self.taskEndVars[taskId]]
 
                     # Make sure all LET instances start and end at the same time
                     self.prob += taskInstStartTimeVar - taskStartTimeVar == instancePeriodStartTimeVar
@@ -172,29 +272,59 @@ class PuLPWriter:
         self.writeComment("Make sure task executions do not overlap")
         for taskInstances in allTaskInstances.values():
             for instance in taskInstances:
-                currentTaskAllocations = list()
-                for c in cores:
-                    currentTaskCoreAllocationVariable = self.getBoolVar(self.taskInstCoreAllocation(instance,c["name"]))
-                    currentTaskAllocations.append(currentTaskCoreAllocationVariable)
+                currentTaskAllocations = [self.vars[variable] for variable in self.coreVars[instance]]
                 # Task instances must only be allocated to a single core
                 self.prob += pl.lpSum(currentTaskAllocations) == 1 #only 1 core can be selected
         if Config.restrictTaskInstancesToSameCore:
-            for c in cores:
-                for taskName, taskInstances in allTaskInstances.items():
-                    taskCoreAllocationVariable = self.getBoolVar(self.taskInstCoreAllocation(taskName,c["name"]))
+            for c in range(len(cores)):
+                for taskInstances in allTaskInstances.values():
                     for instance in taskInstances:
-                        currentTaskCoreAllocationVariable = self.getBoolVar(self.taskInstCoreAllocation(instance,c["name"]))
-                        self.prob += taskCoreAllocationVariable == currentTaskCoreAllocationVariable, "restrict_"+c["name"]+"_"+taskName+"_"+instance
+                        taskCoreAllocationVariable = self.vars[self.taskCoreVars[self.instanceTasks[instance]][c]]
+                        currentTaskCoreAllocationVariable = self.vars[self.coreVars[instance][c]]
+                        self.prob += taskCoreAllocationVariable == currentTaskCoreAllocationVariable
         # Add pairwise task constraints to make sure task executions do not overlap (single core)
+        # Only task instances whose execution windows intersect can overlap, so the candidate
+        # pairs are looked up in an interval index instead of pairing all task instances
+        windowIndex = self.createInstanceWindowIndex(allTaskInstances)
         while bool(allTaskInstances):
             # Get all instances of all tasks
             # ∀𝑡𝑖𝑥, 𝑡𝑗𝑦 ∈ T𝑆, 𝑥 ≠ 𝑦
             taskName, instances = allTaskInstances.popitem()
             for instance in instances:
                 for otherTaskName, otherInstances in allTaskInstances.items():
-                    for otherInstance in otherInstances:
+                    for otherInstance in self.overlappingTaskInstances(instance, otherInstances, windowIndex[otherTaskName]):
                         self.writeTaskOverlapConstraint(instance, otherInstance, cores)
 
+    # Identical cores are used in the order of the first task allocated to them (see CoreSymmetry).
+    # The first instance of each task stands for the task, so that the constraints are also valid
+    # when the task instances can be allocated to different cores.
+    def createCoreSymmetryConstraints(self, allTaskInstances, cores):
+        self.writeComment("Break the symmetry of identical cores")
+        self.coreSymmetry = True
+        firstInstances = [instances[0] for instances in allTaskInstances.values()]
+        for previousCore, core in CoreSymmetry.orderedCorePairs(cores):
+            for index, instance in enumerate(firstInstances):
+                self.prob += self.vars[self.coreVars[instance][core]] <= pl.lpSum(
+                    self.vars[self.coreVars[earlierInstance][previousCore]] for earlierInstance in firstInstances[:index]
+                )
+
+    # Interval index of each task: the earliest start and latest end times of its task instances.
+    # The instances of a task share the same period, so both lists are sorted.
+    def createInstanceWindowIndex(self, allTaskInstances):
+        windowIndex = {}
+        for taskName, instances in allTaskInstances.items():
+            windows = [self.instanceWindows[instance] for instance in instances]
+            windowIndex[taskName] = ([start for start, _ in windows], [end for _, end in windows])
+        return windowIndex
+
+    # Task instances of another task whose execution windows intersect the window of the given task instance
+    def overlappingTaskInstances(self, instance, otherInstances, otherWindows):
+        start, end = self.instanceWindows[instance]
+        otherStarts, otherEnds = otherWindows
+        first = bisect.bisect_right(otherEnds, start)
+        last = bisect.bisect_left(otherStarts, end)
+        return otherInstances[first:last]
+
     def taskInstCoreAllocation(self, task, coreName):
         return f"core_{task}_{coreName}"
 
@@ -202,39 +332,45 @@ class PuLPWriter:
         return f"pair_{srcTask}_{srcCoreName}_{destTask}_{destCoreName}"
     
     def writeTaskOverlapConstraint(self, currentTaskInst, otherTaskInst, cores):
+        pair = len(self.overlapPairs)
+        self.overlapPairs.append((currentTaskInst, otherTaskInst))
+        self.pairVars.append([[self.vars.addBool("pair", pair, srcCore, destCore) for destCore in range(len(cores))] for srcCore in range(len(cores))])
+        self.controlVars.append(self.vars.addBool("control", pair))
         taskAllocationPairs = list()
         taskAllocationExclusivePairs = list()
 
-        for srcCore in cores:
-            for destCore in cores:
-                currentTaskCoreAllocationVariable = self.getBoolVar(self.taskInstCoreAllocation(currentTaskInst,srcCore["name"]))
-                otherTaskCoreAllocationVariable = self.getBoolVar(self.taskInstCoreAllocation(otherTaskInst,destCore["name"]))
+        for srcCore in range(len(cores)):
+            for destCore in range(len(cores)):
+                currentTaskCoreAllocationVariable = self.vars[self.coreVars[currentTaskInst][srcCore]]
+                otherTaskCoreAllocationVariable = self.vars[self.coreVars[otherTaskInst][destCore]]
 
-                pairTaskCoreAllocationVariable = self.getBoolVar(self.taskInstCorePairsAllocation(currentTaskInst,srcCore["name"],otherTaskInst,destCore["name"]))
+                pairTaskCoreAllocationVariable = self.vars[self.pairVars[pair][srcCore][destCore]]
                 taskAllocationPairs.append(pairTaskCoreAllocationVariable)
 
                 #if this pair has been allocated naturally the task allocation must also be allocated
                 self.prob += pairTaskCoreAllocationVariable <= currentTaskCoreAllocationVariable
                 self.prob += pairTaskCoreAllocationVariable <= otherTaskCoreAllocationVariable
-                if not (srcCore["name"] == destCore["name"]):
+                if not (srcCore == destCore):
                     taskAllocationExclusivePairs.append(pairTaskCoreAllocationVariable)
 
         # Only 1 pair can be selected
         self.prob += pl.lpSum(taskAllocationPairs) == 1 
 
-        controlVariable = self.getBoolVar(self.taskInstExecutionControl(currentTaskInst,otherTaskInst))
-        currentTaskInstStartTime = self.getIntVar(self.taskInstStartTime(currentTaskInst))
-        currentTaskInstEndTime  = self.getIntVar(self.taskInstEndTime(currentTaskInst))
-        otherTaskInstStartTime = self.getIntVar(self.taskInstStartTime(otherTaskInst))
-        otherTaskInstEndTime  = self.getIntVar(self.taskInstEndTime(otherTaskInst))
+        controlVariable = self.vars[self.controlVars[pair]]
+        currentTaskInstStartTime = self.vars[self.startVars[currentTaskInst]]
+        currentTaskInstEndTime  = self.vars[self.endVars[currentTaskInst]]
+        otherTaskInstStartTime = self.vars[self.startVars[otherTaskInst]]
+        otherTaskInstEndTime  = self.vars[self.endVars[otherTaskInst]]
         # These two constraints ensure the tasks either execute before OR after one another and not overlap
         # Equation 3a and Equation 3b
 
         # 𝑡𝑖𝑥.𝑒 − 𝑡𝑗𝑦.𝑠 ≤ N × 𝑏𝑡𝑎𝑠𝑘𝑥,𝑖,𝑦,𝑗
-        self.prob += currentTaskInstEndTime - otherTaskInstStartTime <= self.lpLargeConstant * controlVariable + pl.lpSum([x * self.lpLargeConstant for x in taskAllocationExclusivePairs])
+        largeConstant = self.bigM(self.maxEndToStart(currentTaskInst, otherTaskInst))
+        self.prob += currentTaskInstEndTime - otherTaskInstStartTime <= largeConstant * controlVariable + pl.lpSum([x * largeConstant for x in taskAllocationExclusivePairs])
 
         #𝑡𝑗𝑦.𝑒 − 𝑡𝑖𝑥.𝑠 ≤ N − N × 𝑏𝑡𝑎𝑠𝑘𝑥,𝑖,𝑦,
-        equation = otherTaskInstEndTime - currentTaskInstStartTime <= self.lpLargeConstant - self.lpLargeConstant * controlVariable + pl.lpSum([x * self.lpLargeConstant for x in taskAllocationExclusivePairs])
+        largeConstant = self.bigM(self.maxEndToStart(otherTaskInst, currentTaskInst))
+        equation = otherTaskInstEndTime - currentTaskInstStartTime <= largeConstant - largeConstant * controlVariable + pl.lpSum([x * largeConstant for x in taskAllocationExclusivePairs])
         self.prob += equation
 
     # Equation 4
@@ -266,21 +402,26 @@ class PuLPWriter:
     def writeDependencySourceTaskSelectionConstraint(self, name, taskDependencyPair, srcTaskInstances, destTaskInstances):
         self.writeComment(f"Select source task for each instance of dependency {name}. Calculate dependency delays")
         
+        # A dependency between the same tasks (e.g., of other ports) has the same constraints
+        if taskDependencyPair in self.dependencyInstances:
+            return
+
         # There can only be one source task for a task dependency instance
         self.dependencyInstanceDelayVariables[taskDependencyPair] = []
+        self.dependencyInstances[taskDependencyPair] = (srcTaskInstances, destTaskInstances)
         # ∀𝑡𝑗𝑦 ∈ T𝑑.𝑑𝑒𝑠𝑡
         for destInst in destTaskInstances:
-            destTaskInstStartTimeVar = self.getIntVar(self.taskInstStartTime(destInst))
-            destTaskInstEndTimeVar = self.getIntVar(self.taskInstEndTime(destInst))
+            destTaskInstStartTimeVar = self.vars[self.startVars[destInst]]
+            destTaskInstEndTimeVar = self.vars[self.endVars[destInst]]
             # Iterate over source task instances
             # ∀𝑡𝑖𝑥 ∈ T𝑑.𝑠𝑟𝑐
             srcInstControlVariables = list()
             for srcInst in srcTaskInstances:
-                srcTaskInstStartTimeVar = self.getIntVar(self.taskInstStartTime(srcInst))
-                srcTaskInstEndTimeVar = self.getIntVar(self.taskInstEndTime(srcInst))
-                # Name for task dependency instance and its boolean control variable.
-           
-                dependencyInstanceControlVariable = self.getBoolVar(self.depInst(srcInst, destInst))   
+                srcTaskInstStartTimeVar = self.vars[self.startVars[srcInst]]
+                srcTaskInstEndTimeVar = self.vars[self.endVars[srcInst]]
+                # Boolean control variable of the task dependency instance.
+                self.depVars[(srcInst, destInst)] = self.vars.addBool("dep", srcInst, destInst)
+                dependencyInstanceControlVariable = self.vars[self.depVars[(srcInst, destInst)]]
 
                 srcInstControlVariables.append(dependencyInstanceControlVariable)
 
@@ -290,11 +431,13 @@ class PuLPWriter:
                 # [ Source Task ]-.
                 #                  \
                 #                   `->[ Dest Task ]
-                self.prob += srcTaskInstEndTimeVar - destTaskInstStartTimeVar <= self.lpLargeConstant - self.lpLargeConstant * dependencyInstanceControlVariable 
+                largeConstant = self.bigM(self.maxEndToStart(srcInst, destInst))
+                self.prob += srcTaskInstEndTimeVar - destTaskInstStartTimeVar <= largeConstant - largeConstant * dependencyInstanceControlVariable
                 
                 # Calculate the delay of the dependency instance.
                 # Equation 5
-                dependencyInstanceDelayVar = self.getIntVar(self.taskInstDelay(srcInst, destInst))
+                self.delayVars[(srcInst, destInst)] = self.vars.addInt("delay", srcInst, destInst)
+                dependencyInstanceDelayVar = self.vars[self.delayVars[(srcInst, destInst)]]
                 # Equation 5a
                 self.prob += dependencyInstanceDelayVar >= 0
                 # Equations 5b and 5c
@@ -304,43 +447,127 @@ class PuLPWriter:
                 # if not selected then:
                 #   it is always larger than a very large negative number i.e., any value >= 0
                 #   it is always smaller than a very large number i.e., any value < lpLargeConstant but 0 will be choosen as the objective is to mininise
-                self.prob += dependencyInstanceDelayVar >= destTaskInstEndTimeVar - srcTaskInstStartTimeVar - self.lpLargeConstant + self.lpLargeConstant * dependencyInstanceControlVariable  
+                largeConstant = self.bigM(self.maxEndToStart(destInst, srcInst))
+                self.prob += dependencyInstanceDelayVar >= destTaskInstEndTimeVar - srcTaskInstStartTimeVar - largeConstant + largeConstant * dependencyInstanceControlVariable
                 # Equation 5c
-                self.prob += dependencyInstanceDelayVar <= destTaskInstEndTimeVar - srcTaskInstStartTimeVar + self.lpLargeConstant - self.lpLargeConstant * dependencyInstanceControlVariable 
+                largeConstant = self.bigM(self.maxEndToStart(srcInst, destInst))
+                self.prob += dependencyInstanceDelayVar <= destTaskInstEndTimeVar - srcTaskInstStartTimeVar + largeConstant - largeConstant * dependencyInstanceControlVariable
                
                 # Create list of all dependency delay variables
-                self.dependencyInstanceDelayVariables[taskDependencyPair].append(dependencyInstanceDelayVar.name)     
+                self.dependencyInstanceDelayVariables[taskDependencyPair].append(self.delayVars[(srcInst, destInst)])
     
             # Create the constraint where all possible dependency instances sum to 1, i.e., only one instance is selected
             # Equation 4b: Σ︁ 𝑏𝑑𝑒𝑝 = 1
             self.prob += pl.lpSum(srcInstControlVariables) == 1
 
 
+    # The delay upper bounds are encoded as variable bounds so that they can be
+    # replaced between tightening iterations without rebuilding the LP model.
     def writeDelayConstraints(self, delayVariable, delayValue, isTighten):
+        delayVar = self.vars[delayVariable]
         if (isTighten):
-            self.prob += self.getIntVar(delayVariable) <= delayValue - 1
+            delayVar.upBound = delayValue - 1
         else:
-            self.prob += self.getIntVar(delayVariable) <= delayValue 
-            
-    def solve(self, solverName):
-        solverDict = {'keepFiles': 0,
-                     'mip': True,
-                     'msg': True,
-                     'options': [],
-                     'solver': solverName,
-                     'timeLimit': None,
-                     'warmStart': False}
-        
-        #set custom parameters for Gurobi solver
-        if solverName == "GUROBI_CMD":
-            solverDict['options'] = [("IntegralityFocus","1")] #make solution harder but tries to ensure integer results, some pc was not producing exact results for decision variables
-        solver = pl.getSolverFromDict(solverDict)
-        self.prob.writeLP(self.filename)
-        #self.prob.writeMPS(self.filename+".mps")
-        self.prob.solve(solver)
-        
-        #print(self.prob.variables)
-        for v in self.prob.variables():
-            print(str(v.name) + " : " + str(v.varValue))
+            delayVar.upBound = delayValue
+        self.boundedDelayVariables.append(delayVar)
+
+    def clearDelayConstraints(self):
+        for delayVar in self.boundedDelayVariables:
+            delayVar.upBound = None
+        self.boundedDelayVariables = []
+
+    # Use a previous solution (values indexed by variable id) as the starting point of the next solve
+    def setInitialValues(self, results):
+        self.vars.setInitialValues(results)
+
+    # Fixes the offset, LET intervals and cores of tasks to their initial values (e.g., the tasks of a
+    # what-if request away from its changes), so that only the other tasks are scheduled by the solve
+    def fixTasks(self, taskNames):
+        for taskName in taskNames:
+            taskId = self.taskNames.index(taskName)
+            variables = [self.offsetVars[taskId], self.taskStartVars[taskId], self.taskEndVars[taskId]] + (self.taskCoreVars[taskId] or [])
+            for instance in self.allTaskInstances[taskName]:
+                variables += [self.periodStartVars[instance], self.periodEndVars[instance], self.startVars[instance], self.endVars[instance]] + self.coreVars[instance]
+            for variable in filter(lambda variable: variable is not None, variables):
+                self.vars[variable].lowBound = self.vars[variable].varValue
+                self.vars[variable].upBound = self.vars[variable].varValue
+
+    # Solution of the last solve
+    def results(self):
+        return LpResults(self)
+
+    # Use a schedule of the HeuristicScheduler (scheduleLetTasks) as the starting point of a solve.
+    # Returns False when the schedule does not satisfy all dependencies, and is therefore not used.
+    def setInitialSchedule(self, taskSchedule, cores, Config):
+        values = [None] * len(self.vars)
+        instanceCores = [None] * len(self.instanceTasks)
+        taskCores = {taskName: next(core for core in range(len(cores)) if cores[core]["name"] == taskSchedule[taskName]["core"]) for taskName in self.taskNames}
+        if self.coreSymmetry:
+            taskCores = CoreSymmetry.canonicalAllocation(self.taskNames, taskCores, cores)
+        for taskId, taskName in enumerate(self.taskNames):
+            task = taskSchedule[taskName]
+            taskCore = taskCores[taskName]
+            if Config.useOffSet:
+                values[self.offsetVars[taskId]] = task["offset"]
+            if not Config.individualLetInstanceParams:
+                values[self.taskStartVars[taskId]] = task["letStartTime"]
+                values[self.taskEndVars[taskId]] = task["letStartTime"] + task["executionTime"]
+            if Config.restrictTaskInstancesToSameCore:
+                for core in range(len(cores)):
+                    values[self.taskCoreVars[taskId][core]] = int(core == taskCore)
+
+            for index, instance in enumerate(self.allTaskInstances[taskName]):
+                periodStartTime = index * self.taskPeriods[taskId] + task["offset"]
+                values[self.periodStartVars[instance]] = periodStartTime
+                values[self.periodEndVars[instance]] = periodStartTime + self.taskPeriods[taskId]
+                values[self.startVars[instance]] = periodStartTime + task["letStartTime"]
+                values[self.endVars[instance]] = periodStartTime + task["letStartTime"] + task["executionTime"]
+                for core in range(len(cores)):
+                    values[self.coreVars[instance][core]] = int(core == taskCore)
+                instanceCores[instance] = taskCore
+
+        # Equation 3: Task instances on the same core execute one after the other
+        for pair, (currentTaskInst, otherTaskInst) in enumerate(self.overlapPairs):
+            for srcCore in range(len(cores)):
+                for destCore in range(len(cores)):
+                    isAllocated = srcCore == instanceCores[currentTaskInst] and destCore == instanceCores[otherTaskInst]
+                    values[self.pairVars[pair][srcCore][destCore]] = int(isAllocated)
+            executesBefore = values[self.endVars[currentTaskInst]] <= values[self.startVars[otherTaskInst]]
+            values[self.controlVars[pair]] = 0 if executesBefore else 1
+
+        # Equations 4 and 5: Each destination task instance reads from the latest source task instance
+        # that completes before it starts, which gives the smallest dependency delay
+        for srcTaskInstances, destTaskInstances in self.dependencyInstances.values():
+            for destInst in destTaskInstances:
+                destStartTime = values[self.startVars[destInst]]
+                completedSrcInstances = [srcInst for srcInst in srcTaskInstances if values[self.endVars[srcInst]] <= destStartTime]
+                if len(completedSrcInstances) == 0:
+                    return False
+                selectedSrcInst = max(completedSrcInstances, key=lambda srcInst: values[self.startVars[srcInst]])
+                for srcInst in srcTaskInstances:
+                    isSelected = srcInst == selectedSrcInst
+                    values[self.depVars[(srcInst, destInst)]] = int(isSelected)
+                    delay = values[self.endVars[destInst]] - values[self.startVars[srcInst]]
+                    values[self.delayVars[(srcInst, destInst)]] = delay if isSelected else 0
+
+        # Equation 6
+        if (self.objectiveType == self.OVERALL_END_TO_END):
+            values[self.objectiveVariable] = sum(values[x] for v in self.dependencyInstanceDelayVariables.values() for x in v)
+        elif (self.objectiveType == self.MIN_SUM_END_TIME):
+            values[self.objectiveVariable] = sum(values[self.periodEndVars[x]] for v in self.allTaskInstances.values() for x in v)
+
+        self.setInitialValues(values)
+        return True
 
+    def solve(self, solverName, warmStart=False, solverOptions=None, metrics=None, incumbent=None):
+        if solverOptions is None:
+            solverOptions = SolverOptions()
 
+        #set custom parameters for Gurobi solver
+        options = []
+        if solverName == "GUROBI_CMD":
+            options = [("IntegralityFocus","1")] #make solution harder but tries to ensure integer results, some pc was not producing exact results for decision variables
+        # The variables only get their descriptive names when the model is exported or dumped for debugging
+        if solverOptions.exportDir is not None or solverOptions.dumpDir is not None:
+            self.vars.nameVariables()
+        self.solverResult = solverOptions.solve(self.prob, solverName, warmStart, options, metrics, incumbent)
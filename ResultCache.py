@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    Cache of scheduling results, keyed by a canonical hash of the parts of a LetSynchronise
+    system model that affect the schedule, the optimisation goal, the solver, and the
+    configuration flags of the LP formulations.
+
+    Entries are evicted when they are older than the time-to-live, or when the cache holds
+    more than the maximum number of entries (least recently used first). Entries can also
+    be backed by JSON files in a directory, so that they survive server restarts.
+    """
+
+    SYSTEM_KEYS = ["EntityStore", "DependencyStore", "CoreStore", "DeviceStore", "NetworkDelayStore"]
+    CONFIG_KEYS = [
+        "solverProg",
+        "objectiveVariable",
+        "objectiveType",
+        "individualLetInstanceParams",
+        "useOffSet",
+        "useHeterogeneousCores",
+        "restrictTaskInstancesToSameCore",
+        "tightBigM",
+        "symmetryBreaking",
+        "schedulabilityCheck",
+        "minCoreUsageStrategy",
+        "timeScaling",
+        "timeResolution",
+        "mipGap",
+        "solverPortfolio",
+        "portfolioSize",
+        "modelBackend",
+    ]
+
+    def __init__(self, maxSize=64, timeToLive=3600, directory=None):
+        self.maxSize = maxSize
+        self.timeToLive = timeToLive
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(system, goal, Config):
+        canonicalModel = {
+            "system": {store: system.get(store) for store in ResultCache.SYSTEM_KEYS},
+            "makespan": system.get("PluginParameters", {}).get("Makespan"),
+            "mipGap": system.get("PluginParameters", {}).get("MipGap"),
+            "goal": goal,
+            "config": {flag: getattr(Config, flag, None) for flag in ResultCache.CONFIG_KEYS},
+        }
+        canonicalJson = json.dumps(canonicalModel, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonicalJson.encode("utf-8")).hexdigest()
+
+    # Returns the cached (status, schedule) of a key, or None
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.readEntry(key)
+                if entry is not None:
+                    self.entries[key] = entry
+
+            if entry is None:
+                return None
+            if self.isExpired(entry):
+                self.removeEntry(key)
+                return None
+
+            self.entries.move_to_end(key)
+            return entry["status"], entry["schedule"]
+
+    def put(self, key, status, schedule):
+        entry = {"time": time.time(), "status": status, "schedule": schedule}
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self.writeEntry(key, entry)
+
+            while len(self.entries) > self.maxSize:
+                oldestKey, _ = self.entries.popitem(last=False)
+                self.deleteEntryFile(oldestKey)
+
+    def isExpired(self, entry):
+        return self.timeToLive is not None and time.time() - entry["time"] > self.timeToLive
+
+    def removeEntry(self, key):
+        self.entries.pop(key, None)
+        self.deleteEntryFile(key)
+
+    def entryFile(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def readEntry(self, key):
+        if self.directory is None or not os.path.exists(self.entryFile(key)):
+            return None
+        try:
+            with open(self.entryFile(key)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def writeEntry(self, key, entry):
+        if self.directory is None:
+            return
+        # Write to a temporary file first so that readers never see a partially written entry
+        temporaryFile = f"{self.entryFile(key)}.{threading.get_ident()}.tmp"
+        with open(temporaryFile, "w") as file:
+            json.dump(entry, file)
+        os.replace(temporaryFile, self.entryFile(key))
+
+    def deleteEntryFile(self, key):
+        if self.directory is None:
+            return
+        try:
+            os.remove(self.entryFile(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,167 @@
+import bisect
+import math
+from fractions import Fraction
+import pulp as pl
+
+class SchedulabilityCheck:
+    """
+    Fast analytical pre-check of a LetSynchronise system, before its LP model is built and solved.
+
+    The task instances are jobs that have to execute (non-preemptively) within their execution
+    windows. A system is rejected when a necessary condition for its schedulability is violated:
+    each job must fit into its window on the fastest core,
+    and the execution time demanded by the jobs whose windows lie within an interval cannot
+    exceed the capacity of the cores in that interval (processor demand test). The demand test is
+    applied to the whole scheduling window (total utilisation) and to the intervals of up to two
+    periods that start in the first hyper-period. A system that passes the pre-check may still be unschedulable.
+
+    The largest demand per time unit also gives a lower bound on the number of cores (MinCoreUsage).
+    """
+
+    def __init__(self, speedups, timeScale):
+        self.speedups = sorted(speedups, reverse=True)
+        self.timeScale = timeScale
+        self.jobs = []  # (task name, release time, deadline, execution time at speedup 1, execution time on the fastest core)
+        self.reason = None
+        self.minCores = 0
+        # The demand tests assume that the jobs of a task do not overlap
+        self.demandTest = True
+
+    # Pre-check of the lpScheduler, whose task instances execute within their periods.
+    # With offsets, the periods can be shifted by up to one period less one time unit.
+    @staticmethod
+    def fromLetSystem(system, schedulingWindow, Config, timeScale):
+        cores = system.get("CoreStore") or [{"name": "c1", "speedup": 1}]
+        speedups = [float(core["speedup"]) if Config.useHeterogeneousCores else 1 for core in cores]
+        check = SchedulabilityCheck(speedups, timeScale)
+        for task in system["EntityStore"]:
+            latestOffset = task["period"] - 1 if Config.useOffSet else 0
+            executionTime = math.ceil(task["wcet"] / check.speedups[0])
+            for periodStartTime in range(0, schedulingWindow, task["period"]):
+                check.addJob(task["name"], periodStartTime, periodStartTime + latestOffset + task["period"], task["wcet"], executionTime)
+        return check
+
+    # Pre-check of the MultiCoreScheduler, whose task instances execute within their LET intervals.
+    # The devices of the cores are only used by MinE2E, and a core on an unknown device is an error of the
+    # system model (ValueError) rather than a reason that the system is unschedulable.
+    @staticmethod
+    def fromTaskInstances(tasks_instances, tasks, system, timeScale, path=None):
+        cores = system.get("CoreStore") or []
+        check = SchedulabilityCheck([1] * len(cores), timeScale)
+        if len(cores) == 0:
+            check.fail("The system has no cores")
+        if path == "/min-e2e-mc":
+            devices = {device["name"] for device in system.get("DeviceStore") or []}
+            for core in cores:
+                if core.get("device") not in devices:
+                    raise ValueError(f"Core {core['name']} is on an unknown device {core.get('device')}")
+
+        wcets = {task["name"]: task["wcet"] for task in tasks}
+        # The instances of a task are not constrained to execute one after the other
+        check.demandTest = all(task["duration"] <= task["period"] for task in tasks)
+        for task in tasks_instances:
+            for instance in task["value"]:
+                if instance["instance"] != -1:
+                    check.addJob(task["name"], instance["letStartTime"], instance["letEndTime"], wcets[task["name"]], wcets[task["name"]])
+        return check
+
+    def addJob(self, task, release, deadline, wcet, executionTime):
+        self.jobs.append((task, release, deadline, wcet, executionTime))
+
+    # Only the first reason is reported
+    def fail(self, reason):
+        if self.reason is None:
+            self.reason = reason
+
+    @property
+    def schedulable(self):
+        return self.reason is None
+
+    # Capacity of all cores in an interval
+    def capacity(self, length):
+        return sum(self.speedups) * length
+
+    # Smallest number of (the fastest) cores with at least the given capacity per time unit, or None
+    def coresFor(self, load):
+        capacity = 0
+        for cores, speedup in enumerate(self.speedups, start=1):
+            capacity += Fraction(speedup)
+            if capacity >= load:
+                return cores
+        return None
+
+    def check(self, hyperPeriod, maxPeriod):
+        if not self.schedulable or len(self.jobs) == 0:
+            return self.schedulable
+
+        # Each job has to fit into its window
+        for task, release, deadline, wcet, executionTime in self.jobs:
+            if executionTime > deadline - release:
+                self.fail(
+                    f"Task {task} needs {self.timeScale.unscaleTime(executionTime)} ns on the fastest core, "
+                    f"but can only execute within {self.timeScale.unscaleTime(deadline - release)} ns"
+                )
+                return False
+
+        if not self.demandTest:
+            self.minCores = 1
+            return True
+
+        # Total utilisation over the whole scheduling window
+        start = min(release for _, release, _, _, _ in self.jobs)
+        end = max(deadline for _, _, deadline, _, _ in self.jobs)
+        demand = sum(wcet for _, _, _, wcet, _ in self.jobs)
+        # Largest demand per time unit, as a fraction
+        loadDemand, loadLength = demand, max(end - start, 1)
+        if demand > self.capacity(end - start):
+            self.fail(f"The total utilisation of the tasks ({loadDemand / loadLength:.2f}) exceeds the capacity of the {len(self.speedups)} cores")
+            return False
+
+        # Processor demand of the intervals that start at a release time in the first hyper-period. Longer
+        # intervals approach the total utilisation, so they are limited to two of the longest periods
+        # (and the longest window). Jobs are visited in deadline order.
+        horizon = min(hyperPeriod, 2 * maxPeriod) + max(deadline - release for _, release, deadline, _, _ in self.jobs)
+        jobs = sorted(self.jobs, key=lambda job: job[2])
+        deadlines = [deadline for _, _, deadline, _, _ in jobs]
+        for intervalStart in sorted({release for _, release, _, _, _ in self.jobs if release < start + hyperPeriod}):
+            demand = 0
+            for task, release, deadline, wcet, _ in jobs[bisect.bisect_left(deadlines, intervalStart):bisect.bisect_right(deadlines, intervalStart + horizon)]:
+                if release < intervalStart:
+                    continue
+                demand += wcet
+                length = deadline - intervalStart
+                if demand > self.capacity(length):
+                    self.fail(
+                        f"The task instances within {self.timeScale.unscaleTime(intervalStart)} ns and {self.timeScale.unscaleTime(deadline)} ns "
+                        f"need {self.timeScale.unscaleTime(demand)} ns of execution time, more than the {len(self.speedups)} cores can provide"
+                    )
+                    return False
+                if demand * loadLength > loadDemand * length:
+                    loadDemand, loadLength = demand, length
+
+        self.minCores = self.coresFor(Fraction(loadDemand, loadLength))
+        return True
+
+    # Schedule of a request that is rejected by the pre-check
+    def toSchedule(self, solverOptions, metrics):
+        return {
+            "Unschedulable": self.reason,
+            "Metrics": metrics.toJson(),
+            "SolverResult": {
+                "status": pl.LpSolution[pl.LpSolutionInfeasible],
+                "optimal": False,
+                "objectiveValue": None,
+                "bound": None,
+                "gap": None,
+                "timeLimit": solverOptions.timeLimit,
+                "timeLimitReached": False,
+                "mipGap": solverOptions.mipGap,
+            },
+        }
+
+    # Error message of an unschedulable request, with the reason of the pre-check when it was rejected by it
+    @staticmethod
+    def unschedulableMessage(schedule):
+        if schedule is not None and schedule.get("Unschedulable") is not None:
+            return f"LetSynchronise system is unschedulable: {schedule['Unschedulable']}"
+        return "LetSynchronise system is unschedulable!"
@@ -0,0 +1,114 @@
+import json
+import zlib
+
+class ScheduleWriter:
+    """
+    Writes JSON responses that contain a schedule to a binary stream. The task instances of the
+    EntityInstancesStore are serialised one at a time, so that the response of a long scheduling
+    window is never held in memory as one string, and the output is compressed on the fly with
+    gzip or deflate when the client accepts it.
+
+    In the compact format, each task instance references its core by name instead of embedding
+    the whole core, and the JSON has no whitespace.
+    """
+
+    # Supported content encodings, in order of preference, and their zlib window bits
+    ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+    # Bytes that are buffered before they are compressed and written
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, stream, encoding=None, compact=False):
+        self.stream = stream
+        self.compact = compact
+        self.separators = (",", ":") if compact else (", ", ": ")
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, self.ENCODINGS[encoding]) if encoding is not None else None
+        self.buffer = []
+        self.bufferSize = 0
+
+    # The compact format is requested with the "CompactSchedule" plugin parameter
+    @staticmethod
+    def isCompactRequested(system):
+        return bool((system.get("PluginParameters") or {}).get("CompactSchedule", False))
+
+    # Content encoding of the response for the Accept-Encoding header of a request, or None (identity)
+    @staticmethod
+    def negotiateEncoding(acceptEncoding):
+        accepted = {}
+        for coding in (acceptEncoding or "").split(","):
+            name, _, parameters = coding.strip().partition(";")
+            quality = 1.0
+            for parameter in parameters.split(";"):
+                key, _, value = parameter.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0
+            accepted[name.strip().lower()] = quality
+
+        for encoding in ScheduleWriter.ENCODINGS:
+            if accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return None
+
+    def write(self, value):
+        for chunk in self.encode(value):
+            self.buffer.append(chunk)
+            self.bufferSize += len(chunk)
+            if self.bufferSize >= self.BUFFER_SIZE:
+                self.flush()
+        self.flush()
+        if self.compressor is not None:
+            self.stream.write(self.compressor.flush())
+
+    def flush(self):
+        data = "".join(self.buffer).encode("utf-8")
+        self.buffer = []
+        self.bufferSize = 0
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        if len(data) > 0:
+            self.stream.write(data)
+
+    def dumps(self, value):
+        return json.dumps(value, separators=self.separators)
+
+    # JSON chunks of a value. Schedules (with an EntityInstancesStore) are serialised per task instance,
+    # also within other objects (e.g., jobs)
+    def encode(self, value):
+        if not isinstance(value, dict):
+            yield self.dumps(value)
+            return
+
+        itemSeparator, keySeparator = self.separators
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield (itemSeparator if index > 0 else "") + self.dumps(key) + keySeparator
+            if key == "EntityInstancesStore" and isinstance(item, list):
+                yield from self.encodeEntityInstances(item)
+            else:
+                yield from self.encode(item)
+        yield "}"
+
+    def encodeEntityInstances(self, entityInstances):
+        itemSeparator, keySeparator = self.separators
+        yield "["
+        for index, entity in enumerate(entityInstances):
+            yield itemSeparator if index > 0 else ""
+            if not isinstance(entity, dict) or not isinstance(entity.get("value"), list):
+                yield self.dumps(entity)
+                continue
+
+            # The other attributes of the entity, without the closing brace, followed by its instances
+            attributes = self.dumps({key: item for key, item in entity.items() if key != "value"})[:-1]
+            yield attributes + (itemSeparator if len(attributes) > 1 else "") + self.dumps("value") + keySeparator + "["
+            for instanceIndex, instance in enumerate(entity["value"]):
+                yield (itemSeparator if instanceIndex > 0 else "") + self.dumps(self.encodeInstance(instance))
+            yield "]}"
+        yield "]"
+
+    def encodeInstance(self, instance):
+        if self.compact and isinstance(instance.get("currentCore"), dict):
+            return dict(instance, currentCore=instance["currentCore"].get("name"))
+        return instance
@@ -0,0 +1,73 @@
+import contextlib
+import contextvars
+import json
+import logging
+import sys
+import time
+import uuid
+
+class SchedulerLog:
+    """
+    Logging of the scheduler. Every log record carries the correlation id of the request (or job)
+    that it belongs to, so that the log lines of concurrent requests can be told apart. Records
+    are written to stdout as text lines, or as JSON lines for log processors (structured logging).
+
+    Only a summary of each request is logged at the INFO level. The task instances and solver
+    output are logged at the DEBUG level, and the values of all variables of a solve can be
+    dumped to a separate file (see SolverOptions).
+    """
+
+    LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+    FORMATS = ["text", "json"]
+    TEXT_FORMAT = "%(asctime)s %(levelname)s [%(requestId)s] %(name)s: %(message)s"
+
+    # Correlation id of the request that is handled by the current thread
+    requestId = contextvars.ContextVar("requestId", default=None)
+
+    @staticmethod
+    def configure(level="INFO", logFormat="text"):
+        handler = logging.StreamHandler(sys.stdout)
+        handler.addFilter(RequestIdFilter())
+        if logFormat == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(SchedulerLog.TEXT_FORMAT))
+
+        root = logging.getLogger()
+        root.handlers = [handler]
+        root.setLevel(level)
+
+    # Sets the correlation id of the log records within the context.
+    # A new correlation id is created when none is given.
+    @staticmethod
+    @contextlib.contextmanager
+    def request(requestId=None):
+        token = SchedulerLog.requestId.set(requestId or uuid.uuid4().hex[:12])
+        try:
+            yield SchedulerLog.requestId.get()
+        finally:
+            SchedulerLog.requestId.reset(token)
+
+    @staticmethod
+    def currentRequestId():
+        return SchedulerLog.requestId.get()
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.requestId = SchedulerLog.currentRequestId() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "requestId": getattr(record, "requestId", "-"),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
@@ -0,0 +1,229 @@
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+import pulp as pl
+
+from IncumbentWatcher import IncumbentWatcher
+from SchedulerLog import SchedulerLog
+from Metrics import RequestMetrics
+from SolverPortfolio import SolverPortfolio
+
+logger = logging.getLogger(__name__)
+
+class SolverOptions:
+    """
+    Limits of a solve (time limit, relative MIP gap and number of solver threads). The limits
+    are taken from the PluginParameters of a request ("TimeLimit" in seconds, "MipGap" and
+    "Threads"), falling back to the values in the Config (set with command line flags).
+
+    When a limit stops the solver, the best feasible (incumbent) solution is used. The
+    objective value, best bound and relative gap of the solve are reported in a SolverResult.
+
+    For debugging, the model of each solve can be exported (LP or MPS format) to a directory, and
+    the values of all its variables can be dumped to a directory. Every request writes to its own
+    files, named after its correlation id, so concurrent requests do not overwrite each other.
+    """
+
+    # Solution statuses that have a feasible schedule
+    SCHEDULABLE = [pl.LpSolutionOptimal, pl.LpSolutionIntegerFeasible]
+
+    EXPORT_FORMATS = ["lp", "mps"]
+
+    # Maximum length of the request part of the names of exported models and variable dumps
+    MAX_FILE_NAME = 64
+
+    def __init__(self, timeLimit=None, mipGap=None, threads=None, exportDir=None, exportFormat="lp", dumpDir=None, portfolio=None):
+        self.timeLimit = timeLimit
+        self.mipGap = mipGap
+        self.threads = threads
+        self.deadline = None if timeLimit is None else time.time() + timeLimit
+        self.exportDir = exportDir
+        self.exportFormat = exportFormat
+        self.dumpDir = dumpDir
+        self.portfolio = portfolio
+        self.exportName = SolverOptions.fileName(SchedulerLog.currentRequestId())
+        self.solveCount = 0
+
+    # The correlation id can be set by clients (X-Request-Id header), so only its letters, digits, "_" and "-"
+    # are used in file names, which keeps the files in their directories. Without an id, the name is generated.
+    @staticmethod
+    def fileName(requestId):
+        name = re.sub(r"[^A-Za-z0-9_-]", "_", requestId or "")[:SolverOptions.MAX_FILE_NAME]
+        if name.strip("_") == "":
+            return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        return name
+
+    @staticmethod
+    def fromRequest(system, Config):
+        pluginParameters = system.get("PluginParameters") or {}
+        return SolverOptions(
+            pluginParameters.get("TimeLimit", Config.timeLimit),
+            pluginParameters.get("MipGap", Config.mipGap),
+            pluginParameters.get("Threads", Config.threads),
+            Config.modelExportDir,
+            Config.modelExportFormat,
+            Config.variableDumpDir,
+            SolverPortfolio.fromConfig(Config),
+        )
+
+    @staticmethod
+    def isSchedulable(status):
+        return status in SolverOptions.SCHEDULABLE
+
+    # A solve that is stopped (by the time limit) before it finds a feasible solution does not prove
+    # that the system is unschedulable
+    @staticmethod
+    def isTimedOut(status):
+        return status == pl.LpSolutionNoSolutionFound
+
+    # Error message of a request without a feasible schedule within its time limit
+    @staticmethod
+    def timedOutMessage(schedule):
+        timeLimit = ((schedule or {}).get("SolverResult") or {}).get("timeLimit")
+        return f"No feasible schedule was found within the time limit of {timeLimit} s"
+
+    # Response to a request without a feasible schedule within its time limit, with the SolverResult and Metrics of its solve
+    @staticmethod
+    def timedOutResult(schedule):
+        return {
+            "NoSolution": SolverOptions.timedOutMessage(schedule),
+            "SolverResult": (schedule or {}).get("SolverResult"),
+            "Metrics": (schedule or {}).get("Metrics"),
+        }
+
+    # Seconds left until the time limit of the request, or None when there is no time limit
+    def remainingTime(self):
+        if self.deadline is None:
+            return None
+        return max(0, self.deadline - time.time())
+
+    def isExpired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    # Creates the solver with the remaining time limit, gap and threads of the request.
+    # The solver log is written to logPath so that the bound and gap can be read.
+    def createSolver(self, solverName, warmStart=False, options=None, logPath=None):
+        return pl.getSolverFromDict(self.solverDict(solverName, warmStart, options, logPath))
+
+    # Settings of the solver, as a dictionary for pl.getSolverFromDict
+    def solverDict(self, solverName, warmStart=False, options=None, logPath=None):
+        # The solver output is redirected to the log file when one is given
+        solverDict = {'keepFiles': 0,
+                      'mip': True,
+                      'msg': logPath is None,
+                      'options': options or [],
+                      'solver': solverName,
+                      'timeLimit': None if self.deadline is None else max(1, round(self.remainingTime())),
+                      'warmStart': warmStart}
+        if self.mipGap is not None:
+            solverDict['gapRel'] = self.mipGap
+        if self.threads is not None:
+            solverDict['threads'] = self.threads
+        if logPath is not None:
+            solverDict['logPath'] = logPath
+        return solverDict
+
+    # Writes the model of a solve to the export directory, when model export is enabled.
+    # The files of a request are numbered in the order of its solves.
+    def exportModel(self, prob):
+        if self.exportDir is None:
+            return None
+
+        os.makedirs(self.exportDir, exist_ok=True)
+        exportPath = os.path.join(self.exportDir, f"{self.exportName}-{self.solveCount}.{self.exportFormat}")
+        if self.exportFormat == "mps":
+            prob.writeMPS(exportPath)
+        else:
+            prob.writeLP(exportPath)
+        logger.info(f"Model exported to {exportPath}")
+        return exportPath
+
+    # Writes the values of all variables of a solve to the dump directory, when enabled
+    def dumpVariables(self, prob):
+        if self.dumpDir is None:
+            return None
+
+        os.makedirs(self.dumpDir, exist_ok=True)
+        dumpPath = os.path.join(self.dumpDir, f"{self.exportName}-{self.solveCount}.txt")
+        with open(dumpPath, "w") as dumpFile:
+            for v in prob.variables():
+                dumpFile.write(f"{v.name} = {v.varValue}\n")
+        logger.info(f"Variables dumped to {dumpPath}")
+        return dumpPath
+
+    # Solves the problem within the limits of the request and returns its SolverResult.
+    # The time of the model export and the solve are added to the phases of the request metrics.
+    # The optional incumbent callback is called with the objective value of each new incumbent while
+    # the solver runs (see IncumbentWatcher), except in a portfolio, whose solves run in other processes.
+    def solve(self, prob, solverName, warmStart=False, options=None, metrics=None, incumbent=None):
+        if metrics is None:
+            metrics = RequestMetrics()
+
+        self.solveCount += 1
+        with metrics.phase("export"):
+            self.exportModel(prob)
+
+        logFile, logPath = tempfile.mkstemp(suffix=".log", prefix="solver-")
+        os.close(logFile)
+        try:
+            startTime = time.time()
+            with metrics.phase("solve"):
+                if self.portfolio is not None:
+                    log = self.portfolio.solve(prob, self, solverName, warmStart, options)
+                else:
+                    with IncumbentWatcher(logPath, incumbent):
+                        prob.solve(self.createSolver(solverName, warmStart, options, logPath))
+                    with open(logPath, errors="replace") as logFile:
+                        log = logFile.read()
+            logger.debug(log)
+            solverResult = self.solverResult(prob, log)
+            logger.info(
+                f"Solve {self.solveCount}: {solverResult['status']} in {time.time() - startTime:.3f} s "
+                f"({prob.numVariables()} variables, {prob.numConstraints()} constraints)"
+            )
+        finally:
+            os.remove(logPath)
+
+        with metrics.phase("export"):
+            self.dumpVariables(prob)
+        return solverResult
+
+    # The objective value, best bound and relative gap of a solve. The best bound
+    # and gap of a stopped solve are read from the solver log, when available.
+    def solverResult(self, prob, log=""):
+        objectiveValue = pl.value(prob.objective) if prob.sol_status in self.SCHEDULABLE else None
+        bound = None
+        gap = None
+        if prob.sol_status == pl.LpSolutionOptimal:
+            bound = objectiveValue
+            gap = 0
+        elif objectiveValue is not None:
+            bound = self.logValue(log, r"(?:Lower bound|Best possible|Best bound|Dual bound)\s*:?\s*(-?[0-9.eE+-]+)")
+            if bound is not None:
+                gap = abs(objectiveValue - bound) / max(abs(objectiveValue), 1e-9)
+
+        # Without a time limit, a solve is only stopped early when it has no feasible solution
+        stoppedEarly = prob.sol_status in [pl.LpSolutionIntegerFeasible, pl.LpSolutionNoSolutionFound]
+        return {
+            "status": pl.LpSolution[prob.sol_status],
+            "optimal": prob.sol_status == pl.LpSolutionOptimal,
+            "objectiveValue": objectiveValue,
+            "bound": bound,
+            "gap": gap,
+            "timeLimit": self.timeLimit,
+            "timeLimitReached": self.deadline is not None and (self.isExpired() or stoppedEarly),
+            "mipGap": self.mipGap,
+        }
+
+    @staticmethod
+    def logValue(log, pattern):
+        matches = re.findall(pattern, log)
+        if len(matches) == 0:
+            return None
+        try:
+            return float(matches[-1])
+        except ValueError:
+            return None
@@ -0,0 +1,196 @@
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+
+from SchedulerLog import SchedulerLog
+
+logger = logging.getLogger(__name__)
+
+# Main loop of a solver process: schedules the requests that it receives one at a time, and sends
+# the objective values of their feasible solutions (progress) and their results back
+def solverPoolWorker(scheduleFunction, connection, logLevel, logFormat):
+    # The web server process handles the interrupts and stops its solver processes.
+    # The process and its solvers form a process group, which is killed when the process is replaced.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Stopping the process lets a solver portfolio cancel its own processes first
+    signal.signal(signal.SIGTERM, lambda signalNumber, frame: sys.exit(1))
+    if hasattr(os, "setsid"):
+        os.setsid()
+    SchedulerLog.configure(logLevel, logFormat)
+    while True:
+        try:
+            config, system, path, requestId = connection.recv()
+        except EOFError:
+            break
+
+        with SchedulerLog.request(requestId):
+            try:
+                status, schedule = scheduleFunction(config, system, path, lambda objectiveValue: connection.send(("progress", objectiveValue)))
+                connection.send(("result", status, schedule))
+            except Exception as error:
+                logger.exception("Scheduling request failed in its solver process")
+                connection.send(("error", f"{type(error).__name__}: {error}"))
+
+
+class SolverPoolFullError(Exception):
+    pass
+
+
+class SolverPoolError(Exception):
+    pass
+
+
+class SolveCancelledError(Exception):
+    pass
+
+
+class SolverPool:
+    """
+    Pool of solver processes of the web server. Model construction is pure Python, so the
+    requests are scheduled in separate processes instead of the threads of the web server,
+    where they would compete for the GIL. Each request is sent to an idle process together
+    with a snapshot of the configuration, and waits in a bounded queue while all processes are
+    busy. Requests beyond the queue size are rejected (admission control). A process that stops
+    unexpectedly only fails its own request, and is replaced.
+
+    A request can be cancelled while it waits or is scheduled (e.g., when its client has
+    disconnected), which kills its solver process and frees it for other requests.
+    """
+
+    # Replacement processes are started from the threads of the web server, which must not be
+    # forked, so the processes are started from a fork server (or spawned where there is none)
+    START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+    # Seconds that a stopped solver process is given to cancel its solvers
+    GRACE_TIME = 2
+
+    # Seconds between the checks for the cancellation of a request
+    CANCEL_INTERVAL = 0.5
+
+    def __init__(self, scheduleFunction, workers=2, maxPending=32, logLevel="INFO", logFormat="text"):
+        self.scheduleFunction = scheduleFunction
+        self.workers = workers
+        self.maxPending = maxPending
+        self.logLevel = logLevel
+        self.logFormat = logFormat
+        self.context = multiprocessing.get_context(self.START_METHOD)
+        self.pending = 0
+        self.available = threading.Condition()
+        # The processes are not daemons, because a solver portfolio starts processes of its own
+        self.processes = set()
+        self.idle = [self.startWorker() for _ in range(workers)]
+
+    # Process and connection of a new solver process
+    def startWorker(self):
+        connection, workerConnection = self.context.Pipe()
+        process = self.context.Process(
+            target=solverPoolWorker,
+            args=(self.scheduleFunction, workerConnection, self.logLevel, self.logFormat),
+            name="solver",
+        )
+        process.start()
+        workerConnection.close()
+        self.processes.add(process)
+        return process, connection
+
+    # Schedules a system in a solver process with the given configuration (a dictionary).
+    # Blocks until the request has been scheduled, and calls progress in the calling thread.
+    # The request is cancelled as soon as cancelled returns a reason (instead of None).
+    def solve(self, config, system, path, progress=None, cancelled=None):
+        with self.available:
+            if self.pending >= self.maxPending:
+                raise SolverPoolFullError(f"Too many scheduling requests ({self.maxPending}) are pending")
+            self.pending += 1
+            try:
+                while len(self.idle) == 0:
+                    SolverPool.checkCancelled(cancelled)
+                    self.available.wait(self.CANCEL_INTERVAL)
+            except SolveCancelledError:
+                self.pending -= 1
+                raise
+            worker = self.idle.pop()
+
+        try:
+            if not worker[0].is_alive():
+                worker = self.replaceWorker(worker)
+            message = self.run(worker, (config, system, path, SchedulerLog.currentRequestId()), progress, cancelled)
+        except BaseException:
+            # The process may have stopped, or may still be scheduling the request
+            worker = self.replaceWorker(worker)
+            raise
+        finally:
+            with self.available:
+                self.pending -= 1
+                self.idle.append(worker)
+                self.available.notify()
+
+        if message[0] == "error":
+            raise SolverPoolError(message[1])
+        return message[1], message[2]
+
+    # Sends a request to a solver process, and returns its result or error message
+    def run(self, worker, request, progress, cancelled):
+        process, connection = worker
+        try:
+            connection.send(request)
+            while True:
+                if not connection.poll(self.CANCEL_INTERVAL):
+                    SolverPool.checkCancelled(cancelled)
+                    continue
+                message = connection.recv()
+                if message[0] != "progress":
+                    return message
+                if progress is not None:
+                    progress(message[1])
+        except (EOFError, OSError):
+            process.join(timeout=1)
+            raise SolverPoolError(f"The solver process stopped unexpectedly (exit code {process.exitcode})")
+
+    @staticmethod
+    def checkCancelled(cancelled):
+        reason = cancelled() if cancelled is not None else None
+        if reason is not None:
+            raise SolveCancelledError(reason)
+
+    # Kills a solver process and its solvers, and starts a new process
+    def replaceWorker(self, worker):
+        process, connection = worker
+        connection.close()
+        SolverPool.kill(process)
+        self.processes.discard(process)
+        logger.info(f"Replaced solver process {process.pid}")
+        return self.startWorker()
+
+    # Number of solver processes, and of the requests that are running or queued
+    def toJson(self):
+        with self.available:
+            return {
+                "workers": self.workers,
+                "running": self.workers - len(self.idle),
+                "queued": self.pending - (self.workers - len(self.idle)),
+            }
+
+    # Stops the idle processes, and kills the processes of the requests that are still running
+    def shutdown(self):
+        with self.available:
+            for process, connection in self.idle:
+                connection.close()
+            for process in list(self.processes):
+                process.join(timeout=1)
+                SolverPool.kill(process)
+
+    # Stops a solver process and its solvers, and kills them when they do not stop within the grace time
+    @staticmethod
+    def kill(process):
+        for signalNumber, stop in [(signal.SIGTERM, process.terminate), (getattr(signal, "SIGKILL", None), process.kill)]:
+            if not process.is_alive():
+                break
+            try:
+                os.killpg(process.pid, signalNumber)
+            except (AttributeError, OSError):
+                stop()
+            process.join(SolverPool.GRACE_TIME)
+        process.join()
@@ -0,0 +1,180 @@
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
+import tempfile
+import time
+import pulp as pl
+
+logger = logging.getLogger(__name__)
+
+# Solves a copy of the model in a portfolio process, and sends its status, variable values and solver log back
+def solvePortfolioMember(problem, solverDict, connection):
+    # The process and its solver processes form a process group, which is killed when the member is cancelled
+    if hasattr(os, "setsid"):
+        os.setsid()
+    try:
+        _, prob = pl.LpProblem.fromDict(problem)
+        logFile, logPath = tempfile.mkstemp(suffix=".log", prefix="solver-")
+        os.close(logFile)
+        try:
+            prob.solve(pl.getSolverFromDict(dict(solverDict, msg=False, logPath=logPath)))
+            with open(logPath, errors="replace") as logFile:
+                log = logFile.read()
+        finally:
+            os.remove(logPath)
+        connection.send({
+            "status": prob.status,
+            "sol_status": prob.sol_status,
+            "objectiveValue": pl.value(prob.objective) if prob.sol_status in SolverPortfolio.FEASIBLE else None,
+            "values": {variable.name: variable.varValue for variable in prob.variables()},
+            "log": log,
+        })
+    except Exception as error:
+        connection.send({"error": repr(error)})
+    finally:
+        connection.close()
+
+
+class SolverPortfolio:
+    """
+    Races the same model on several solvers, each in its own process: either on all the locally
+    available PuLP solvers ("solvers"), or on the configured solver with different random seeds
+    ("seeds"). The first proven result (optimal or infeasible) is used and the other solves are
+    cancelled. Otherwise, the best incumbent at the time limit of the request is used.
+
+    The model is sent to the processes as a PuLP dictionary, and the variable values of the used
+    result are copied back into the original model, so the portfolio is transparent to the LP
+    schedulers.
+    """
+
+    MODES = ["solvers", "seeds"]
+
+    # Solver options that set the random seed of a solve
+    SEED_OPTIONS = {
+        "PULP_CBC_CMD": "randomCbcSeed {seed}",
+        "COIN_CMD": "randomCbcSeed {seed}",
+    }
+
+    # Solution statuses that end the race
+    PROVEN = [pl.LpSolutionOptimal, pl.LpSolutionInfeasible, pl.LpSolutionUnbounded]
+    FEASIBLE = [pl.LpSolutionOptimal, pl.LpSolutionIntegerFeasible]
+
+    # Seconds that the solvers are given to return their incumbents after the time limit
+    GRACE_TIME = 5
+
+    # A spawned process imports the main module of the server again, which takes seconds,
+    # so the processes are forked where this is safe
+    START_METHOD = "fork" if sys.platform.startswith("linux") else "spawn"
+
+    def __init__(self, mode="solvers", size=4):
+        self.mode = mode
+        self.size = size
+
+    @staticmethod
+    def fromConfig(Config):
+        if Config.solverPortfolio is None:
+            return None
+        return SolverPortfolio(Config.solverPortfolio, Config.portfolioSize)
+
+    # Solver name and options of each member of the portfolio, at most one per CPU.
+    # The options of a solve are specific to its solver, so the other solvers do not get them.
+    def members(self, solverName, options=None):
+        options = options or []
+        size = max(1, min(self.size, os.cpu_count() or 1))
+        if self.mode == "solvers":
+            solvers = [solverName] + [solver for solver in pl.listSolvers(onlyAvailable=True) if solver != solverName]
+            return [(solver, options if solver == solverName else []) for solver in solvers[:size]]
+
+        seedOption = self.SEED_OPTIONS.get(solverName)
+        if seedOption is None:
+            logger.warning(f"Random seeds are not supported for {solverName}, so the portfolio only has one member")
+            return [(solverName, options)]
+        return [(solverName, options + [seedOption.format(seed=seed)]) for seed in range(size)]
+
+    # Solves the problem with all members, and sets the status and variable values of the used result.
+    # Returns the solver log of the used result.
+    def solve(self, prob, solverOptions, solverName, warmStart=False, options=None):
+        members = self.members(solverName, options)
+        problem = prob.toDict()
+        context = multiprocessing.get_context(self.START_METHOD)
+
+        processes = {}
+        for member, (solver, memberOptions) in enumerate(members):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=solvePortfolioMember,
+                args=(problem, solverOptions.solverDict(solver, warmStart, memberOptions), sender),
+                daemon=True,
+            )
+            process.start()
+            sender.close()
+            processes[receiver] = (member, process)
+
+        try:
+            results = self.race(processes, solverOptions)
+        finally:
+            for _, process in processes.values():
+                SolverPortfolio.cancel(process)
+
+        member, result = self.best(results, members)
+        solver, memberOptions = members[member]
+        logger.info(f"Portfolio: {pl.LpSolution[result['sol_status']]} by {solver} {' '.join(memberOptions)} ({len(results)} of {len(members)} solves finished)")
+        prob.assignStatus(result["status"], result["sol_status"])
+        prob.assignVarsVals(result["values"])
+        return result["log"]
+
+    # Results of the members (by member index) that finish before the first proven result or the time limit
+    def race(self, processes, solverOptions):
+        results = {}
+        deadline = None if solverOptions.deadline is None else solverOptions.deadline + self.GRACE_TIME
+        pending = list(processes)
+        while len(pending) > 0:
+            timeout = None if deadline is None else max(0, deadline - time.time())
+            ready = multiprocessing.connection.wait(pending, timeout)
+            if len(ready) == 0:
+                if len(results) > 0:
+                    break
+                # The solvers stop at the time limit by themselves, but may overrun it on a busy host
+                deadline = None
+                continue
+
+            for receiver in ready:
+                pending.remove(receiver)
+                member, _ = processes[receiver]
+                try:
+                    results[member] = receiver.recv()
+                except EOFError:
+                    results[member] = {"error": "The solver process stopped without a result"}
+                receiver.close()
+                if results[member].get("sol_status") in self.PROVEN:
+                    return results
+        return results
+
+    # The first proven result, or else the feasible result with the smallest objective value, or else any result
+    def best(self, results, members):
+        solved = {member: result for member, result in results.items() if "error" not in result}
+        if len(solved) == 0:
+            errors = "; ".join(f"{members[member][0]}: {result['error']}" for member, result in results.items())
+            raise pl.PulpSolverError(f"No solver of the portfolio returned a result ({errors or 'time limit reached'})")
+
+        for member, result in solved.items():
+            if result["sol_status"] in self.PROVEN:
+                return member, result
+        feasible = [(result["objectiveValue"], member) for member, result in solved.items() if result["sol_status"] in self.FEASIBLE]
+        if len(feasible) > 0:
+            _, member = min(feasible)
+            return member, solved[member]
+        return next(iter(solved.items()))
+
+    # Kills a member process and its solver processes
+    @staticmethod
+    def cancel(process):
+        if process.is_alive():
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (AttributeError, OSError):
+                process.kill()
+        process.join()
@@ -0,0 +1,322 @@
+import logging
+import math
+import os
+import time
+from collections import Counter
+
+import pulp as pl
+
+# NumPy and SciPy are only needed by the sparse model backend
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+class SparseModel:
+    """
+    Mixed integer linear program whose constraint matrix is assembled from blocks of NumPy arrays
+    (COO format) instead of PuLP expression objects. Each block adds many constraints at once:
+    row i of a block is lower[i] <= sum_k values[k, i] * x[columns[k, i]] <= upper[i].
+
+    The model is solved in memory with the HiGHS solver of SciPy (scipy.optimize.milp), and can be
+    written to an MPS file. The variables are named like PuLP variables, so that a SparseModel can
+    be cross-checked against the PuLP model of the same formulation (see fromPuLP and compare).
+    """
+
+    def __init__(self, name):
+        if np is None:
+            raise ImportError("The sparse model backend requires NumPy and SciPy (pip install numpy scipy)")
+
+        self.name = name
+        self.columnNames = []
+        self.columnIndices = {}
+        self.lower = []
+        self.upper = []
+        self.integrality = []
+        self.objective = {}
+        self.rows = []
+        self.columns = []
+        self.values = []
+        self.rowLower = []
+        self.rowUpper = []
+        self.rowCount = 0
+        self.solution = None
+        self.sol_status = pl.LpSolutionNoSolutionFound
+
+    # Adds a variable for each name and returns their column indices.
+    # Names are translated like PuLP variable names.
+    def addVariables(self, prefix, keys, lowBound=None, upBound=None, integer=True):
+        names = [f"{prefix}_{key}".translate(pl.LpElement.trans) for key in keys]
+        first = len(self.columnNames)
+        self.columnNames.extend(names)
+        self.columnIndices.update((name, first + index) for index, name in enumerate(names))
+        self.lower.extend([-math.inf if lowBound is None else lowBound] * len(names))
+        self.upper.extend([math.inf if upBound is None else upBound] * len(names))
+        self.integrality.extend([1 if integer else 0] * len(names))
+        return np.arange(first, first + len(names))
+
+    # Adds a block of constraints. columns and values have one row per term and one column per
+    # constraint, and terms with a zero coefficient are left out (as in PuLP).
+    def addConstraints(self, columns, values, lower=-math.inf, upper=math.inf):
+        columns = np.atleast_2d(np.asarray(columns))
+        count = columns.shape[1]
+        if count == 0:
+            return
+        values = np.broadcast_to(np.asarray(values, dtype=float), columns.shape)
+        rows = np.broadcast_to(np.arange(self.rowCount, self.rowCount + count), columns.shape)
+        nonZero = values != 0
+
+        self.rows.append(rows[nonZero])
+        self.columns.append(columns[nonZero])
+        self.values.append(values[nonZero])
+        self.rowLower.append(np.broadcast_to(np.asarray(lower, dtype=float), (count,)))
+        self.rowUpper.append(np.broadcast_to(np.asarray(upper, dtype=float), (count,)))
+        self.rowCount += count
+
+    def setObjective(self, columns, values=1):
+        for column, value in zip(np.ravel(columns), np.broadcast_to(values, np.shape(np.ravel(columns)))):
+            self.objective[int(column)] = self.objective.get(int(column), 0) + float(value)
+
+    def numVariables(self):
+        return len(self.columnNames)
+
+    def numConstraints(self):
+        return self.rowCount
+
+    def matrix(self):
+        rows = np.concatenate(self.rows) if self.rows else np.zeros(0, dtype=int)
+        columns = np.concatenate(self.columns) if self.columns else np.zeros(0, dtype=int)
+        values = np.concatenate(self.values) if self.values else np.zeros(0)
+        return sparse.coo_matrix((values, (rows, columns)), shape=(self.rowCount, self.numVariables())).tocsr()
+
+    def rowBounds(self):
+        if self.rowCount == 0:
+            return np.zeros(0), np.zeros(0)
+        return np.concatenate(self.rowLower), np.concatenate(self.rowUpper)
+
+    def objectiveVector(self):
+        objective = np.zeros(self.numVariables())
+        for column, value in self.objective.items():
+            objective[column] = value
+        return objective
+
+    # Model size, as recorded by RequestMetrics.recordModel
+    def size(self, instances):
+        return {
+            "variables": self.numVariables(),
+            "binaries": sum(1 for index in range(self.numVariables()) if self.integrality[index] and self.lower[index] == 0 and self.upper[index] == 1),
+            "constraints": self.numConstraints(),
+            "nonZeros": int(sum(len(values) for values in self.values)),
+            "instances": instances,
+        }
+
+    # Solves the model within the limits of the request (SolverOptions) and returns its SolverResult
+    def solve(self, solverOptions, metrics):
+        # Exported sparse models are always in MPS format
+        solverOptions.solveCount += 1
+        with metrics.phase("export"):
+            if solverOptions.exportDir is not None:
+                os.makedirs(solverOptions.exportDir, exist_ok=True)
+                self.writeMPS(os.path.join(solverOptions.exportDir, f"{solverOptions.exportName}-{solverOptions.solveCount}.mps"))
+
+        options = {"disp": False}
+        if solverOptions.remainingTime() is not None:
+            options["time_limit"] = max(1, solverOptions.remainingTime())
+        if solverOptions.mipGap is not None:
+            options["mip_rel_gap"] = solverOptions.mipGap
+
+        startTime = time.time()
+        with metrics.phase("solve"):
+            rowLower, rowUpper = self.rowBounds()
+            result = milp(
+                self.objectiveVector(),
+                integrality=np.asarray(self.integrality),
+                bounds=Bounds(np.asarray(self.lower, dtype=float), np.asarray(self.upper, dtype=float)),
+                constraints=LinearConstraint(self.matrix(), rowLower, rowUpper) if self.rowCount > 0 else None,
+                options=options,
+            )
+
+        if result.x is not None:
+            self.solution = np.round(result.x)
+            self.sol_status = pl.LpSolutionOptimal if result.status == 0 else pl.LpSolutionIntegerFeasible
+        elif result.status == 2:
+            self.sol_status = pl.LpSolutionInfeasible
+        elif result.status == 3:
+            self.sol_status = pl.LpSolutionUnbounded
+        else:
+            self.sol_status = pl.LpSolutionNoSolutionFound
+
+        objectiveValue = float(result.fun) if result.x is not None else None
+        bound = getattr(result, "mip_dual_bound", None) if result.x is not None else None
+        solverResult = {
+            "status": pl.LpSolution[self.sol_status],
+            "optimal": self.sol_status == pl.LpSolutionOptimal,
+            "objectiveValue": objectiveValue,
+            "bound": objectiveValue if self.sol_status == pl.LpSolutionOptimal else bound,
+            "gap": 0 if self.sol_status == pl.LpSolutionOptimal else getattr(result, "mip_gap", None),
+            "timeLimit": solverOptions.timeLimit,
+            "timeLimitReached": solverOptions.deadline is not None and self.sol_status in [pl.LpSolutionIntegerFeasible, pl.LpSolutionNoSolutionFound],
+            "mipGap": solverOptions.mipGap,
+        }
+        logger.info(
+            f"Solve {solverOptions.solveCount}: {solverResult['status']} in {time.time() - startTime:.3f} s "
+            f"({self.numVariables()} variables, {self.numConstraints()} constraints, sparse model)"
+        )
+
+        with metrics.phase("export"):
+            self.dumpVariables(solverOptions)
+        return solverResult
+
+    # Writes the values of all variables of a solve to the dump directory of the request, when enabled
+    def dumpVariables(self, solverOptions):
+        if solverOptions.dumpDir is None or self.solution is None:
+            return None
+
+        os.makedirs(solverOptions.dumpDir, exist_ok=True)
+        dumpPath = os.path.join(solverOptions.dumpDir, f"{solverOptions.exportName}-{solverOptions.solveCount}.txt")
+        with open(dumpPath, "w") as dumpFile:
+            for name, value in sorted(zip(self.columnNames, self.solution)):
+                dumpFile.write(f"{name} = {value}\n")
+        logger.info(f"Variables dumped to {dumpPath}")
+        return dumpPath
+
+    # Writes the model in free MPS format
+    def writeMPS(self, path):
+        matrix = self.matrix().tocsc()
+        rowLower, rowUpper = self.rowBounds()
+        rowNames = [f"C{index + 1}" for index in range(self.rowCount)]
+        rowTypes = ["E" if lower == upper else ("L" if lower == -math.inf else "G") for lower, upper in zip(rowLower, rowUpper)]
+        objective = self.objectiveVector()
+
+        lines = [f"NAME {self.name.translate(pl.LpElement.trans)}", "ROWS", " N OBJ"]
+        lines.extend(f" {rowType} {rowName}" for rowType, rowName in zip(rowTypes, rowNames))
+
+        lines.append("COLUMNS")
+        isInteger = False
+        for column, name in enumerate(self.columnNames):
+            if self.integrality[column] and not isInteger:
+                lines.append(" MARKER 'MARKER' 'INTORG'")
+            elif not self.integrality[column] and isInteger:
+                lines.append(" MARKER 'MARKER' 'INTEND'")
+            isInteger = bool(self.integrality[column])
+            if objective[column] != 0:
+                lines.append(f" {name} OBJ {objective[column]:.12g}")
+            for index in range(matrix.indptr[column], matrix.indptr[column + 1]):
+                lines.append(f" {name} {rowNames[matrix.indices[index]]} {matrix.data[index]:.12g}")
+        if isInteger:
+            lines.append(" MARKER 'MARKER' 'INTEND'")
+
+        lines.append("RHS")
+        for rowName, rowType, lower, upper in zip(rowNames, rowTypes, rowLower, rowUpper):
+            rhs = lower if rowType == "G" else upper
+            if rhs != 0:
+                lines.append(f" RHS {rowName} {rhs:.12g}")
+        ranges = [
+            f" RNG {rowName} {upper - lower:.12g}"
+            for rowName, rowType, lower, upper in zip(rowNames, rowTypes, rowLower, rowUpper)
+            if rowType != "E" and lower != -math.inf and upper != math.inf
+        ]
+        if len(ranges) > 0:
+            lines.append("RANGES")
+            lines.extend(ranges)
+
+        lines.append("BOUNDS")
+        for name, lower, upper in zip(self.columnNames, self.lower, self.upper):
+            if lower == -math.inf and upper == math.inf:
+                lines.append(f" FR BND {name}")
+                continue
+            if lower == -math.inf:
+                lines.append(f" MI BND {name}")
+            elif lower != 0:
+                lines.append(f" LO BND {name} {lower:.12g}")
+            if upper != math.inf:
+                lines.append(f" UP BND {name} {upper:.12g}")
+        lines.append("ENDATA")
+
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        logger.info(f"Model exported to {path}")
+
+    # Canonical form of each constraint (terms by variable name, lower and upper bound), so
+    # that the constraints of two models can be compared regardless of their order and sign
+    def canonicalConstraints(self):
+        matrix = self.matrix()
+        rowLower, rowUpper = self.rowBounds()
+        constraints = Counter()
+        for row in range(self.rowCount):
+            terms = [(self.columnNames[matrix.indices[index]], matrix.data[index]) for index in range(matrix.indptr[row], matrix.indptr[row + 1])]
+            constraints[self.canonicalConstraint(terms, rowLower[row], rowUpper[row])] += 1
+        return constraints
+
+    @staticmethod
+    def canonicalConstraint(terms, lower, upper):
+        terms = sorted((name, float(value)) for name, value in terms if value != 0)
+        # A lower bound is the upper bound of the negated constraint
+        if upper == math.inf or (lower == upper and len(terms) > 0 and terms[0][1] < 0):
+            terms = [(name, -value) for name, value in terms]
+            lower, upper = -upper, -lower
+        return tuple(terms), float(lower), float(upper)
+
+    def canonicalVariables(self):
+        return {
+            name: (float(self.lower[index]), float(self.upper[index]), bool(self.integrality[index]))
+            for index, name in enumerate(self.columnNames)
+        }
+
+    def canonicalObjective(self):
+        return {self.columnNames[column]: value for column, value in self.objective.items() if value != 0}
+
+    # Creates a SparseModel from a PuLP problem, for cross-checking
+    @staticmethod
+    def fromPuLP(prob):
+        model = SparseModel(prob.name)
+        variables = prob.variables()
+        for variable in variables:
+            model.columnIndices[variable.name] = len(model.columnNames)
+            model.columnNames.append(variable.name)
+            model.lower.append(-math.inf if variable.lowBound is None else variable.lowBound)
+            model.upper.append(math.inf if variable.upBound is None else variable.upBound)
+            model.integrality.append(1 if variable.cat == pl.LpInteger else 0)
+
+        for constraint in prob.constraints.values():
+            columns = [[model.columnIndices[variable.name]] for variable, _ in constraint.items()]
+            values = [[value] for _, value in constraint.items()]
+            rhs = -constraint.constant
+            if constraint.sense == pl.LpConstraintEQ:
+                model.addConstraints(np.array(columns, dtype=int).reshape(-1, 1), np.array(values).reshape(-1, 1), rhs, rhs)
+            elif constraint.sense == pl.LpConstraintLE:
+                model.addConstraints(np.array(columns, dtype=int).reshape(-1, 1), np.array(values).reshape(-1, 1), -math.inf, rhs)
+            else:
+                model.addConstraints(np.array(columns, dtype=int).reshape(-1, 1), np.array(values).reshape(-1, 1), rhs, math.inf)
+
+        if prob.objective is not None:
+            for variable, value in prob.objective.items():
+                model.setObjective([model.columnIndices[variable.name]], value)
+        return model
+
+    # Differences between the formulations of two models. Variables that do not appear in any
+    # constraint or the objective are left out of the comparison (PuLP leaves them out of its model).
+    def compare(self, other, limit=10):
+        differences = []
+
+        constraints, otherConstraints = self.canonicalConstraints(), other.canonicalConstraints()
+        for constraint in list((constraints - otherConstraints).elements())[:limit]:
+            differences.append(f"Constraint only in {self.name}: {constraint}")
+        for constraint in list((otherConstraints - constraints).elements())[:limit]:
+            differences.append(f"Constraint only in {other.name}: {constraint}")
+
+        if self.canonicalObjective() != other.canonicalObjective():
+            differences.append("The objectives differ")
+
+        usedVariables = {name for constraint in constraints for name, _ in constraint[0]} | set(self.canonicalObjective())
+        variables, otherVariables = self.canonicalVariables(), other.canonicalVariables()
+        for name in sorted(usedVariables):
+            if variables.get(name) != otherVariables.get(name):
+                differences.append(f"Variable {name} differs: {variables.get(name)} and {otherVariables.get(name)}")
+                if len(differences) > 3 * limit:
+                    break
+        return differences
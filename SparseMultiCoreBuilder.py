@@ -0,0 +1,250 @@
+# NumPy is only needed by the sparse model backend (see SparseModel)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from CoreSymmetry import CoreSymmetry
+from MinE2E import MinE2E
+from SparseModel import SparseModel
+
+class SparseMultiCoreBuilder:
+    """
+    Builds the LP model of the MultiCoreScheduler (and its MinCoreUsage and MinE2E objectives)
+    as a SparseModel. Each constraint family is assembled from arrays of the task instance
+    tables at once, instead of from one PuLP expression per constraint.
+
+    The variables and constraints are the same as in the PuLP model, so the two models can be
+    cross-checked with SparseModel.compare.
+    """
+
+    def __init__(self, mcs, Config):
+        self.mcs = mcs
+        self.Config = Config
+        self.model = None
+        self.keys = {}
+        self.columns = {}
+
+    def add_variables(self, prefix, keys, lowBound=0, upBound=None):
+        columns = self.model.addVariables(prefix, keys, lowBound, upBound)
+        self.keys[prefix] = keys
+        self.columns[prefix] = columns
+        return columns
+
+    # Values of the variables of the solution, by key
+    def values(self, prefix):
+        if self.model.solution is None:
+            return {key: None for key in self.keys[prefix]}
+        return dict(zip(self.keys[prefix], self.model.solution[self.columns[prefix]].tolist()))
+
+    def big_n(self, max_values, N):
+        if not self.Config.tightBigM:
+            return np.full(np.shape(max_values), N)
+        return np.maximum(0, max_values)
+
+    def build(self, path, N, system):
+        mcs = self.mcs
+        self.model = model = SparseModel(f"Multicore_Core_Scheduling{path}")
+
+        task_names = [task["name"] for task in mcs.tasks_instances]
+        core_names = [core["name"] for core in mcs.cores]
+        task_indices = {name: index for index, name in enumerate(task_names)}
+        C = len(core_names)
+
+        # Instance table (without the negative instances)
+        instances = [
+            (task_index, instance)
+            for task_index, task in enumerate(mcs.tasks_instances)
+            for instance in task["value"] if instance["instance"] != -1
+        ]
+        instance_task = np.array([task_index for task_index, _ in instances], dtype=int)
+        let_start = np.array([instance["letStartTime"] for _, instance in instances])
+        let_end = np.array([instance["letEndTime"] for _, instance in instances])
+        wcets = np.array([mcs.get_wcet(name) for name in task_names])
+        instance_keys = [f"{task_names[task_index]},{instance['instance']}" for task_index, instance in instances]
+
+        # Unordered task pairs (in the order of their names, as in MultiCoreScheduler.get_psi_tasks_key)
+        pairs = [(index1, index2) for index1 in range(len(task_names)) for index2 in range(len(task_names)) if task_names[index1] < task_names[index2]]
+        pair_task1 = np.array([index1 for index1, _ in pairs], dtype=int)
+        pair_task2 = np.array([index2 for _, index2 in pairs], dtype=int)
+        pair_indices = np.zeros((len(task_names), len(task_names)), dtype=int)
+        pair_indices[pair_task1, pair_task2] = np.arange(len(pairs))
+        pair_indices[pair_task2, pair_task1] = np.arange(len(pairs))
+
+        # # # # # # # # # # # # #
+        # Variables
+
+        assigned = self.add_variables("assigned", [f"{name},{core}" for name in task_names for core in core_names], 0, 1).reshape(-1, C)
+        exec_start = self.add_variables("start", instance_keys)
+        exec_end = self.add_variables("end", instance_keys)
+        psi_tasks = self.add_variables("psi_tasks", [f"{task_names[index1]},{task_names[index2]}" for index1, index2 in pairs], 0, 1)
+        psi_task_core = self.add_variables(
+            "psi_task_core",
+            [f"{task_names[index1]},{core1},{task_names[index2]},{core2}" for index1, index2 in pairs for core1 in core_names for core2 in core_names],
+            0,
+            1,
+        ).reshape(-1, C, C)
+
+        # Ordered pairs of instances of different tasks
+        instance1, instance2 = np.nonzero(instance_task[:, None] != instance_task[None, :])
+        bool_task = self.add_variables("bool_task", [f"{instance_keys[x]},{instance_keys[y]}" for x, y in zip(instance1, instance2)], 0, 1)
+
+        # # # # # # # # # # # # #
+        # Constraints
+
+        # 2a, 2b, 2c. Execution time and LET window of each task instance.
+        model.addConstraints([exec_end, exec_start], [[1], [-1]], wcets[instance_task], wcets[instance_task])
+        model.addConstraints([exec_start], 1, lower=let_start)
+        model.addConstraints([exec_end], 1, upper=let_end)
+
+        # 3. A task instance can only be assigned to one core.
+        model.addConstraints(assigned.T, 1, 1, 1)
+
+        # 4a, 4b, 4c. Pairs of tasks are allocated to the same core when each are allocated to the same core.
+        psi = psi_task_core.ravel()
+        assigned1 = np.broadcast_to(assigned[pair_task1][:, :, None], psi_task_core.shape).ravel()
+        assigned2 = np.broadcast_to(assigned[pair_task2][:, None, :], psi_task_core.shape).ravel()
+        model.addConstraints([psi, assigned1], [[1], [-1]], upper=0)
+        model.addConstraints([psi, assigned2], [[1], [-1]], upper=0)
+        model.addConstraints([psi, assigned1, assigned2], [[1], [-1], [-1]], lower=-1)
+
+        # 4d. Pairs of tasks are not allocated to the same core when each are allocated to different cores.
+        different_cores = ~np.eye(C, dtype=bool)
+        model.addConstraints(
+            np.vstack([psi_tasks, psi_task_core[:, different_cores].T]),
+            np.vstack([[1], np.full((different_cores.sum(), 1), -1)]),
+            0,
+            0,
+        )
+
+        # 5a, 5b. If task x executes after task y on the same core, x's end time must be later than y's start time
+        #         and y's end time must be earlier than x's start time.
+        psi_pair = psi_tasks[pair_indices[instance_task[instance1], instance_task[instance2]]]
+        N_xy = self.big_n(let_end[instance1] - let_start[instance2], N)
+        N_yx = self.big_n(let_end[instance2] - let_start[instance1], N)
+        ones = np.ones(len(bool_task))
+        model.addConstraints(
+            [exec_end[instance1], exec_start[instance2], bool_task, psi_pair],
+            [ones, -ones, -N_xy, -N_xy],
+            upper=0,
+        )
+        model.addConstraints(
+            [exec_end[instance2], exec_start[instance1], bool_task, psi_pair],
+            [ones, -ones, N_yx, -N_yx],
+            upper=N_yx,
+        )
+
+        # Identical cores are used in the order of the first task allocated to them (see CoreSymmetry).
+        if self.Config.symmetryBreaking:
+            T = len(task_names)
+            earlier = np.tril(np.ones((T, T)), -1)
+            for previous_core, core in CoreSymmetry.orderedCorePairs(mcs.cores):
+                model.addConstraints(
+                    np.vstack([assigned[None, :, core], np.broadcast_to(assigned[:, previous_core, None], (T, T))]),
+                    np.vstack([np.ones((1, T)), -earlier.T]),
+                    upper=0,
+                )
+
+        if path == "/min-core-usage":
+            self.build_min_core_usage(assigned, core_names)
+        elif path == "/min-e2e-mc":
+            self.build_min_e2e(N, system, psi_task_core, task_indices, pair_indices, core_names)
+
+        return model
+
+    # Constraints and objective of MinCoreUsage
+    def build_min_core_usage(self, assigned, core_names):
+        used = self.add_variables("used", core_names, 0, 1)
+
+        # 6a. If a task instance uses a core, the core is marked used.
+        used_cores = np.broadcast_to(used[None, :], assigned.shape).ravel()
+        self.model.addConstraints([used_cores, assigned.ravel()], [[1], [-1]], lower=0)
+
+        # Identical cores are used in order (see CoreSymmetry).
+        if self.Config.symmetryBreaking:
+            pairs = np.array(CoreSymmetry.orderedCorePairs(self.mcs.cores), dtype=int).reshape(-1, 2)
+            self.model.addConstraints([used[pairs[:, 1]], used[pairs[:, 0]]], [[1], [-1]], upper=0)
+
+        # Lower bound of the number of used cores (see SchedulabilityCheck).
+        if self.mcs.min_cores > 0:
+            self.model.addConstraints(used[:, None], 1, lower=self.mcs.min_cores)
+
+        # 7. Minimise the sum of the used cores.
+        self.model.setObjective(used)
+
+    # Constraints and objective of MinE2E
+    def build_min_e2e(self, N, system, psi_task_core, task_indices, pair_indices, core_names):
+        objective = MinE2E()
+        objective.load_dependencies(N, system, self.mcs)
+        dependencies = objective.dependencies
+
+        # Dependency instance table: each source instance (including the negative instance) with each destination instance
+        dependency_instances = [
+            (dependency, instance1, instance2)
+            for dependency, (task1, task2) in enumerate(dependencies)
+            for instance1 in objective.get_instances(task1)
+            for instance2 in filter(lambda x: x["instance"] != -1, objective.get_instances(task2))
+        ]
+        dependency = np.array([index for index, _, _ in dependency_instances], dtype=int)
+        let_end1 = np.array([instance1["letEndTime"] for _, instance1, _ in dependency_instances])
+        let_start2 = np.array([instance2["letStartTime"] for _, _, instance2 in dependency_instances])
+
+        # # # # # # # # # # # # #
+        # Variables
+
+        lambdas = self.add_variables("lambda", [f"{task1},{task2}" for task1, task2 in dependencies])
+        dependency_keys = [
+            f"{dependencies[index][0]},{instance1['instance']},{dependencies[index][1]},{instance2['instance']}"
+            for index, instance1, instance2 in dependency_instances
+        ]
+        bool_dep = self.add_variables("bool_dep", dependency_keys, 0, 1)
+        delays = self.add_variables("delay", dependency_keys)
+
+        # # # # # # # # # # # # #
+        # Constraints
+
+        # 8b. Aggregate the protocol + network component of the communication delays.
+        # The psi_task_core variables of each dependency are in the (source core, destination core) order.
+        core_delays = np.array([
+            [[objective.lambdas[f"{task1},{task2}"][(core1, core2)] for core2 in core_names] for core1 in core_names]
+            for task1, task2 in dependencies
+        ]).reshape(len(dependencies), len(core_names) ** 2)
+        dependency_psi = np.array([
+            psi_task_core[pair_indices[task_indices[task1], task_indices[task2]]]
+            if task1 < task2 else psi_task_core[pair_indices[task_indices[task1], task_indices[task2]]].T
+            for task1, task2 in dependencies
+        ], dtype=int).reshape(len(dependencies), len(core_names) ** 2)
+        self.model.addConstraints(
+            np.vstack([lambdas[None, :], dependency_psi.T]),
+            np.vstack([np.ones((1, len(dependencies))), -core_delays.T]),
+            0,
+            0,
+        )
+
+        # 8e. The source's end time must allow for the protocol + network component of the communication delay to be handled.
+        max_lambdas = core_delays.max(axis=1)
+        N_8e = self.big_n(let_end1 + max_lambdas[dependency] - let_start2, N)
+        self.model.addConstraints(
+            [lambdas[dependency], bool_dep],
+            [np.ones(len(bool_dep)), N_8e],
+            upper=N_8e - let_end1 + let_start2,
+        )
+
+        # 8f. The destination's communication dependency can only be satisfied by one source.
+        first = 0
+        for task1, task2 in dependencies:
+            sources = len(objective.get_instances(task1))
+            destinations = len(objective.get_instances(task2)) - 1
+            self.model.addConstraints(bool_dep[first:first + sources * destinations].reshape(sources, destinations), 1, 1, 1)
+            first += sources * destinations
+
+        # 9a, 9b. Calculate the exact communication delay of the selected communication dependency.
+        dep_delay = let_start2 - let_end1
+        N_9a = self.big_n(dep_delay, N)
+        N_9b = self.big_n(-dep_delay, N)
+        ones = np.ones(len(delays))
+        self.model.addConstraints([delays, bool_dep], [ones, -N_9a], lower=dep_delay - N_9a)
+        self.model.addConstraints([delays, bool_dep], [ones, N_9b], upper=dep_delay + N_9b)
+
+        # 10. Minimise the response times.
+        self.model.setObjective(delays)
@@ -0,0 +1,105 @@
+import math
+
+class TimeScale:
+    """
+    Normalises the time quantities of a LetSynchronise system model before the LP model is built.
+
+    All periods, offsets, durations, execution times and communication delays are divided by
+    their greatest common divisor (optionally limited to a divisor of a configured resolution),
+    which keeps the big-M constants of the LP formulations small. The scaled system has the same
+    schedules as the original system, so the time quantities of a schedule that is found for the
+    scaled system are simply multiplied back by the scaling factor.
+    """
+
+    TASK_TIMES = ["initialOffset", "activationOffset", "duration", "period", "wcet"]
+    DELAY_TIMES = ["wcdt"]
+    INSTANCE_TIMES = ["periodStartTime", "periodEndTime", "letStartTime", "letEndTime", "executionTime"]
+    INTERVAL_TIMES = ["startTime", "endTime"]
+
+    def __init__(self, factor=1):
+        self.factor = factor
+
+    @staticmethod
+    def fromSystem(system, Config):
+        if not Config.timeScaling:
+            return TimeScale()
+
+        times = []
+        for task in system["EntityStore"]:
+            times.extend(task[time] for time in TimeScale.TASK_TIMES)
+            # The execution times of the task on each core have to remain exact after scaling
+            if Config.useHeterogeneousCores:
+                times.extend(math.ceil(task["wcet"] / float(core["speedup"])) for core in system.get("CoreStore") or [])
+        for device in system.get("DeviceStore") or []:
+            times.extend(delay[time] for delay in device["delays"].values() for time in TimeScale.DELAY_TIMES)
+        for networkDelay in system.get("NetworkDelayStore") or []:
+            times.extend(networkDelay[time] for time in TimeScale.DELAY_TIMES)
+
+        # Time quantities that are not whole numbers cannot be scaled
+        if not all(float(time).is_integer() for time in times):
+            return TimeScale()
+
+        factor = math.gcd(*[int(time) for time in times])
+        if Config.timeResolution is not None:
+            factor = math.gcd(factor, Config.timeResolution)
+        return TimeScale(max(factor, 1))
+
+    # Returns a copy of the system with all time quantities divided by the scaling factor.
+    # Only the stores that are used to build the LP models are copied.
+    def scaleSystem(self, system):
+        if self.factor == 1:
+            return system
+
+        scaledSystem = dict(system)
+        scaledSystem["EntityStore"] = [self.scaleEntries(task, self.TASK_TIMES) for task in system["EntityStore"]]
+        if system.get("DeviceStore") is not None:
+            scaledSystem["DeviceStore"] = [
+                dict(device, delays={protocol: self.scaleEntries(delay, self.DELAY_TIMES) for protocol, delay in device["delays"].items()})
+                for device in system["DeviceStore"]
+            ]
+        if system.get("NetworkDelayStore") is not None:
+            scaledSystem["NetworkDelayStore"] = [self.scaleEntries(networkDelay, self.DELAY_TIMES) for networkDelay in system["NetworkDelayStore"]]
+        if system.get("PluginParameters") is not None:
+            # Rounding up the makespan does not change the scheduling window, because the
+            # window is rounded up to a multiple of the (scaled) task periods.
+            pluginParameters = dict(system["PluginParameters"])
+            pluginParameters["Makespan"] = math.ceil(pluginParameters["Makespan"] / self.factor)
+            scaledSystem["PluginParameters"] = pluginParameters
+        return scaledSystem
+
+    def scaleEntries(self, entries, times):
+        return dict(entries, **{time: int(entries[time]) // self.factor for time in times})
+
+    # Multiplies the time quantities of a schedule of the scaled system back by the scaling factor.
+    def unscaleSchedule(self, schedule):
+        if self.factor == 1 or schedule is None:
+            return schedule
+
+        for task in schedule["EntityInstancesStore"]:
+            task["initialOffset"] = self.unscaleTime(task["initialOffset"])
+            for instance in task["value"]:
+                for time in self.INSTANCE_TIMES:
+                    if time in instance:
+                        instance[time] = self.unscaleTime(instance[time])
+                for interval in instance.get("executionIntervals", []):
+                    for time in self.INTERVAL_TIMES:
+                        interval[time] = self.unscaleTime(interval[time])
+        return schedule
+
+    # Multiplies the objective value and bound of a solve back by the scaling factor
+    def unscaleSolverResult(self, solverResult):
+        solverResult["objectiveValue"] = self.unscaleTime(solverResult["objectiveValue"])
+        solverResult["bound"] = self.unscaleTime(solverResult["bound"])
+        return solverResult
+
+    # Divides a time quantity of the original system by the scaling factor, or returns None
+    # when it is not a multiple of the factor (e.g., a time of a schedule of another system)
+    def scaleTime(self, time):
+        if time is None or time % self.factor != 0:
+            return None
+        return int(time) // self.factor
+
+    def unscaleTime(self, time):
+        if time is None:
+            return None
+        return time * self.factor
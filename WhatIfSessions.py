@@ -0,0 +1,184 @@
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from SolverOptions import SolverOptions
+
+logger = logging.getLogger(__name__)
+
+class WhatIf:
+    """
+    The previous schedule of a what-if session, and the tasks of the system model that have changed
+    since (see WhatIfSessions). The schedulers start the solve from the previous schedule, repaired
+    for the changed tasks, instead of from scratch. In the local scope, the decisions of the tasks
+    that the change does not affect are also kept, so that only a small neighbourhood of the changed
+    tasks is re-optimised.
+    """
+
+    SCOPES = ["local", "global"]
+
+    def __init__(self, sessionId, schedule, changedTasks, changedStores, scope="local"):
+        self.sessionId = sessionId
+        self.schedule = schedule
+        self.changedTasks = set(changedTasks)
+        self.changedStores = changedStores
+        # Changes of the cores, devices, network delays or makespan affect all tasks
+        self.scope = "global" if len(changedStores) > 0 else scope
+        self.warmStart = False
+        self.fixedTasks = []
+
+        # Core of each task in the previous schedule (its first task instance)
+        self.previousCores = {}
+        for entity in schedule.get("EntityInstancesStore", []):
+            for instance in entity.get("value", [])[:1]:
+                self.previousCores[entity["name"]] = instance["executionIntervals"][0]["core"]
+
+    # Offset, and core and times of each task instance, of the unchanged tasks of the previous schedule,
+    # in the time unit of a TimeScale. Tasks with times that are not multiples of the unit are left out.
+    # Returns {task name: {"offset", "instances": {instance: {"core", "periodStartTime", "letStartTime", "letEndTime", "startTime"}}}}
+    def previousTasks(self, timeScale):
+        tasks = {}
+        for entity in self.schedule.get("EntityInstancesStore", []):
+            if entity["name"] in self.changedTasks:
+                continue
+
+            offset = timeScale.scaleTime(entity.get("initialOffset", 0))
+            instances = {}
+            for instance in entity["value"]:
+                interval = instance["executionIntervals"][0]
+                times = {
+                    "periodStartTime": timeScale.scaleTime(instance["periodStartTime"]),
+                    "letStartTime": timeScale.scaleTime(instance["letStartTime"]),
+                    "letEndTime": timeScale.scaleTime(instance["letEndTime"]),
+                    "startTime": timeScale.scaleTime(interval["startTime"]),
+                }
+                if None in times.values():
+                    break
+                instances[instance["instance"]] = dict(times, core=interval["core"])
+            else:
+                if offset is not None:
+                    tasks[entity["name"]] = {"offset": offset, "instances": instances}
+        return tasks
+
+    # Tasks whose decisions are kept in the local scope: the tasks that kept their previous schedule,
+    # except those that share a core (before or after the change) or a dependency with a task that
+    # has changed, been removed, or been moved by the repair.
+    # kept: names of the tasks that kept their previous schedule, cores: {task name: core name} after the repair,
+    # dependencies: list of (source task name, destination task name)
+    def localTasks(self, kept, cores, dependencies):
+        if self.scope != "local":
+            return []
+
+        moved = self.changedTasks | {task for task in cores if task not in kept}
+        affectedCores = {self.previousCores.get(task) for task in moved} | {cores.get(task) for task in moved}
+        neighbours = {source for source, destination in dependencies if destination in moved}
+        neighbours |= {destination for source, destination in dependencies if source in moved}
+        return sorted(task for task in kept if task not in moved and task not in neighbours and cores[task] not in affectedCores)
+
+    def toJson(self):
+        return {
+            "sessionId": self.sessionId,
+            "scope": self.scope,
+            "changedTasks": sorted(self.changedTasks),
+            "changedStores": self.changedStores,
+            "warmStart": self.warmStart,
+            "fixedTasks": self.fixedTasks,
+        }
+
+
+class WhatIfSessions:
+    """
+    What-if sessions of interactive use, in which a task parameter (e.g., its wcet, period or core)
+    is changed and the system is re-optimised. A session is identified by the "SessionId" plugin
+    parameter of its requests, and keeps the system model and schedule of its last schedulable
+    request for each goal. The system model of a new request of the session is compared to the
+    kept one, and the request is scheduled with a WhatIf of the changes and the kept schedule.
+
+    Sessions are evicted when they have been idle for longer than the time-to-live, or when there
+    are more than the maximum number of sessions (least recently used first).
+    """
+
+    TASK_STORE = "EntityStore"
+    DEPENDENCY_STORE = "DependencyStore"
+    # Stores whose changes affect all tasks
+    SYSTEM_STORES = ["CoreStore", "DeviceStore", "NetworkDelayStore"]
+
+    def __init__(self, maxSize=64, timeToLive=3600):
+        self.maxSize = maxSize
+        self.timeToLive = timeToLive
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def sessionId(system):
+        return (system.get("PluginParameters") or {}).get("SessionId")
+
+    # The parts of a system model that are compared between the requests of a session
+    @staticmethod
+    def model(system):
+        model = {store: copy.deepcopy(system.get(store)) for store in [WhatIfSessions.TASK_STORE, WhatIfSessions.DEPENDENCY_STORE] + WhatIfSessions.SYSTEM_STORES}
+        model["Makespan"] = (system.get("PluginParameters") or {}).get("Makespan")
+        return model
+
+    # Names of the tasks that have been added, removed or changed between two system models (including the
+    # tasks of added and removed dependencies), and the names of the other stores that have changed
+    @staticmethod
+    def diff(previousModel, model):
+        previousTasks = {task["name"]: task for task in previousModel[WhatIfSessions.TASK_STORE] or []}
+        tasks = {task["name"]: task for task in model[WhatIfSessions.TASK_STORE] or []}
+        changedTasks = {name for name in previousTasks.keys() | tasks.keys() if previousTasks.get(name) != tasks.get(name)}
+
+        previousDependencies = {json.dumps(dependency, sort_keys=True): dependency for dependency in previousModel[WhatIfSessions.DEPENDENCY_STORE] or []}
+        dependencies = {json.dumps(dependency, sort_keys=True): dependency for dependency in model[WhatIfSessions.DEPENDENCY_STORE] or []}
+        for key in previousDependencies.keys() ^ dependencies.keys():
+            dependency = previousDependencies.get(key) or dependencies.get(key)
+            changedTasks |= {dependency["source"]["entity"], dependency["destination"]["entity"]} - {"__system"}
+
+        changedStores = [store for store in WhatIfSessions.SYSTEM_STORES + ["Makespan"] if previousModel[store] != model[store]]
+        return changedTasks, changedStores
+
+    # WhatIf of a request of a session, or None when the request has no session or its session has no
+    # schedule for the goal yet. The scope of the WhatIf can be set with the "WhatIfScope" plugin parameter.
+    def whatIf(self, system, path, scope="local"):
+        sessionId = WhatIfSessions.sessionId(system)
+        if sessionId is None:
+            return None
+
+        scope = (system.get("PluginParameters") or {}).get("WhatIfScope", scope)
+        if scope not in WhatIf.SCOPES:
+            raise ValueError(f"Unknown what-if scope {scope} (expected one of {WhatIf.SCOPES})")
+
+        with self.lock:
+            self.removeExpiredSessions()
+            session = self.sessions.get((sessionId, path))
+            if session is None:
+                logger.info(f"What-if session {sessionId} started")
+                return None
+            session["time"] = time.time()
+            self.sessions.move_to_end((sessionId, path))
+
+        changedTasks, changedStores = WhatIfSessions.diff(session["model"], WhatIfSessions.model(system))
+        logger.info(f"What-if session {sessionId}: changed tasks {sorted(changedTasks)}, changed stores {changedStores}")
+        return WhatIf(sessionId, session["schedule"], changedTasks, changedStores, scope)
+
+    # Keeps the system model and schedule of a request of a session, when the system is schedulable
+    def update(self, system, path, status, schedule):
+        sessionId = WhatIfSessions.sessionId(system)
+        if sessionId is None or not SolverOptions.isSchedulable(status) or schedule is None:
+            return
+
+        session = {"time": time.time(), "model": WhatIfSessions.model(system), "schedule": schedule}
+        with self.lock:
+            self.sessions[(sessionId, path)] = session
+            self.sessions.move_to_end((sessionId, path))
+            while len(self.sessions) > self.maxSize:
+                self.sessions.popitem(last=False)
+
+    def removeExpiredSessions(self):
+        if self.timeToLive is None:
+            return
+        for key in [key for key, session in self.sessions.items() if time.time() - session["time"] > self.timeToLive]:
+            del self.sessions[key]
@@ -18,16 +18,35 @@ from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Import the required libraries
 import sys
-import traceback
 import argparse
+import io
 import json
+import logging
 import math
+import os
+import select
+import socket
+import time
 import pulp as pl
 from types import SimpleNamespace
 
 # Import PuLP constraint generator
 from PuLPWriter import PuLPWriter
 from MultiCoreScheduler import MultiCoreScheduler
+from TimeScale import TimeScale
+from ResultCache import ResultCache
+from JobManager import JobManager, JobQueueFullError
+from SolverPool import SolverPool, SolverPoolFullError, SolveCancelledError
+from ActiveRequests import ActiveRequests
+from ScheduleWriter import ScheduleWriter
+from BatchScheduler import BatchScheduler
+from WhatIfSessions import WhatIf, WhatIfSessions
+from SolverOptions import SolverOptions
+from SolverPortfolio import SolverPortfolio
+from HeuristicScheduler import HeuristicScheduler
+from SchedulabilityCheck import SchedulabilityCheck
+from SchedulerLog import SchedulerLog
+from Metrics import RequestMetrics, ServerMetrics
 
 Config = SimpleNamespace(
     hostName="localhost",
@@ -35,15 +54,67 @@ Config = SimpleNamespace(
     solveProg="",
     os="",
     exeSuffix="",
-    lpFile="system.lp",
     objectiveVariable="sumDependencyDelays",
     individualLetInstanceParams=False,  # Each instance of a LET task can have different parameters
     useOffSet=True,  # Enable task offset
     useHeterogeneousCores=True,
     restrictTaskInstancesToSameCore=True,
     objectiveType=PuLPWriter.OVERALL_END_TO_END,
+    incrementalTightening=True,  # Reuse one LP model across the delay tightening iterations
+    warmStartTightening=True,  # Warm start each tightening iteration from the last feasible solution
+    tightBigM=True,  # Compute the smallest big-M of each LP constraint instead of using one large constant
+    schedulabilityCheck=True,  # Reject systems that fail an analytical schedulability test before building the LP model
+    minCoreUsageStrategy="milp",  # Solve min-core-usage as one model over all cores ("milp") or search the number of cores ("search")
+    solverPortfolio=None,  # Race each solve on all available solvers ("solvers") or on random seeds of the solver ("seeds")
+    portfolioSize=4,  # Maximum number of solves of a portfolio
+    symmetryBreaking=True,  # Only allow one of the interchangeable allocations to identical cores (same speedup and device)
+    timeScaling=True,  # Divide all time quantities by their greatest common divisor before building the LP model
+    timeResolution=None,  # Optional time resolution (ns) that the scaling factor must divide
+    resultCacheSize=64,  # Maximum number of cached scheduling results (0 disables the cache)
+    resultCacheTtl=3600,  # Seconds that a cached scheduling result remains valid
+    resultCacheDir=None,  # Optional directory that backs the cached scheduling results
+    jobWorkers=2,  # Number of scheduling jobs that are solved concurrently
+    jobQueueSize=16,  # Maximum number of scheduling jobs that are queued or running
+    jobRetention=3600,  # Seconds that the result of a finished scheduling job is kept
+    solverProcesses=2,  # Number of processes that solve the requests of the web server (0 solves them in the request threads)
+    solverQueueSize=32,  # Maximum number of requests that are solving or waiting for a solver process
+    cancelSupersededRequests=True,  # Cancel the request of a client when it requests the same goal for the same model again
+    batchOutputDir="schedules",  # Directory that the schedules and summary of a batch (--batch) are written to
+    whatIfSessions=64,  # Maximum number of what-if sessions whose last system and schedule are kept (0 disables the sessions)
+    whatIfSessionTtl=3600,  # Seconds that the last system and schedule of a what-if session are kept
+    whatIfScope="local",  # Re-optimise only the neighbourhood of the changed tasks of a what-if request ("local") or all tasks ("global")
+    timeLimit=None,  # Default time limit (s) of a solve, overridden by the "TimeLimit" plugin parameter
+    mipGap=None,  # Default relative MIP gap of a solve, overridden by the "MipGap" plugin parameter
+    threads=None,  # Default number of solver threads, overridden by the "Threads" plugin parameter
+    heuristicWarmStart=True,  # Start the first solve from the schedule of a greedy heuristic
+    modelBackend="pulp",  # Builder of the multicore LP models ("pulp", "sparse", or "cross-check" to compare both)
+    modelExportDir=None,  # Optional directory that the LP model of each solve is exported to (for debugging)
+    modelExportFormat="lp",  # Format of the exported LP models ("lp" or "mps")
+    variableDumpDir=None,  # Optional directory that the variable values of each solve are dumped to (for debugging)
+    logLevel="INFO",  # Level of the log messages ("DEBUG" also logs the task instances and solver output)
+    logFormat="text",  # Format of the log messages ("text" or "json")
 )
 
+logger = logging.getLogger("LET-LP-Scheduler")
+
+# Cache of scheduling results of the web server
+resultCache = None
+
+# Scheduling jobs of the web server
+jobManager = None
+
+# Solver processes of the web server
+solverPool = None
+
+# Scheduling requests of the web server in progress
+activeRequests = None
+
+# What-if sessions of the web server
+whatIfSessions = None
+
+# Aggregate metrics of the web server
+serverMetrics = None
+
 
 # Web server to handle requests from the LetSynchronise LP plugins.
 # See https://github.com/uniba-swt/LetSynchronise/blob/master/sources/plugins/
@@ -54,104 +125,483 @@ class Server(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         # Allow cross origin headers
         self.send_response(200, "ok")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS, POST")
+        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS, POST, DELETE")
         self.send_header("Access-Control-Allow-Headers", "X-Requested-With")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Headers", "X-Client-Id")
         self.end_headers()
 
     def end_headers(self):
         # Allow cross origin headers
         self.send_header("Access-Control-Allow-Origin", "*")
+        # Correlation id of the request in the log
+        if SchedulerLog.currentRequestId() is not None:
+            self.send_header("X-Request-Id", SchedulerLog.currentRequestId())
         BaseHTTPRequestHandler.end_headers(self)
 
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
     def _set_headers(self):
         self.send_response(200)
         self.send_header("Content-Type", "application/json")
         self.end_headers()
 
-    def _set_error_headers(self, message):
-        self.send_response(501, message)
+    # Writes a JSON response that may contain a schedule. Compressed responses are small, so they are
+    # buffered to send their length, and uncompressed responses are streamed.
+    def writeJson(self, value, compact=False, code=200):
+        encoding = ScheduleWriter.negotiateEncoding(self.headers.get("Accept-Encoding"))
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding is None:
+            self.end_headers()
+            ScheduleWriter(self.wfile, encoding, compact).write(value)
+            return
+
+        buffer = io.BytesIO()
+        ScheduleWriter(buffer, encoding, compact).write(value)
+        body = buffer.getvalue()
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _set_error_headers(self, message, code=501):
+        self.send_response(code, message)
         self.send_header("Content-type", "text/html")
         self.end_headers()
 
     def do_GET(self):
+        with SchedulerLog.request(self.headers.get("X-Request-Id")):
+            self.handleGet()
+
+    def handleGet(self):
+        if self.path.startswith("/jobs/"):
+            self.getJob()
+            return
+
+        # GET /metrics returns the latency histograms, solution status counts and job queue depth
+        if self.path == "/metrics":
+            self._set_headers()
+            self.wfile.write(bytes(json.dumps(serverMetrics.toJson(jobManager, solverPool) if serverMetrics is not None else {}), "utf-8"))
+            return
+
         self._set_headers()
         self.wfile.write(bytes("LET-LP-Scheduler", "utf-8"))
 
-    # FIXME: Add descriptive errors!!!
-    def do_POST(self):
-        """Reads POST request body"""
+    def readBody(self):
+        """Reads the POST request body"""
         try:
             content_len = int(self.headers.get("content-length"))
-            post_body = self.rfile.read(content_len)
+            return self.rfile.read(content_len).decode("utf-8")
         except Exception:
-            traceback.print_exc()
+            logger.exception("LetSynchronise system model could not be read")
             self._set_error_headers("LetSynchronise system model could not be read")
-            return
+            return None
+
+    def readSystem(self):
+        """Reads the LetSynchronise system model in the POST request body"""
+        post_body = self.readBody()
+        if post_body is None:
+            return None
 
         try:
-            system = json.loads(post_body.decode("utf-8"))
+            return json.loads(post_body)
         except Exception:
-            traceback.print_exc()
+            logger.exception("LetSynchronise system model could not be loaded")
             self._set_error_headers("LetSynchronise system model could not be loaded")
+            return None
+
+    def do_POST(self):
+        with SchedulerLog.request(self.headers.get("X-Request-Id")):
+            self.handlePost()
+
+    # FIXME: Add descriptive errors!!!
+    def handlePost(self):
+        if self.path.startswith("/batch/"):
+            self.scheduleBatch()
+            return
+
+        system = self.readSystem()
+        if system is None:
+            return
+        compact = ScheduleWriter.isCompactRequested(system)
+
+        if self.path.startswith("/jobs/"):
+            self.submitJob(system)
             return
 
         try:
             schedule = None
             status = None
-            if self.path and self.path == "/ilp":
-                status, schedule = lpScheduler(system)
-            elif self.path and self.path in ["/min-core-usage", "/min-e2e-mc"]:
-                scheduler = MultiCoreScheduler()
-                status, schedule = scheduler.multicore_core_scheduler(system, self.path, Config)
-            else:
+            if self.path not in SCHEDULING_PATHS:
                 raise Exception(f"Unsupported path {self.path}")
 
-            if status != 1:
-                raise Exception("LetSynchronise system is unschedulable!")
+            # A new request of the client for the same goal and model supersedes this request
+            with activeRequests.track((self.clientId(), self.path, self.modelId(system))) as superseded:
+                status, schedule = scheduleRequest(system, self.path, cancelled=lambda: self.cancellationReason(superseded))
+
+            if not SolverOptions.isSchedulable(status) and not SolverOptions.isTimedOut(status):
+                raise Exception(SchedulabilityCheck.unschedulableMessage(schedule))
+        except SolverPoolFullError as error:
+            self._set_error_headers(str(error), 503)
+            return
+        except SolveCancelledError as error:
+            logger.info(f"Scheduling request cancelled: {error}")
+            try:
+                self._set_error_headers(f"Scheduling request cancelled: {error}", 409)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
         except FileNotFoundError as error:
-            traceback.print_exc()
+            logger.exception("LetSynchronise system model could not be scheduled")
             self._set_error_headers(error)
             return
         except Exception as error:
-            traceback.print_exc()
+            logger.exception("LetSynchronise system model could not be scheduled")
             self._set_error_headers(f"LetSynchronise system model could not be scheduled: {error}")
             return
 
-        self._set_headers()
-        self.wfile.write(bytes(json.dumps(schedule), "utf-8"))
+        # The time limit stopped the solve before it found a feasible schedule, which does not prove that there is none
+        if SolverOptions.isTimedOut(status):
+            logger.info(SolverOptions.timedOutMessage(schedule))
+            self.writeJson(SolverOptions.timedOutResult(schedule), compact, 504)
+            return
+        self.writeJson(schedule, compact)
+
+    # The client is identified by the X-Client-Id header of its requests, or else by its address
+    def clientId(self):
+        return self.headers.get("X-Client-Id") or self.client_address[0]
+
+    # The model of a request is identified by its what-if session (whose requests edit the same model),
+    # or else by the cache key of its system, so that requests for different models do not supersede each other
+    def modelId(self, system):
+        sessionId = WhatIfSessions.sessionId(system)
+        if sessionId is not None:
+            return f"session:{sessionId}"
+        return ResultCache.key(system, self.path, Config)
+
+    # Reason to cancel the scheduling request, or None
+    def cancellationReason(self, superseded):
+        if superseded.is_set():
+            return "superseded by a newer request of the client"
+        if self.isClientDisconnected():
+            return "the client closed the connection"
+        return None
+
+    # The request body has been read, so the connection only becomes readable when the client closes it
+    def isClientDisconnected(self):
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return len(readable) > 0 and self.connection.recv(1, socket.MSG_PEEK) == b""
+        except (OSError, ValueError):
+            return True
+
+    # POST /batch/<goal> schedules the systems of a JSON array or JSON lines body, and streams the result
+    # (and schedule) of each system as a JSON line as soon as it has finished, followed by a summary
+    def scheduleBatch(self):
+        path = self.path[len("/batch"):]
+        if path not in SCHEDULING_PATHS:
+            self._set_error_headers(f"Unsupported path {self.path}")
+            return
+
+        body = self.readBody()
+        if body is None:
+            return
+        try:
+            systems = BatchScheduler.parseSystems(body)
+        except Exception:
+            logger.exception("LetSynchronise system models could not be loaded")
+            self._set_error_headers("LetSynchronise system models could not be loaded")
+            return
+
+        logger.info(f"Batch of {len(systems)} systems")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        startTime = time.time()
+        records = []
+        cancelled = lambda: "the client closed the connection" if self.isClientDisconnected() else None
+        try:
+            for record, schedule in batchScheduler().run(systems, path, cancelled):
+                records.append(record)
+                compact = isinstance(systems[record["index"]][1], dict) and ScheduleWriter.isCompactRequested(systems[record["index"]][1])
+                ScheduleWriter(self.wfile, compact=compact).write(dict(record, schedule=schedule))
+                self.wfile.write(b"\n")
+            self.wfile.write(bytes(json.dumps({"summary": BatchScheduler.summary(records, time.time() - startTime)}) + "\n", "utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("The client closed the connection of the batch")
+
+    # POST /jobs/<goal> starts a scheduling job and returns its job id immediately
+    def submitJob(self, system):
+        path = self.path[len("/jobs"):]
+        if path not in SCHEDULING_PATHS:
+            self._set_error_headers(f"Unsupported path {self.path}")
+            return
+
+        try:
+            job = jobManager.submit(system, path)
+        except JobQueueFullError as error:
+            self._set_error_headers(str(error), 503)
+            return
+
+        logger.info(f"Submitted job {job.id}")
+        self.send_response(202)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Location", f"/jobs/{job.id}")
+        self.end_headers()
+        self.wfile.write(bytes(json.dumps(job.toJson()), "utf-8"))
+
+    # GET /jobs/<id> returns the state of a scheduling job, and its schedule when it is done.
+    # GET /jobs/<id>/events streams the state of the job as JSON lines until it finishes.
+    def getJob(self):
+        jobId, _, resource = self.path[len("/jobs/"):].partition("/")
+        job = jobManager.get(jobId) if jobManager is not None else None
+        if job is None:
+            self._set_error_headers(f"Unknown job {jobId}", 404)
+            return
+
+        if resource == "":
+            self.writeJson(job.toJson(), job.compact)
+        elif resource == "events":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            version = None
+            try:
+                while True:
+                    version = job.waitForUpdate(version, timeout=1)
+                    finished = job.isFinished()
+                    self.wfile.write(bytes(json.dumps(job.toJson(includeSchedule=finished)) + "\n", "utf-8"))
+                    self.wfile.flush()
+                    if finished:
+                        break
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped listening, but the job continues
+                pass
+        else:
+            self._set_error_headers(f"Unsupported path {self.path}", 404)
 
     def do_PUT(self):
         self.do_POST()
 
+    # DELETE /jobs/<id> cancels a scheduling job
+    def do_DELETE(self):
+        with SchedulerLog.request(self.headers.get("X-Request-Id")):
+            jobId = self.path[len("/jobs/"):] if self.path.startswith("/jobs/") else None
+            job = jobManager.cancel(jobId) if jobId and jobManager is not None else None
+            if job is None:
+                self._set_error_headers(f"Unknown job {jobId}", 404)
+                return
+
+            self._set_headers()
+            self.wfile.write(bytes(json.dumps(job.toJson()), "utf-8"))
+
+
+# Request paths of the LetSynchronise plugins
+SCHEDULING_PATHS = ["/ilp", "/min-core-usage", "/min-e2e-mc", "/heuristic"]
+
+# Builders of the multicore LP models
+MODEL_BACKENDS = ["pulp", "sparse", "cross-check"]
+
+# Strategies of the min-core-usage goal
+MIN_CORE_USAGE_STRATEGIES = ["milp", "search"]
+
+
+# Schedule a LetSynchronise system for the goal of a plugin request path.
+# The optional progress callback is called with the objective value of each incumbent while a solver runs,
+# and of the feasible solution of each solve.
+def scheduleSystem(system, path, progress=None):
+    if path == "/ilp":
+        return lpScheduler(system, progress)
+    elif path in ["/min-core-usage", "/min-e2e-mc", "/heuristic"]:
+        scheduler = MultiCoreScheduler()
+        return scheduler.multicore_core_scheduler(system, path, Config, progress)
+    raise Exception(f"Unsupported path {path}")
+
+
+# Schedule a LetSynchronise system in a solver process, with the configuration of its request.
+# A solver process schedules one request at a time, so it can replace its Config.
+def scheduleWithConfig(config, system, path, progress=None):
+    vars(Config).update(config)
+    return scheduleSystem(system, path, progress)
+
+
+# Schedule a LetSynchronise system of a web server request, in a solver process when there is a pool.
+# Repeated requests of an unchanged system are answered from the cache. The optional cancelled callback
+# returns the reason to cancel the request, and cancels it in its solver process.
+def scheduleRequest(system, path, progress=None, cancelled=None):
+    startTime = time.time()
+    # The request is scheduled with the configuration at its arrival
+    config = dict(vars(Config))
+
+    # A request of a what-if session is compared with the last request of the session, and starts from its schedule
+    whatIf = whatIfSessions.whatIf(system, path, Config.whatIfScope) if whatIfSessions is not None else None
+
+    cacheKey = ResultCache.key(system, path, SimpleNamespace(**config))
+    cachedResult = resultCache.get(cacheKey) if resultCache is not None else None
+    if cachedResult is not None:
+        status, schedule = cachedResult
+        logger.info(f"Cached schedule {cacheKey}")
+        observeRequest(path, startTime, status, cached=True)
+        if whatIfSessions is not None:
+            whatIfSessions.update(system, path, status, schedule)
+        # The metrics of the request that solved the cached schedule are replaced with those of this request
+        return status, None if schedule is None else dict(schedule, Metrics=RequestMetrics(startTime, cached=True).toJson())
+
+    solveSystem = system if whatIf is None else dict(system, WhatIf=whatIf)
+    try:
+        if solverPool is not None:
+            status, schedule = solverPool.solve(config, solveSystem, path, progress, cancelled)
+        else:
+            status, schedule = scheduleSystem(solveSystem, path, progress)
+    except SolveCancelledError:
+        observeRequest(path, startTime, None, cancelled=True)
+        raise
+    except Exception:
+        observeRequest(path, startTime, None)
+        raise
+
+    observeRequest(path, startTime, status)
+    if whatIfSessions is not None:
+        whatIfSessions.update(system, path, status, schedule)
+    # The schedule of a what-if request with fixed tasks is not optimal for its system
+    isLocal = len(((schedule or {}).get("WhatIf") or {}).get("fixedTasks") or []) > 0
+    if resultCache is not None and isFinalResult(status, schedule) and not isLocal:
+        resultCache.put(cacheKey, status, schedule)
+    return status, schedule
+
+
+# The systems of a batch are scheduled concurrently by as many threads as there are solver processes
+def batchScheduler():
+    return BatchScheduler(scheduleRequest, Config.solverProcesses)
+
+
+# The makespan of the systems of a batch defaults to the hyper-period, like with --file
+def batchSystems(inputs):
+    for name, system in BatchScheduler.readSystems(inputs):
+        if isinstance(system, dict):
+            system.setdefault("PluginParameters", {}).setdefault("Makespan", 1)
+        yield name, system
+
+
+# Schedule the LetSynchronise systems of batch inputs (JSON files, directories, glob patterns or JSON lines files).
+# The schedule of each system is written to the output directory as soon as it has finished, followed by a summary.
+def scheduleBatchFiles(inputs, path, outputDir):
+    os.makedirs(outputDir, exist_ok=True)
+    startTime = time.time()
+    records = []
+    for record, schedule in batchScheduler().run(batchSystems(inputs), path):
+        if schedule is not None:
+            record["output"] = os.path.join(outputDir, f"{record['name']}.schedule.json")
+            with open(record["output"], "wb") as scheduleFile:
+                ScheduleWriter(scheduleFile).write(schedule)
+        records.append(record)
+        logger.info(f"Batch system {record['name']}: {record['status']} after {record['elapsedTime']:.3f} s")
+
+    summary = BatchScheduler.summary(records, time.time() - startTime)
+    with open(os.path.join(outputDir, "summary.json"), "w") as summaryFile:
+        json.dump(summary, summaryFile, indent=2)
+    logger.info(f"Batch of {summary['systems']} systems scheduled in {summary['wallTime']:.3f} s: {summary['statuses']}")
+    return summary
+
+
+# Record the latency and solution status of a scheduling request in the server metrics
+def observeRequest(path, startTime, status, cached=False, cancelled=False):
+    if serverMetrics is not None:
+        statusName = "Cancelled" if cancelled else pl.LpSolution.get(status, "Error")
+        serverMetrics.observe(path, time.time() - startTime, statusName, cached)
+
+
+# Results of solves that were stopped by the time limit of a request could be improved with more time
+def isFinalResult(status, schedule):
+    if SolverOptions.isSchedulable(status):
+        return not schedule["SolverResult"]["timeLimitReached"]
+    return status == pl.LpSolutionInfeasible
+
 
 # LP Scheduler
-def lpScheduler(system):
+def lpScheduler(system, progress=None):
+    # Time of each phase and size of the LP model
+    metrics = RequestMetrics()
+
+    # Normalise the time quantities of the system to keep the LP constants small
+    with metrics.phase("scale"):
+        timeScale = TimeScale.fromSystem(system, Config)
+        system = timeScale.scaleSystem(system)
+    logger.info(f"Time unit: {timeScale.factor} ns")
+
+    # Time limit, MIP gap and threads of the solves
+    solverOptions = SolverOptions.fromRequest(system, Config)
+
     # Determine the hyper-period of the tasks
     taskPeriods = [task["period"] for task in system["EntityStore"]]
     hyperPeriod = math.lcm(*taskPeriods)
-    print(f"System hyper-period: {hyperPeriod} ns")
+    logger.info(f"System hyper-period: {timeScale.unscaleTime(hyperPeriod)} ns")
 
     # The task schedule is analysed over a scheduling window, starting at 0 ns and
     # ending at the makespan, rounded up to the next hyper-period.
     makespan = system["PluginParameters"]["Makespan"]
     schedulingWindow = math.ceil(makespan / hyperPeriod) * hyperPeriod
-    print(f"Scheduling window: {schedulingWindow} ns")
+    logger.info(f"Scheduling window: {timeScale.unscaleTime(schedulingWindow)} ns")
 
     # A large constant, equal to the scheduling window, is needed when normalising logical disjunctions in LP constraints.
     lpLargeConstant = schedulingWindow
 
+    # Reject systems that fail a fast analytical schedulability test, without building the LP model
+    if Config.schedulabilityCheck:
+        with metrics.phase("check"):
+            check = SchedulabilityCheck.fromLetSystem(system, schedulingWindow, Config, timeScale)
+            check.check(hyperPeriod, max(taskPeriods))
+        if not check.schedulable:
+            logger.info(f"LetSynchronise system is unschedulable: {check.reason}")
+            return pl.LpSolutionInfeasible, check.toSchedule(solverOptions, metrics)
+
     # Get all task dependencies that do not involve system inputs or outputs ("__system")
     taskDependenciesList = set()
+    taskDependencies = []
     for dependency in system["DependencyStore"]:
         taskDependencyPair = f"{dependency['source']['entity']}_{dependency['destination']['entity']}"
         if "__system" in taskDependencyPair: continue
         taskDependenciesList.add(taskDependencyPair)
+        taskDependencies.append((dependency["source"]["entity"], dependency["destination"]["entity"]))
+
+    if system.get("CoreStore") is None or len(system.get("CoreStore")) == 0:
+        # needed for old version of the exported file before multicore support
+        system["CoreStore"] = [ {"name": "c1", "speedup": 1} ]
+
+    # A what-if request starts from the previous schedule of its session, in which its unchanged tasks keep their LET
+    # intervals and the other tasks are scheduled around them by the heuristic. In the local scope, the tasks away
+    # from the changes keep their LET intervals and cores.
+    whatIf = system.get("WhatIf")
+    whatIfSchedule = None
+    if whatIf is not None:
+        with metrics.phase("whatIf"):
+            keptSchedule = previousLetSchedule(system, whatIf, timeScale)
+            whatIfSchedule = HeuristicScheduler().scheduleLetTasks(
+                system["EntityStore"], system["CoreStore"], taskDependencies, schedulingWindow, Config.useHeterogeneousCores, Config.useOffSet, keptSchedule
+            )
+            if whatIfSchedule is not None:
+                whatIf.fixedTasks = whatIf.localTasks(keptSchedule, {task: whatIfSchedule[task]["core"] for task in whatIfSchedule}, taskDependencies)
+        logger.info(f"What-if warm start: {len(keptSchedule)} of {len(system['EntityStore'])} tasks keep their schedule, {len(whatIf.fixedTasks)} are fixed")
+
+    # The symmetry breaking would move the fixed tasks of a what-if request to other identical cores
+    symmetryBreaking = Config.symmetryBreaking and (whatIf is None or len(whatIf.fixedTasks) == 0)
+
+    # The incumbents of the running solves are reported in the time unit of the system
+    incumbent = None if progress is None else lambda objective: progress(timeScale.unscaleTime(objective))
 
     # Store last feasible task schedule
     lastFeasibleSchedule = None
+    lastFeasibleResults = None
+    lastFeasibleStatus = None
     result = None
 
+    # LP model that is reused across the tightening iterations
+    lp = None
+    allTaskInstances = None
+
     # Store the names of the dependency pair instances that we want to reduce their delays.
     delayVariableUpperBounds = {}
 
@@ -168,73 +618,68 @@ def lpScheduler(system):
         lookingForBetterSolution = True
 
         # List of LP constraint used to tighten the current dependency
-        delayVariablesToTighten = []
+        delayVariablesToTighten = set()
 
         while lookingForBetterSolution:
-            print()
-            print(f"Iteration {timesRan} ... {taskDependencyPair}")
+            logger.info(f"Iteration {timesRan} ... {taskDependencyPair}")
             timesRan += 1
-            if system.get("CoreStore") is None or len(system.get("CoreStore")) == 0:
-                # needed for old version of the exported file before multicore support
-                system["CoreStore"] = [ {"name": "c1", "speedup": 1} ]
-
-            # Create LP writer for the selected solver
-            lp = PuLPWriter(
-                Config.lpFile,
-                Config.objectiveVariable,
-                lpLargeConstant,
-                Config.objectiveType,
-            )
-
-            # Create the objective to minimize task dependency delay
-            lp.writeObjective()
-
-            # Equation 2
-            # Encode the task instances over the scheduling window as LP constraints
-            # Return all task instances within the scheduling window
-            allTaskInstances = lp.createTaskInstancesAsConstraints(system, schedulingWindow, system.get("CoreStore"), Config)
 
-            # Equation 3
-            # Create constraints that ensures no two tasks overlap (Single Core)
-            lp.createTaskExecutionConstraints(allTaskInstances.copy(), system.get("CoreStore"), Config)
-
-            # Equations 4 and 5
-            # A dependency instance is simply a pair of source and destination task instances
-            # Each dependency instance can only have 1 source task but can have mutiple destinations
-            # The selected source tasks must complete its execution before the destination task
-            lp.createTaskDependencyConstraints(system, allTaskInstances)
+            # Only the delay upper bounds change between tightening iterations, so the
+            # LP model can be built once and reused.
+            if lp is None or not Config.incrementalTightening:
+                with metrics.phase("build"):
+                    lp, allTaskInstances = createLpModel(system, schedulingWindow, lpLargeConstant, symmetryBreaking)
+                    metrics.recordModel(lp.prob, sum(len(instances) for instances in allTaskInstances.values()))
 
             # Tightening delays is only required if tasks are scheduled independently of other instances within the period
             if Config.individualLetInstanceParams:
-                lp.writeComment("Tighten dependency delays")
-                for delayVariable, delayValue in delayVariableUpperBounds.items():
-                    # Add constraints to tighten the current dependency pair to find better solutions.
-                    lp.writeDelayConstraints(
-                        delayVariable,
-                        delayValue,
-                        delayVariable in delayVariablesToTighten,
-                    )
-
-            # Equation 6
-            # Create objective equation has to be called after createTaskDependencyConstraints as the depenedency selection varaibles are needed to compute the summed end-to-end time
-            lp.writeObjectiveEquation()
+                with metrics.phase("tighten"):
+                    lp.writeComment("Tighten dependency delays")
+                    lp.clearDelayConstraints()
+                    for delayVariable, delayValue in delayVariableUpperBounds.items():
+                        # Add constraints to tighten the current dependency pair to find better solutions.
+                        lp.writeDelayConstraints(
+                            delayVariable,
+                            delayValue,
+                            delayVariable in delayVariablesToTighten,
+                        )
 
             # Call the LP solver
-            results = {}
-
-            lp.solve(Config.solverProg)
+            results = None
+
+            warmStart = Config.incrementalTightening and Config.warmStartTightening and lastFeasibleResults is not None
+            if warmStart:
+                with metrics.phase("warmStart"):
+                    lp.setInitialValues(lastFeasibleResults.values)
+            elif whatIfSchedule is not None and timesRan == 1 and lp.setInitialSchedule(whatIfSchedule, system["CoreStore"], Config):
+                # The tasks in the local scope keep the LET intervals and cores of the previous schedule
+                warmStart = whatIf.warmStart = True
+                lp.fixTasks(whatIf.fixedTasks)
+            elif Config.heuristicWarmStart and timesRan == 1:
+                # Start the first solve from a greedy schedule, so that the solver has an incumbent immediately
+                with metrics.phase("heuristic"):
+                    heuristicSchedule = HeuristicScheduler().scheduleLetTasks(
+                        system["EntityStore"], system["CoreStore"], taskDependencies, schedulingWindow, Config.useHeterogeneousCores, Config.useOffSet
+                    )
+                    warmStart = heuristicSchedule is not None and lp.setInitialSchedule(heuristicSchedule, system["CoreStore"], Config)
+                logger.info(f"Heuristic warm start: {warmStart}")
+            if whatIf is not None and not whatIf.warmStart:
+                # Tasks are only fixed on top of the previous schedule
+                whatIf.fixedTasks = []
+            lp.solve(Config.solverProg, warmStart, solverOptions, metrics, incumbent)
 
             if lp.prob.status == 1:
                 result = lp.prob.sol_status
-                for v in lp.prob.variables():
-                    results[str(v.name)] = v.varValue
+                with metrics.phase("extract"):
+                    results = lp.results()
+                lastFeasibleResults = results
+                lastFeasibleStatus = result
             else:
                 result = lp.prob.sol_status
 
-            print("Results:")
-            if len(results) == 0:
+            if results is None:
                 # If there are no results, then the problem is infeasible
-                print("LetSynchronise system is unschedulable!")
+                logger.info("LetSynchronise system is unschedulable!")
 
                 # No need to try and tighten an infeasible problem
                 lookingForBetterSolution = False
@@ -242,60 +687,134 @@ def lpScheduler(system):
                 delayVariableUpperBounds = {}
             else:
                 # Problem is feasible
-                print("LetSynchronise system is schedulable")
-                print(f"Current objective value: {results[Config.objectiveVariable]} ns")
-                lastDelays = results[Config.objectiveVariable]
+                lastDelays = timeScale.unscaleTime(results.objective)
+                logger.info(f"LetSynchronise system is schedulable. Current objective value: {lastDelays} ns")
+                if progress is not None:
+                    progress(lastDelays)
                 # Create the task schedule that is encoded in the LP solution
-                lastFeasibleSchedule = exportSchedule(system, lp, allTaskInstances, results, Config)
+                with metrics.phase("extract"):
+                    lastFeasibleSchedule = exportSchedule(system, lp, allTaskInstances, results, Config)
+                    lastFeasibleSchedule["SolverResult"] = timeScale.unscaleSolverResult(lp.solverResult)
 
                 # Determine upper bounds needed to tighten the dependency delays in the next iteration
-                delayVariablesToTighten = lp.dependencyInstanceDelayVariables[taskDependencyPair]
-                delayVariableUpperBounds = tightenProblemSpace(lp, results)
-            print("--------")
+                with metrics.phase("tighten"):
+                    delayVariablesToTighten = set(lp.dependencyInstanceDelayVariables[taskDependencyPair])
+                    delayVariableUpperBounds = tightenProblemSpace(lp, results)
 
             # If all instances of a LET task share the same parameters, then no more improvements are possible.
             if not Config.individualLetInstanceParams:
                 lookingForBetterSolution = False
 
-        if not Config.individualLetInstanceParams:
+            # Stop tightening when the time limit of the request has been reached
+            if solverOptions.isExpired():
+                logger.info("Time limit reached")
+                lookingForBetterSolution = False
+
+        if not Config.individualLetInstanceParams or solverOptions.isExpired():
             break
 
-    print(f"Iterated a total of {timesRan} times")
-    print(f"Final objective value: {lastDelays} ns")
+    # The last iteration can be infeasible after tightening, but the last feasible schedule is still valid
+    if lastFeasibleSchedule is not None:
+        result = lastFeasibleStatus
+
+    logger.info(f"Iterated a total of {timesRan} times")
+    logger.info(f"Final objective value: {lastDelays} ns")
+    with metrics.phase("extract"):
+        lastFeasibleSchedule = timeScale.unscaleSchedule(lastFeasibleSchedule)
+    if lastFeasibleSchedule is None and lp is not None:
+        # Without a schedule, the SolverResult of the last solve tells whether its time limit was reached
+        lastFeasibleSchedule = {"SolverResult": timeScale.unscaleSolverResult(lp.solverResult)}
+    if lastFeasibleSchedule is not None:
+        lastFeasibleSchedule["Metrics"] = metrics.toJson()
+        if whatIf is not None:
+            lastFeasibleSchedule["WhatIf"] = whatIf.toJson()
     return result, lastFeasibleSchedule
 
 
-def tightenProblemSpace(lp, results):
-    delayResults = {
-        solutionVariable: solutionValue for solutionVariable, solutionValue in results.items() if "delay_" in solutionVariable
-    }
+# LET intervals (see HeuristicScheduler.scheduleLetTasks) of the unchanged tasks of a what-if request in the previous
+# schedule of its session, when their cores still exist and their task instances start in the same periods
+def previousLetSchedule(system, whatIf, timeScale):
+    cores = {core["name"]: core for core in system.get("CoreStore") or []}
+    previousTasks = whatIf.previousTasks(timeScale)
+    schedule = {}
+    for task in system["EntityStore"]:
+        previousTask = previousTasks.get(task["name"])
+        if previousTask is None or 0 not in previousTask["instances"]:
+            continue
+        instance = previousTask["instances"][0]
+        if instance["core"] not in cores or instance["periodStartTime"] != previousTask["offset"]:
+            continue
+
+        executionTime = task["wcet"]
+        if Config.useHeterogeneousCores:
+            executionTime = math.ceil(task["wcet"] / float(cores[instance["core"]]["speedup"]))
+        schedule[task["name"]] = {
+            "core": instance["core"],
+            "offset": previousTask["offset"] if Config.useOffSet else 0,
+            "letStartTime": instance["letStartTime"] - instance["periodStartTime"],
+            "executionTime": executionTime,
+        }
+    return schedule
 
-    # Get the max delay of each task dependency instance
-    maxDependencyDelays = {}
-    for dependency, delayVariables in lp.dependencyInstanceDelayVariables.items():
-        maxDependencyDelays[dependency] = -1
-        for solutionVariable, solutionValue in delayResults.items():
-            if solutionVariable in delayVariables:
-                maxDependencyDelays[dependency] = max(maxDependencyDelays[dependency], float(solutionValue))
 
-    # Get new upper bounds for each task dependency instance
+def createLpModel(system, schedulingWindow, lpLargeConstant, symmetryBreaking=True):
+    # Create LP writer for the selected solver
+    lp = PuLPWriter(
+        Config.objectiveVariable,
+        lpLargeConstant,
+        Config.objectiveType,
+        Config.tightBigM,
+    )
+
+    # Create the objective to minimize task dependency delay
+    lp.writeObjective()
+
+    # Equation 2
+    # Encode the task instances over the scheduling window as LP constraints
+    # Return all task instances within the scheduling window
+    allTaskInstances = lp.createTaskInstancesAsConstraints(system, schedulingWindow, system.get("CoreStore"), Config)
+
+    # Equation 3
+    # Create constraints that ensures no two tasks overlap (Single Core)
+    lp.createTaskExecutionConstraints(allTaskInstances.copy(), system.get("CoreStore"), Config)
+    if symmetryBreaking:
+        lp.createCoreSymmetryConstraints(allTaskInstances, system.get("CoreStore"))
+
+    # Equations 4 and 5
+    # A dependency instance is simply a pair of source and destination task instances
+    # Each dependency instance can only have 1 source task but can have mutiple destinations
+    # The selected source tasks must complete its execution before the destination task
+    lp.createTaskDependencyConstraints(system, allTaskInstances)
+
+    # Equation 6
+    # Create objective equation has to be called after createTaskDependencyConstraints as the depenedency selection varaibles are needed to compute the summed end-to-end time
+    lp.writeObjectiveEquation()
+
+    return lp, allTaskInstances
+
+
+# The delays of each task dependency are bounded by the max delay of its dependency instances.
+# Each delay result is visited once.
+def tightenProblemSpace(lp, results):
     delayVariableUpperBounds = {}
     for dependency, delayVariables in lp.dependencyInstanceDelayVariables.items():
+        maxDependencyDelay = round(max(results.delays[dependency], default=-1))
         for delayVariable in delayVariables:
-            delayVariableUpperBounds[delayVariable] = round(maxDependencyDelays[dependency])
+            delayVariableUpperBounds[delayVariable] = maxDependencyDelay
 
     return delayVariableUpperBounds
 
 
+# Results are the LpResults of the solve, indexed by task and task instance ids (see PuLPWriter)
 def exportSchedule(system, lp, allTaskInstances, results, Config):
     schedule = {"EntityInstancesStore": []}
 
-    for task in system["EntityStore"]:
+    for taskId, task in enumerate(system["EntityStore"]):
         if task["name"] == "__system": continue
 
         initialOffset = 0
         if Config.useOffSet:
-            initialOffset = float(results[lp.taskOffset(task["name"])])
+            initialOffset = float(results.offsets[taskId])
 
         taskInstancesJson = {
             "name": task["name"],
@@ -306,28 +825,19 @@ def exportSchedule(system, lp, allTaskInstances, results, Config):
 
         for instance in allTaskInstances[task["name"]]:
             index = len(taskInstancesJson["value"])
-            letStartTimeKey = lp.taskInstStartTime(instance)
-            letEndTimeKey = lp.taskInstEndTime(instance)
-            periodStartTimeKey = lp.taskInstPeriodStartTime(instance)
-            periodEndTimeKey = lp.taskInstPeriodEndTime(instance)
 
             # FIXME: Unsafe rounding! LET start and end times could exceed the period end and start times
-            letStartTime = round(float(results[letStartTimeKey]))
-            letEndTime = round(float(results[letEndTimeKey]))
-            periodStartTime = round(float(results[periodStartTimeKey]))
-            periodEndTime = round(float(results[periodEndTimeKey]))
+            letStartTime = round(results.startTimes[instance])
+            letEndTime = round(results.endTimes[instance])
+            periodStartTime = round(results.periodStartTimes[instance])
+            periodEndTime = round(results.periodEndTimes[instance])
             wcet = int(task["wcet"])
 
             allocatedCore = None
-            for c in system["CoreStore"]:
-                if (results[lp.taskInstCoreAllocation(lp.instVarName(task["name"], index), c["name"])] == 1):
-                    allocatedCore = c
-                    break
+            if results.cores[instance] is not None:
+                allocatedCore = system["CoreStore"][results.cores[instance]]
             if allocatedCore == None:
-                print("Error task instance with no core allocation on export")
-                print("Task: " + task["name"])
-                print("Instance: " + instance)
-                raise Exception(f"Error task instance with no core allocation on export. Task: {task['name']}, Instance: {instance}")
+                raise Exception(f"Error task instance with no core allocation on export. Task: {task['name']}, Instance: {index}")
 
             taskInstance = {
                 "instance": index,
@@ -358,10 +868,61 @@ if __name__ == "__main__":
     print("Avaliable Solver on this PC: " + str(avaliableSolvers))
     parser = argparse.ArgumentParser()
     parser.add_argument("--file", type=str, default="")
+    parser.add_argument("--batch", type=str, nargs="+", default=[])
+    parser.add_argument("--output-dir", type=str, default=Config.batchOutputDir)
     parser.add_argument("--solver", choices=avaliableSolvers, type=str, required=True)
-    parser.add_argument("--goal", choices=["min-core-usage", "min-e2e-mc", "ilp"], type=str)
+    parser.add_argument("--goal", choices=["min-core-usage", "min-e2e-mc", "ilp", "heuristic"], type=str)
+    parser.add_argument("--cache-size", type=int, default=Config.resultCacheSize)
+    parser.add_argument("--cache-ttl", type=float, default=Config.resultCacheTtl)
+    parser.add_argument("--cache-dir", type=str, default=Config.resultCacheDir)
+    parser.add_argument("--job-workers", type=int, default=Config.jobWorkers)
+    parser.add_argument("--job-queue-size", type=int, default=Config.jobQueueSize)
+    parser.add_argument("--solver-processes", type=int, default=Config.solverProcesses)
+    parser.add_argument("--solver-queue-size", type=int, default=Config.solverQueueSize)
+    parser.add_argument("--no-supersede", action="store_true")
+    parser.add_argument("--what-if-sessions", type=int, default=Config.whatIfSessions)
+    parser.add_argument("--what-if-ttl", type=float, default=Config.whatIfSessionTtl)
+    parser.add_argument("--what-if-scope", choices=WhatIf.SCOPES, type=str, default=Config.whatIfScope)
+    parser.add_argument("--time-limit", type=float, default=Config.timeLimit)
+    parser.add_argument("--mip-gap", type=float, default=Config.mipGap)
+    parser.add_argument("--threads", type=int, default=Config.threads)
+    parser.add_argument("--backend", choices=MODEL_BACKENDS, type=str, default=Config.modelBackend)
+    parser.add_argument("--portfolio", choices=SolverPortfolio.MODES, type=str, default=Config.solverPortfolio)
+    parser.add_argument("--portfolio-size", type=int, default=Config.portfolioSize)
+    parser.add_argument("--min-core-strategy", choices=MIN_CORE_USAGE_STRATEGIES, type=str, default=Config.minCoreUsageStrategy)
+    parser.add_argument("--export-dir", type=str, default=Config.modelExportDir)
+    parser.add_argument("--export-format", choices=SolverOptions.EXPORT_FORMATS, type=str, default=Config.modelExportFormat)
+    parser.add_argument("--dump-dir", type=str, default=Config.variableDumpDir)
+    parser.add_argument("--log-level", choices=SchedulerLog.LEVELS, type=str, default=Config.logLevel)
+    parser.add_argument("--log-format", choices=SchedulerLog.FORMATS, type=str, default=Config.logFormat)
     args = parser.parse_args()
 
+    Config.resultCacheSize = args.cache_size
+    Config.resultCacheTtl = args.cache_ttl
+    Config.resultCacheDir = args.cache_dir
+    Config.jobWorkers = args.job_workers
+    Config.jobQueueSize = args.job_queue_size
+    Config.solverProcesses = args.solver_processes
+    Config.solverQueueSize = args.solver_queue_size
+    Config.cancelSupersededRequests = not args.no_supersede
+    Config.whatIfSessions = args.what_if_sessions
+    Config.whatIfSessionTtl = args.what_if_ttl
+    Config.whatIfScope = args.what_if_scope
+    Config.batchOutputDir = args.output_dir
+    Config.timeLimit = args.time_limit
+    Config.mipGap = args.mip_gap
+    Config.threads = args.threads
+    Config.modelBackend = args.backend
+    Config.minCoreUsageStrategy = args.min_core_strategy
+    Config.solverPortfolio = args.portfolio
+    Config.portfolioSize = args.portfolio_size
+    Config.modelExportDir = args.export_dir
+    Config.modelExportFormat = args.export_format
+    Config.variableDumpDir = args.dump_dir
+    Config.logLevel = args.log_level
+    Config.logFormat = args.log_format
+    SchedulerLog.configure(Config.logLevel, Config.logFormat)
+
     # Set the OS and executable file suffix
     Config.os = sys.platform
     if Config.os == "win32":
@@ -371,7 +932,7 @@ if __name__ == "__main__":
     if args.solver in avaliableSolvers:
         Config.solverProg = args.solver
 
-    print(f"Solver: {Config.solverProg}")
+    logger.info(f"Solver: {Config.solverProg}")
 
     # Specify a LET system model file and create a schedule, or run in webserver mode for the LetSynchronise plugin.
     if len(args.file) > 0:
@@ -379,7 +940,7 @@ if __name__ == "__main__":
             file = open(args.file)
             system = json.load(file)
             system["PluginParameters"] = {"Makespan": 1}  # make makespan equal to hyperperiod
-            if args.goal in ["min-core-usage", "min-e2e-mc"]:
+            if args.goal in ["min-core-usage", "min-e2e-mc", "heuristic"]:
                 multicore = MultiCoreScheduler()
                 schedule = multicore.multicore_core_scheduler(system, f"/{args.goal}", Config)
             else:
@@ -388,14 +949,29 @@ if __name__ == "__main__":
             scheduleFile.write(json.dumps(schedule, indent=2))
             scheduleFile.close()
 
-        except FileNotFoundError as e:
-            print(f'Unable to open "{args.file}"!')
-            print(e)
-            traceback.print_exc()
+        except FileNotFoundError:
+            logger.exception(f'Unable to open "{args.file}"!')
+    elif len(args.batch) > 0:
+        if Config.solverProcesses > 0:
+            solverPool = SolverPool(scheduleWithConfig, Config.solverProcesses, Config.solverQueueSize, Config.logLevel, Config.logFormat)
+        try:
+            scheduleBatchFiles(args.batch, f"/{args.goal or 'ilp'}", Config.batchOutputDir)
+        finally:
+            if solverPool is not None:
+                solverPool.shutdown()
     else:
+        if Config.resultCacheSize > 0:
+            resultCache = ResultCache(Config.resultCacheSize, Config.resultCacheTtl, Config.resultCacheDir)
+        jobManager = JobManager(scheduleRequest, Config.jobWorkers, Config.jobQueueSize, Config.jobRetention)
+        if Config.solverProcesses > 0:
+            solverPool = SolverPool(scheduleWithConfig, Config.solverProcesses, Config.solverQueueSize, Config.logLevel, Config.logFormat)
+        activeRequests = ActiveRequests(Config.cancelSupersededRequests)
+        if Config.whatIfSessions > 0:
+            whatIfSessions = WhatIfSessions(Config.whatIfSessions, Config.whatIfSessionTtl)
+        serverMetrics = ServerMetrics()
+
         webServer = ThreadingHTTPServer((Config.hostName, Config.serverPort), Server)
-        print(f"Server started at http://{Config.hostName}:{Config.serverPort}")
-        print()
+        logger.info(f"Server started at http://{Config.hostName}:{Config.serverPort}")
 
         try:
             webServer.serve_forever()
@@ -403,4 +979,7 @@ if __name__ == "__main__":
             pass
 
         webServer.server_close()
-        print("Server stopped")
+        jobManager.shutdown()
+        if solverPool is not None:
+            solverPool.shutdown()
+        logger.info("Server stopped")
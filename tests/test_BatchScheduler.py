@@ -0,0 +1,76 @@
+import json
+
+import pulp as pl
+import pytest
+
+from BatchScheduler import BatchScheduler
+
+
+def test_json_array_of_systems():
+    assert BatchScheduler.parseSystems(' [{"a": 1}, {"b": 2}]', "batch") == [("batch-0", {"a": 1}), ("batch-1", {"b": 2})]
+
+
+def test_invalid_json_array_is_an_error():
+    with pytest.raises(ValueError):
+        BatchScheduler.parseSystems('[{"a": 1},')
+
+
+def test_json_lines_are_named_after_their_line():
+    systems = BatchScheduler.parseSystems('{"a": 1}\n\n  \n{"b": 2}\n')
+    assert systems == [("system-0", {"a": 1}), ("system-3", {"b": 2})]
+
+
+def test_invalid_json_lines_are_kept_as_errors():
+    systems = BatchScheduler.parseSystems('{"a": 1}\nnot json\n')
+    assert systems[0] == ("system-0", {"a": 1})
+    assert systems[1][0] == "system-1"
+    assert isinstance(systems[1][1], ValueError)
+
+
+def test_unique_names():
+    names = set()
+    assert [BatchScheduler.uniqueName(name, names) for name in ["a", "a", "b", "a"]] == ["a", "a-2", "b", "a-3"]
+
+
+def test_systems_are_read_from_files_directories_and_json_lines(tmp_path):
+    (tmp_path / "one.json").write_text(json.dumps({"a": 1}))
+    (tmp_path / "many.jsonl").write_text('{"b": 2}\n{"c": 3}\n')
+    (tmp_path / "broken.json").write_text("{")
+    systems = dict(BatchScheduler.readSystems([str(tmp_path), str(tmp_path / "one.json")]))
+    assert systems["one"] == {"a": 1}
+    assert systems["one-2"] == {"a": 1}
+    assert systems["many-0"] == {"b": 2}
+    assert systems["many-1"] == {"c": 3}
+    assert isinstance(systems["broken"], ValueError)
+
+
+def test_results_of_all_systems():
+    def scheduleFunction(system, path, progress, cancelled):
+        if system.get("fail"):
+            raise RuntimeError("solver failed")
+        return pl.LpSolutionOptimal, {"SolverResult": {"objectiveValue": system["value"]}}
+
+    systems = [("ok", {"value": 3}), ("failed", {"fail": True}), ("invalid", ValueError("not JSON")), ("list", [1])]
+    records = {record["name"]: record for record, _ in BatchScheduler(scheduleFunction, 2).run(systems, "/ilp")}
+    assert records["ok"]["status"] == "Optimal Solution Found"
+    assert records["ok"]["objectiveValue"] == 3
+    assert records["failed"]["status"] == "Error"
+    assert records["failed"]["error"] == "RuntimeError: solver failed"
+    assert records["invalid"]["error"] == "ValueError: not JSON"
+    assert records["list"]["error"] == "ValueError: The system is not a JSON object"
+
+    summary = BatchScheduler.summary([record for record in records.values()], 1.0)
+    assert summary["systems"] == 4
+    assert summary["statuses"] == {"Optimal Solution Found": 1, "Error": 3}
+
+
+def test_cancelled_batch_does_not_schedule_the_remaining_systems():
+    scheduled = []
+
+    def scheduleFunction(system, path, progress, cancelled):
+        scheduled.append(system)
+        return pl.LpSolutionOptimal, {}
+
+    records = [record for record, _ in BatchScheduler(scheduleFunction, 1).run([("a", {}), ("b", {})], "/ilp", lambda: "stopped")]
+    assert scheduled == []
+    assert [record["status"] for record in records] == ["Cancelled", "Cancelled"]
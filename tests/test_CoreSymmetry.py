@@ -0,0 +1,55 @@
+from CoreSymmetry import CoreSymmetry
+
+CORES = [
+    {"name": "c1", "speedup": 1, "device": "d1"},
+    {"name": "c2", "speedup": 1, "device": "d1"},
+    {"name": "c3", "speedup": 2, "device": "d1"},
+    {"name": "c4", "speedup": 1, "device": "d1"},
+    {"name": "c5", "speedup": 1, "device": "d2"},
+]
+
+
+# The symmetry-breaking constraints: an item can only be allocated to a core of a class if an
+# earlier item is allocated to the previous core of the class
+def isCanonical(items, allocation, cores):
+    for previousCore, core in CoreSymmetry.orderedCorePairs(cores):
+        for index, item in enumerate(items):
+            if allocation[item] == core and not any(allocation[earlier] == previousCore for earlier in items[:index]):
+                return False
+    return True
+
+
+def test_identical_cores_have_the_same_speedup_and_device():
+    assert CoreSymmetry.coreClasses(CORES) == [[0, 1, 3]]
+    assert CoreSymmetry.orderedCorePairs(CORES) == [(0, 1), (1, 3)]
+
+
+def test_cores_without_identical_cores_have_no_pairs():
+    assert CoreSymmetry.orderedCorePairs(CORES[2:3] + CORES[4:]) == []
+
+
+def test_identical_cores_are_relabelled_in_the_order_of_their_first_item():
+    items = ["a", "b", "c", "d"]
+    allocation = {"a": 3, "b": 2, "c": 0, "d": 3}
+    canonical = CoreSymmetry.canonicalAllocation(items, allocation, CORES)
+    assert canonical == {"a": 0, "b": 2, "c": 1, "d": 0}
+    assert not isCanonical(items, allocation, CORES)
+    assert isCanonical(items, canonical, CORES)
+
+
+def test_relabelling_keeps_the_items_that_share_a_core_together():
+    items = ["a", "b", "c", "d", "e"]
+    allocation = {"a": 1, "b": 4, "c": 3, "d": 1, "e": 3}
+    canonical = CoreSymmetry.canonicalAllocation(items, allocation, CORES)
+    assert canonical["a"] == canonical["d"]
+    assert canonical["c"] == canonical["e"]
+    assert canonical["a"] != canonical["c"]
+    # Cores that are not identical to other cores keep their items
+    assert canonical["b"] == 4
+    assert isCanonical(items, canonical, CORES)
+
+
+def test_canonical_allocation_is_unchanged():
+    items = ["a", "b", "c"]
+    allocation = {"a": 0, "b": 1, "c": 2}
+    assert CoreSymmetry.canonicalAllocation(items, allocation, CORES) == allocation
@@ -0,0 +1,104 @@
+from fractions import Fraction
+from types import SimpleNamespace
+
+import pytest
+
+from SchedulabilityCheck import SchedulabilityCheck
+from TimeScale import TimeScale
+
+CONFIG = SimpleNamespace(useHeterogeneousCores=False, useOffSet=False)
+
+
+def letSystem(wcets, period=10, cores=2):
+    return {
+        "EntityStore": [{"name": f"t{index}", "period": period, "wcet": wcet} for index, wcet in enumerate(wcets)],
+        "CoreStore": [{"name": f"c{index + 1}", "speedup": 1} for index in range(cores)],
+    }
+
+
+# Task instances of the MultiCoreScheduler, whose LET intervals are their periods
+def taskInstances(wcets, period=10, window=20):
+    tasks = [{"name": f"t{index}", "wcet": wcet, "period": period, "duration": period} for index, wcet in enumerate(wcets)]
+    tasksInstances = [
+        {
+            "name": task["name"],
+            "value": [{"instance": -1, "letStartTime": -period, "letEndTime": 0}] + [
+                {"instance": instance, "letStartTime": start, "letEndTime": start + period}
+                for instance, start in enumerate(range(0, window, period))
+            ],
+        }
+        for task in tasks
+    ]
+    return tasksInstances, tasks
+
+
+def multicoreSystem(cores=2, devices=True):
+    return {
+        "CoreStore": [dict({"name": f"c{index + 1}", "speedup": 1}, **({"device": "d1"} if devices else {})) for index in range(cores)],
+        "DeviceStore": [{"name": "d1", "delays": {}}],
+    }
+
+
+def test_valid_let_system_passes():
+    check = SchedulabilityCheck.fromLetSystem(letSystem([4, 4, 4]), 20, CONFIG, TimeScale())
+    assert check.check(10, 10)
+    assert check.schedulable
+    assert check.reason is None
+    assert check.minCores == 2
+
+
+def test_instance_that_does_not_fit_its_period_fails():
+    check = SchedulabilityCheck.fromLetSystem(letSystem([12]), 20, CONFIG, TimeScale())
+    assert not check.check(10, 10)
+    assert "Task t0 needs 12 ns" in check.reason
+
+
+def test_utilisation_above_the_capacity_fails():
+    check = SchedulabilityCheck.fromLetSystem(letSystem([8, 8, 8], cores=2), 20, CONFIG, TimeScale())
+    assert not check.check(10, 10)
+    assert "exceeds the capacity of the 2 cores" in check.reason
+
+
+def test_reasons_are_in_the_time_unit_of_the_system():
+    check = SchedulabilityCheck.fromLetSystem(letSystem([12]), 20, CONFIG, TimeScale(1000))
+    check.check(10, 10)
+    assert "Task t0 needs 12000 ns" in check.reason
+
+
+def test_valid_multicore_system_passes():
+    tasksInstances, tasks = taskInstances([4, 5, 6])
+    check = SchedulabilityCheck.fromTaskInstances(tasksInstances, tasks, multicoreSystem(), TimeScale(), "/min-core-usage")
+    assert check.check(10, 10)
+    assert check.minCores == 2
+
+
+def test_cores_without_devices_are_only_checked_for_min_e2e():
+    tasksInstances, tasks = taskInstances([4])
+    system = multicoreSystem(devices=False)
+    for path in ["/min-core-usage", "/heuristic", None]:
+        check = SchedulabilityCheck.fromTaskInstances(tasksInstances, tasks, system, TimeScale(), path)
+        assert check.check(10, 10)
+
+    with pytest.raises(ValueError, match="unknown device"):
+        SchedulabilityCheck.fromTaskInstances(tasksInstances, tasks, system, TimeScale(), "/min-e2e-mc")
+
+
+def test_system_without_cores_fails():
+    tasksInstances, tasks = taskInstances([4])
+    check = SchedulabilityCheck.fromTaskInstances(tasksInstances, tasks, {"CoreStore": []}, TimeScale(), "/min-core-usage")
+    assert not check.check(10, 10)
+    assert check.reason == "The system has no cores"
+
+
+def test_cores_for_a_load():
+    check = SchedulabilityCheck([1, 2, 1], TimeScale())
+    assert check.coresFor(Fraction(1, 2)) == 1
+    assert check.coresFor(2) == 1
+    assert check.coresFor(Fraction(5, 2)) == 2
+    assert check.coresFor(4) == 3
+    assert check.coresFor(5) is None
+
+
+def test_unschedulable_message_has_the_reason():
+    assert SchedulabilityCheck.unschedulableMessage({"Unschedulable": "reason"}) == "LetSynchronise system is unschedulable: reason"
+    assert SchedulabilityCheck.unschedulableMessage(None) == "LetSynchronise system is unschedulable!"
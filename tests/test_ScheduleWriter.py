@@ -0,0 +1,88 @@
+import gzip
+import io
+import json
+import zlib
+
+import pytest
+
+from ScheduleWriter import ScheduleWriter
+
+CORE = {"name": "c1", "speedup": 1, "device": "d1"}
+
+SCHEDULE = {
+    "EntityInstancesStore": [
+        {"name": "a", "initialOffset": 0, "value": [
+            {"instance": index, "letStartTime": index * 10, "letEndTime": index * 10 + 5, "currentCore": CORE,
+             "executionIntervals": [{"core": "c1", "startTime": index * 10, "endTime": index * 10 + 2}]}
+            for index in range(3)
+        ]},
+        {"value": []},
+        {"name": "b", "value": "not a list"},
+    ],
+    "SolverResult": {"status": "Optimal Solution Found", "objectiveValue": 1.5, "bound": None},
+    "Metrics": {"phases": {}},
+}
+
+
+def written(value, encoding=None, compact=False):
+    stream = io.BytesIO()
+    ScheduleWriter(stream, encoding, compact).write(value)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("acceptEncoding, encoding", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("br", None),
+    ("gzip, deflate, br", "gzip"),
+    ("deflate", "deflate"),
+    ("GZIP", "gzip"),
+    ("gzip;q=0, deflate", "deflate"),
+    ("gzip;q=0, deflate;q=0", None),
+    ("gzip;q=invalid", None),
+    ("*", "gzip"),
+    ("*;q=0", None),
+    ("*, gzip;q=0", "deflate"),
+])
+def test_encoding_negotiation(acceptEncoding, encoding):
+    assert ScheduleWriter.negotiateEncoding(acceptEncoding) == encoding
+
+
+def test_output_is_identical_to_json_dumps():
+    assert written(SCHEDULE) == json.dumps(SCHEDULE).encode("utf-8")
+
+
+def test_other_values_are_identical_to_json_dumps():
+    job = {"id": "1", "schedule": SCHEDULE, "values": [1, "x", None]}
+    assert written(job) == json.dumps(job).encode("utf-8")
+    assert written([1, 2]) == json.dumps([1, 2]).encode("utf-8")
+
+
+def test_compact_output_references_cores_by_name():
+    expected = json.loads(json.dumps(SCHEDULE))
+    for instance in expected["EntityInstancesStore"][0]["value"]:
+        instance["currentCore"] = "c1"
+    assert written(SCHEDULE, compact=True) == json.dumps(expected, separators=(",", ":")).encode("utf-8")
+
+
+def test_compressed_output_is_the_uncompressed_output():
+    assert gzip.decompress(written(SCHEDULE, "gzip")) == written(SCHEDULE)
+    assert zlib.decompress(written(SCHEDULE, "deflate")) == written(SCHEDULE)
+
+
+def test_long_schedules_are_written_in_chunks():
+    schedule = {"EntityInstancesStore": [{"name": "a", "value": [{"instance": index, "currentCore": CORE} for index in range(5000)]}]}
+    stream = io.BytesIO()
+    writes = []
+    stream.write = lambda data, write=stream.write: writes.append(len(data)) or write(data)
+    ScheduleWriter(stream).write(schedule)
+    assert len(writes) > 1
+    assert max(writes) < 2 * ScheduleWriter.BUFFER_SIZE
+    assert stream.getvalue() == json.dumps(schedule).encode("utf-8")
+
+
+def test_compact_format_is_requested_with_a_plugin_parameter():
+    assert ScheduleWriter.isCompactRequested({"PluginParameters": {"CompactSchedule": True}})
+    assert not ScheduleWriter.isCompactRequested({"PluginParameters": None})
+    assert not ScheduleWriter.isCompactRequested({})
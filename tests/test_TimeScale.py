@@ -0,0 +1,95 @@
+import copy
+from types import SimpleNamespace
+
+from TimeScale import TimeScale
+
+
+def config(timeScaling=True, useHeterogeneousCores=False, timeResolution=None):
+    return SimpleNamespace(timeScaling=timeScaling, useHeterogeneousCores=useHeterogeneousCores, timeResolution=timeResolution)
+
+
+def task(name, period, wcet, initialOffset=0):
+    return {"name": name, "initialOffset": initialOffset, "activationOffset": 0, "duration": period, "period": period, "wcet": wcet}
+
+
+def system():
+    return {
+        "EntityStore": [task("a", 2000000, 500000, 1000000), task("b", 4000000, 1500000)],
+        "CoreStore": [{"name": "c1", "speedup": 1, "device": "d1"}, {"name": "c2", "speedup": 2, "device": "d1"}],
+        "DeviceStore": [{"name": "d1", "delays": {"tcp": {"wcdt": 100000}}}],
+        "NetworkDelayStore": [{"name": "d1-to-d2", "wcdt": 300000}],
+        "PluginParameters": {"Makespan": 1000001},
+    }
+
+
+def test_factor_is_the_gcd_of_the_time_quantities():
+    assert TimeScale.fromSystem(system(), config()).factor == 100000
+
+
+def test_factor_is_limited_to_a_divisor_of_the_resolution():
+    assert TimeScale.fromSystem(system(), config(timeResolution=40000)).factor == 20000
+
+
+def test_execution_times_on_each_core_stay_exact():
+    heterogeneous = system()
+    heterogeneous["CoreStore"][1]["speedup"] = 4
+    # 500000 / 4 = 125000 ns on the fast core
+    assert TimeScale.fromSystem(heterogeneous, config(useHeterogeneousCores=True)).factor == 25000
+
+
+def test_systems_are_not_scaled_without_whole_times_or_scaling():
+    fractional = system()
+    fractional["EntityStore"][0]["wcet"] = 500000.5
+    assert TimeScale.fromSystem(fractional, config()).factor == 1
+    assert TimeScale.fromSystem(system(), config(timeScaling=False)).factor == 1
+
+
+def test_scaled_system_is_a_copy():
+    original = system()
+    unchanged = copy.deepcopy(original)
+    scaled = TimeScale(100000).scaleSystem(original)
+    assert original == unchanged
+    assert scaled["EntityStore"][0] == task("a", 20, 5, 10)
+    assert scaled["DeviceStore"][0]["delays"]["tcp"]["wcdt"] == 1
+    assert scaled["NetworkDelayStore"][0]["wcdt"] == 3
+    # The makespan is rounded up
+    assert scaled["PluginParameters"]["Makespan"] == 11
+    assert scaled["CoreStore"] is original["CoreStore"]
+
+
+def test_factor_one_returns_the_system():
+    original = system()
+    assert TimeScale().scaleSystem(original) is original
+
+
+def test_schedule_is_unscaled():
+    schedule = {
+        "EntityInstancesStore": [{
+            "name": "a",
+            "initialOffset": 10,
+            "value": [{
+                "instance": 0,
+                "periodStartTime": 10, "periodEndTime": 30, "letStartTime": 10, "letEndTime": 15, "executionTime": 5,
+                "executionIntervals": [{"core": "c1", "startTime": 10, "endTime": 15}],
+            }],
+        }],
+    }
+    unscaled = TimeScale(100000).unscaleSchedule(schedule)
+    instance = unscaled["EntityInstancesStore"][0]["value"][0]
+    assert unscaled["EntityInstancesStore"][0]["initialOffset"] == 1000000
+    assert [instance[time] for time in TimeScale.INSTANCE_TIMES] == [1000000, 3000000, 1000000, 1500000, 500000]
+    assert instance["executionIntervals"][0] == {"core": "c1", "startTime": 1000000, "endTime": 1500000}
+    assert TimeScale(100000).unscaleSchedule(None) is None
+
+
+def test_solver_result_is_unscaled():
+    solverResult = TimeScale(1000).unscaleSolverResult({"objectiveValue": 3, "bound": None})
+    assert solverResult == {"objectiveValue": 3000, "bound": None}
+
+
+def test_times_that_are_not_multiples_cannot_be_scaled():
+    timeScale = TimeScale(100000)
+    assert timeScale.scaleTime(2500000) == 25
+    assert timeScale.scaleTime(2500001) is None
+    assert timeScale.scaleTime(None) is None
+    assert timeScale.unscaleTime(timeScale.scaleTime(2500000)) == 2500000
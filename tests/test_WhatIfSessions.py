@@ -0,0 +1,135 @@
+import copy
+
+import pulp as pl
+import pytest
+
+from TimeScale import TimeScale
+from WhatIfSessions import WhatIf, WhatIfSessions
+
+
+def task(name, wcet=100):
+    return {"name": name, "period": 1000, "duration": 1000, "wcet": wcet}
+
+
+def dependency(source, destination):
+    return {"name": f"{source}_{destination}", "source": {"entity": source, "port": "out"}, "destination": {"entity": destination, "port": "in"}}
+
+
+def system(sessionId="s1"):
+    return {
+        "EntityStore": [task("a"), task("b"), task("c"), task("d")],
+        "DependencyStore": [dependency("a", "b"), dependency("__system", "a")],
+        "CoreStore": [{"name": "c1", "speedup": 1}, {"name": "c2", "speedup": 1}],
+        "PluginParameters": {"Makespan": 1, "SessionId": sessionId},
+    }
+
+
+# Schedule with the first instance of each task on its core
+def schedule(cores):
+    return {
+        "EntityInstancesStore": [
+            {"name": name, "initialOffset": 0, "value": [{
+                "instance": 0, "periodStartTime": 0, "letStartTime": 0, "letEndTime": 1000,
+                "executionIntervals": [{"core": core, "startTime": 100, "endTime": 200}],
+            }]}
+            for name, core in cores.items()
+        ],
+    }
+
+
+def test_unchanged_system_has_no_changes():
+    model = WhatIfSessions.model(system())
+    assert WhatIfSessions.diff(model, WhatIfSessions.model(system())) == (set(), [])
+
+
+def test_changed_added_and_removed_tasks():
+    changed = system()
+    changed["EntityStore"][0]["wcet"] = 200
+    changed["EntityStore"][3] = task("e")
+    assert WhatIfSessions.diff(WhatIfSessions.model(system()), WhatIfSessions.model(changed)) == ({"a", "d", "e"}, [])
+
+
+def test_tasks_of_changed_dependencies_change():
+    changed = system()
+    changed["DependencyStore"] = [dependency("a", "c"), dependency("__system", "a"), dependency("d", "__system")]
+    changedTasks, changedStores = WhatIfSessions.diff(WhatIfSessions.model(system()), WhatIfSessions.model(changed))
+    assert changedTasks == {"a", "b", "c", "d"}
+    assert changedStores == []
+
+
+def test_changed_stores_and_makespan():
+    changed = system()
+    changed["CoreStore"].append({"name": "c3", "speedup": 1})
+    changed["PluginParameters"]["Makespan"] = 2
+    assert WhatIfSessions.diff(WhatIfSessions.model(system()), WhatIfSessions.model(changed)) == (set(), ["CoreStore", "Makespan"])
+
+
+def test_local_tasks_exclude_the_neighbourhood_of_the_changes():
+    whatIf = WhatIf("s1", schedule({"a": "c1", "b": "c2", "c": "c2", "d": "c3"}), ["a"], [])
+    cores = {"a": "c1", "b": "c2", "c": "c2", "d": "c3", "e": "c4"}
+    # b depends on the changed task a, c shares a core with b that was moved by the repair
+    assert whatIf.localTasks(["b", "c", "d"], cores, [("a", "b")]) == ["c", "d"]
+    # e was added, so it was moved by the repair and its core is affected
+    assert whatIf.localTasks(["b", "d"], cores, [("a", "b")]) == ["d"]
+
+
+def test_local_tasks_exclude_the_tasks_on_the_previous_core_of_a_changed_task():
+    whatIf = WhatIf("s1", schedule({"a": "c1", "b": "c1", "c": "c2", "d": "c3"}), ["a"], [])
+    # a moved from c1 to c2, so the tasks on both cores are re-optimised
+    assert whatIf.localTasks(["b", "c", "d"], {"a": "c2", "b": "c1", "c": "c2", "d": "c3"}, []) == ["d"]
+
+
+def test_global_scope_keeps_no_tasks():
+    assert WhatIf("s1", schedule({"a": "c1", "b": "c2"}), ["a"], [], "global").localTasks(["b"], {"a": "c1", "b": "c2"}, []) == []
+    # Changes of the system stores affect all tasks
+    whatIf = WhatIf("s1", schedule({"a": "c1", "b": "c2"}), [], ["CoreStore"], "local")
+    assert whatIf.scope == "global"
+    assert whatIf.localTasks(["a", "b"], {"a": "c1", "b": "c2"}, []) == []
+
+
+def test_previous_tasks_leave_out_changed_tasks_and_inexact_times():
+    previous = schedule({"a": "c1", "b": "c2", "c": "c1"})
+    previous["EntityInstancesStore"][2]["value"][0]["letStartTime"] = 150
+    tasks = WhatIf("s1", previous, ["a"], []).previousTasks(TimeScale(100))
+    assert tasks == {"b": {"offset": 0, "instances": {0: {"periodStartTime": 0, "letStartTime": 0, "letEndTime": 10, "startTime": 1, "core": "c2"}}}}
+
+
+def test_sessions_keep_the_last_schedulable_request():
+    sessions = WhatIfSessions()
+    assert sessions.whatIf(system(), "/ilp") is None
+    sessions.update(system(), "/ilp", pl.LpSolutionInfeasible, None)
+    assert sessions.whatIf(system(), "/ilp") is None
+
+    previous = schedule({"a": "c1", "b": "c2", "c": "c1", "d": "c2"})
+    sessions.update(system(), "/ilp", pl.LpSolutionOptimal, previous)
+    changed = system()
+    changed["EntityStore"][1]["wcet"] = 200
+    whatIf = sessions.whatIf(changed, "/ilp")
+    assert whatIf.changedTasks == {"b"}
+    assert whatIf.schedule is previous
+    # Sessions are kept per goal, and requests without a session have no what-if
+    assert sessions.whatIf(changed, "/min-e2e-mc") is None
+    assert sessions.whatIf(dict(changed, PluginParameters={"Makespan": 1}), "/ilp") is None
+
+
+def test_least_recently_used_sessions_are_evicted():
+    sessions = WhatIfSessions(maxSize=2)
+    for sessionId in ["s1", "s2", "s3"]:
+        sessions.update(system(sessionId), "/ilp", pl.LpSolutionOptimal, schedule({}))
+    assert sessions.whatIf(system("s1"), "/ilp") is None
+    assert sessions.whatIf(system("s3"), "/ilp") is not None
+
+
+def test_unknown_scope_is_an_error():
+    request = system()
+    request["PluginParameters"]["WhatIfScope"] = "nearby"
+    with pytest.raises(ValueError, match="Unknown what-if scope"):
+        WhatIfSessions().whatIf(request, "/ilp")
+
+
+def test_model_is_a_copy():
+    request = system()
+    model = WhatIfSessions.model(request)
+    request["EntityStore"][0]["wcet"] = 300
+    assert model["EntityStore"][0]["wcet"] == 100
+    assert copy.deepcopy(model) == model